@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音声同期エンジンのベンチマークと精度テスト
+
+既知のオフセットを持つ合成音声のペア（トーン・ノイズ・音楽風の信号に
+ノイズ、ゲイン差、ドリフト、録音風の帯域制限と残響を加えたもの）をローカルで生成し、
+各同期モードのオフセット誤差と実行時間を記録する。
+保存済みのベースラインよりオフセットの精度または信頼度が悪化した場合は終了コード1で終了する。
+実行時間はマシンに依存するため、ベースラインより遅い項目は表示のみ
+（--strict-time を指定し、ベースラインと同じマシンで実行した場合は終了コード1）
+
+使い方:
+    python benchmark_audio_sync.py                     # ベースラインと比較
+    python benchmark_audio_sync.py --update-baseline   # ベースラインを更新
+    python benchmark_audio_sync.py --engines pyramid fingerprint --cases music_noisy
+"""
+import sys
+import os
+import io
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import numpy as np
+import scipy.io.wavfile
+import scipy.signal
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src', 'scripts'))
+
+import audio_sync_advanced  # noqa: E402
+from disk_cache import DiskCache  # noqa: E402
+
+SR = 22050
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'benchmark_baseline.json')
+
+# 許容誤差（秒）: これ以下の誤差は正解とみなす（0.1秒グリッドのエンジンの最大誤差 0.05秒 + 余裕）
+CORRECT_TOLERANCE = 0.06
+
+# テストケース: 信号の種類、長さ、オフセット、劣化条件、対象エンジン
+# （duration2 は比較音声の長さ、engines が None の場合はすべてのエンジン。
+#  warm_cache の場合は特徴キャッシュを作成する実行の後、キャッシュを使う2回目を計測する）
+BENCHMARK_CASES = [
+    {'name': 'tone_clean', 'signal': 'tone', 'duration': 60.0, 'offset': 2.35},
+    {'name': 'noise_gain', 'signal': 'noise', 'duration': 60.0, 'offset': -4.1, 'gain': 0.3},
+    {'name': 'music_clean', 'signal': 'music', 'duration': 60.0, 'offset': 3.2},
+    {'name': 'music_noisy', 'signal': 'music', 'duration': 60.0, 'offset': 7.8, 'snr_db': 10.0},
+    {'name': 'music_gain_noise', 'signal': 'music', 'duration': 60.0, 'offset': -12.6,
+     'gain': 2.0, 'snr_db': 20.0},
+    {'name': 'music_phone', 'signal': 'music', 'duration': 60.0, 'offset': -6.2,
+     'gain': 0.5, 'snr_db': 15.0, 'phone': True},
+    {'name': 'music_drift', 'signal': 'music', 'duration': 120.0, 'offset': 3.3,
+     'drift_ppm': 100.0, 'snr_db': 25.0},
+    {'name': 'music_long_offset', 'signal': 'music', 'duration': 60.0, 'duration2': 240.0,
+     'offset': 95.4, 'snr_db': 20.0, 'engines': ['fingerprint']},
+    {'name': 'long_take_warm_cache', 'signal': 'music', 'duration': 60.0, 'duration2': 1200.0,
+     'offset': 4.4, 'snr_db': 20.0, 'engines': ['simple', 'pyramid', 'fingerprint'], 'warm_cache': True},
+]
+
+# ベンチマーク対象のエンジン（SYNC_MODES）
+BENCHMARK_ENGINES = list(audio_sync_advanced.SYNC_MODES)
+
+def generate_source(kind, duration, rng):
+    """
+    テスト用の元信号を生成
+
+    Args:
+        kind: 'tone'（ランダムな周波数の持続音の列）、'noise'（振幅変調したノイズ）、
+              'music'（減衰する音符と打撃音）
+        duration: 長さ（秒）
+        rng: 乱数生成器
+
+    Returns:
+        np.ndarray: 波形（float64、ピーク0.8）
+    """
+    n = int(duration * SR)
+    y = np.zeros(n)
+
+    if kind == 'tone':
+        segment = int(0.5 * SR)
+        for start in range(0, n, segment):
+            length = min(segment, n - start)
+            t = np.arange(length) / SR
+            freq = 200 * 2 ** (rng.uniform(0, 3))
+            y[start:start + length] = np.sin(2 * np.pi * freq * t) * np.hanning(length)
+    elif kind == 'noise':
+        envelope = np.repeat(rng.uniform(0.1, 1.0, n // (SR // 10) + 1), SR // 10)[:n]
+        y = rng.standard_normal(n) * scipy.signal.savgol_filter(envelope, 2205, 2)
+    elif kind == 'music':
+        note = int(0.25 * SR)
+        for i, start in enumerate(range(0, n, note)):
+            length = min(note, n - start)
+            t = np.arange(length) / SR
+            freq = 220 * 2 ** (rng.integers(0, 24) / 12)
+            y[start:start + length] += np.exp(-t * 6) * (np.sin(2 * np.pi * freq * t)
+                                                         + 0.5 * np.sin(4 * np.pi * freq * t))
+            if i % 2 == 0:
+                click = min(400, length)
+                y[start:start + click] += rng.normal(0, 0.5, click)
+    else:
+        raise ValueError(f"Unknown signal: {kind}")
+
+    return y / np.abs(y).max() * 0.8
+
+def degrade(y, case, rng):
+    # 録音風の劣化（帯域制限・残響）、ゲイン差、ノイズを加える
+    if case.get('phone'):
+        sos = scipy.signal.butter(4, [300, 3400], btype='bandpass', fs=SR, output='sos')
+        y = scipy.signal.sosfilt(sos, y)
+        ir_len = int(0.3 * SR)
+        ir = rng.standard_normal(ir_len) * np.exp(-np.arange(ir_len) / (0.05 * SR))
+        ir[0] = 1.0
+        y = scipy.signal.fftconvolve(y, ir / np.abs(ir).sum() * 4)[:len(y)]
+
+    y = y * case.get('gain', 1.0)
+
+    if 'snr_db' in case:
+        power = np.mean(y ** 2)
+        y = y + rng.standard_normal(len(y)) * np.sqrt(power / 10 ** (case['snr_db'] / 10))
+
+    return y
+
+def build_pair(case, directory, seed=0):
+    """
+    既知のオフセットを持つ音声ペアを生成して WAV（16bit PCM）で保存
+
+    audio2(t + offset + drift * t) = audio1(t) となるように比較音声を作成する
+
+    Args:
+        case: BENCHMARK_CASES の要素
+        directory: 保存先のディレクトリ
+        seed: 乱数シード
+
+    Returns:
+        tuple: (参照音声のパス, 比較音声のパス)
+    """
+    rng = np.random.default_rng(seed)
+    duration = case['duration']
+    duration2 = case.get('duration2', duration)
+    offset = case['offset']
+    drift = case.get('drift_ppm', 0.0) * 1e-6
+
+    # オフセットとドリフトで参照される範囲をすべて含む元信号
+    margin = abs(offset) + abs(drift) * duration2 + 1.0
+    source = generate_source(case['signal'], max(duration, duration2) + 2 * margin, rng)
+
+    start = int(margin * SR)
+    audio1 = source[start:start + int(duration * SR)]
+
+    t2 = np.arange(int(duration2 * SR)) / SR
+    source_pos = start + (t2 - offset) / (1 + drift) * SR
+    audio2 = np.interp(source_pos, np.arange(len(source)), source, left=0.0, right=0.0)
+    audio2 = degrade(audio2, case, rng)
+
+    paths = []
+    for name, y in (('audio1', audio1), ('audio2', audio2)):
+        path = os.path.join(directory, f"{case['name']}_{name}.wav")
+        scipy.io.wavfile.write(path, SR, (np.clip(y, -1.0, 1.0) * 32767).astype(np.int16))
+        paths.append(path)
+    return tuple(paths)
+
+def run_engine(engine, audio1_path, audio2_path, case, cache=None):
+    """
+    1つのエンジンを実行し、オフセット誤差と実行時間を返す
+
+    Args:
+        engine: SYNC_MODES のいずれか
+        audio1_path: 参照音声のパス
+        audio2_path: 比較音声のパス
+        case: BENCHMARK_CASES の要素
+        cache: 特徴キャッシュ（DiskCache、Noneの場合はキャッシュしない）
+
+    Returns:
+        dict: {'offset', 'error', 'correct', 'wall_time', 'confidence'} または {'error_message'}
+    """
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = audio_sync_advanced.run_sync(audio1_path, audio2_path, case['duration'], mode=engine,
+                                                  cache=cache)
+    except Exception as e:
+        return {'error_message': f"{type(e).__name__}: {e}", 'wall_time': time.perf_counter() - start}
+    wall_time = time.perf_counter() - start
+
+    error = abs(result['offset'] - case['offset'])
+    return {
+        'offset': float(result['offset']),
+        'error': float(error),
+        'correct': bool(error <= CORRECT_TOLERANCE),
+        'wall_time': float(wall_time),
+        'confidence': float(result.get('confidence', 0.0))
+    }
+
+def compare_to_baseline(results, baseline, error_tolerance, confidence_tolerance, time_factor, time_slack):
+    """
+    ベースラインと比較して悪化した項目を返す
+
+    Args:
+        results: {ケース名: {エンジン名: 結果}}
+        baseline: ベースラインの results
+        error_tolerance: 許容する誤差の増加（秒）
+        confidence_tolerance: 許容する信頼度の低下
+        time_factor: 許容する実行時間の倍率
+        time_slack: 実行時間の比較に加える余裕（秒）
+
+    Returns:
+        tuple: (精度・信頼度の悪化の説明文のリスト, 実行時間の悪化の説明文のリスト)
+    """
+    regressions = []
+    slowdowns = []
+    for case_name, engines in results.items():
+        for engine, result in engines.items():
+            base = baseline.get(case_name, {}).get(engine)
+            if base is None:
+                continue
+            label = f"{case_name}/{engine}"
+
+            if 'error_message' in result:
+                if 'error_message' not in base:
+                    regressions.append(f"{label}: failed ({result['error_message']})")
+                continue
+            if 'error_message' in base:
+                continue
+
+            if base['correct'] and not result['correct']:
+                regressions.append(f"{label}: no longer correct (error {result['error']:.4f}s)")
+            elif result['error'] > base['error'] + error_tolerance:
+                regressions.append(f"{label}: error {base['error']:.4f}s -> {result['error']:.4f}s")
+
+            if result['confidence'] < base['confidence'] - confidence_tolerance:
+                regressions.append(f"{label}: confidence {base['confidence']:.3f} -> {result['confidence']:.3f}")
+
+            if time_factor and result['wall_time'] > base['wall_time'] * time_factor + time_slack:
+                slowdowns.append(f"{label}: time {base['wall_time']:.2f}s -> {result['wall_time']:.2f}s")
+
+    return regressions, slowdowns
+
+def machine_info():
+    """
+    実行時間を比較できるマシンかどうかの判定に使う情報
+
+    Returns:
+        dict: {'python', 'cpu_count', 'platform'}
+    """
+    return {'python': sys.version.split()[0], 'cpu_count': os.cpu_count(), 'platform': platform.platform()}
+
+def print_table(results):
+    print(f"\n{'case':<20} {'engine':<18} {'offset':>10} {'error':>9} {'time':>8}  result")
+    print('-' * 76)
+    for case_name, engines in results.items():
+        for engine, result in engines.items():
+            if 'error_message' in result:
+                print(f"{case_name:<20} {engine:<18} {'-':>10} {'-':>9} {result['wall_time']:>7.2f}s  "
+                      f"ERROR {result['error_message']}")
+                continue
+            mark = 'ok' if result['correct'] else 'WRONG'
+            print(f"{case_name:<20} {engine:<18} {result['offset']:>+10.4f} {result['error']:>9.4f} "
+                  f"{result['wall_time']:>7.2f}s  {mark}")
+
+def main():
+    parser = argparse.ArgumentParser(description='音声同期エンジンのベンチマークと精度テスト')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='ベースラインのJSONファイル')
+    parser.add_argument('--update-baseline', action='store_true', help='結果をベースラインとして保存')
+    parser.add_argument('--cases', nargs='+', help='実行するケース名（デフォルト: すべて）')
+    parser.add_argument('--engines', nargs='+', choices=BENCHMARK_ENGINES,
+                        help='実行するエンジン（デフォルト: すべて）')
+    parser.add_argument('--repeat', type=int, default=1, help='各エンジンの実行回数（最短時間を記録）')
+    parser.add_argument('--error-tolerance', type=float, default=0.01,
+                        help='許容する誤差の増加（秒、デフォルト: 0.01）')
+    parser.add_argument('--confidence-tolerance', type=float, default=0.05,
+                        help='許容する信頼度の低下（デフォルト: 0.05）')
+    parser.add_argument('--time-factor', type=float, default=1.5,
+                        help='許容する実行時間の倍率（0で時間を比較しない、デフォルト: 1.5）')
+    parser.add_argument('--time-slack', type=float, default=0.25,
+                        help='実行時間の比較に加える余裕（秒、デフォルト: 0.25）')
+    parser.add_argument('--strict-time', action='store_true',
+                        help='ベースラインと同じマシンの場合、実行時間の悪化も失敗とする')
+    parser.add_argument('--output', help='結果を保存するJSONファイル')
+    parser.add_argument('--keep-dir', help='生成した音声を保存するディレクトリ（デフォルト: 一時ディレクトリ）')
+    args = parser.parse_args()
+
+    cases = [c for c in BENCHMARK_CASES if not args.cases or c['name'] in args.cases]
+    if not cases:
+        parser.error(f"No matching cases (available: {', '.join(c['name'] for c in BENCHMARK_CASES)})")
+    engines = args.engines or BENCHMARK_ENGINES
+
+    print("=== Audio Sync Benchmark ===")
+    print(f"Python: {sys.version.split()[0]}, CPU: {os.cpu_count()}, Platform: {platform.platform()}")
+
+    # numba の JIT コンパイルを計測から除外
+    print("Warming up...")
+    audio_sync_advanced.warmup()
+
+    results = {}
+    with contextlib.ExitStack() as stack:
+        directory = args.keep_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix='audio_sync_bench_'))
+        os.makedirs(directory, exist_ok=True)
+
+        for case in cases:
+            audio1_path, audio2_path = build_pair(case, directory)
+            case_engines = [e for e in engines if case.get('engines') is None or e in case['engines']]
+            results[case['name']] = {}
+
+            for engine in case_engines:
+                cache = None
+                if case.get('warm_cache'):
+                    # 1回目でキャッシュを作成し、計測はキャッシュを使う実行のみ
+                    cache = DiskCache(os.path.join(directory, f"{case['name']}_{engine}_cache"))
+                    run_engine(engine, audio1_path, audio2_path, case, cache)
+                runs = [run_engine(engine, audio1_path, audio2_path, case, cache)
+                        for _ in range(max(1, args.repeat))]
+                best = min(runs, key=lambda r: r['wall_time'])
+                results[case['name']][engine] = best
+                status = best.get('error_message') or f"error={best['error']:.4f}s"
+                print(f"  {case['name']}/{engine}: {status}, {best['wall_time']:.2f}s", flush=True)
+
+    print_table(results)
+
+    total = sum(len(e) for e in results.values())
+    correct = sum(1 for e in results.values() for r in e.values() if r.get('correct'))
+    print(f"\nCorrect: {correct}/{total} (tolerance {CORRECT_TOLERANCE}s)")
+
+    report = {
+        'machine': machine_info(),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        # 一部のケース・エンジンのみ実行した場合は既存のベースラインに統合
+        baseline = {'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline['machine'] = report['machine']
+        for case_name, case_results in results.items():
+            baseline['results'].setdefault(case_name, {}).update(case_results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline} (run with --update-baseline)")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions, slowdowns = compare_to_baseline(results, baseline['results'], args.error_tolerance,
+                                                 args.confidence_tolerance, args.time_factor, args.time_slack)
+
+    # 実行時間はベースラインを記録したマシンと同じ場合のみ失敗とする
+    same_machine = baseline.get('machine') == machine_info()
+    if slowdowns:
+        if args.strict_time and same_machine:
+            regressions += slowdowns
+        else:
+            note = '' if same_machine else f" (baseline machine: {baseline.get('machine')})"
+            print(f"\n=== SLOWER THAN BASELINE (advisory){note} ===")
+            for line in slowdowns:
+                print(f"  ! {line}")
+
+    if regressions:
+        print("\n=== REGRESSIONS ===")
+        for line in regressions:
+            print(f"  ✗ {line}")
+        return 1
+
+    print("\n✓ No regressions against baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
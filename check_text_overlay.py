@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+テキストオーバーレイの合成結果の確認
+
+ランダムな背景フレームに add_text_to_video のテキスト画像を合成し、
+SpriteCompositor（外接矩形のみの整数演算）の結果が MoviePy の CompositeVideoClip
+（ImageClip を全画面で重ねる従来の合成）と1画素も違わないことを確認する。
+一致しない場合は終了コード1で終了する
+
+使い方:
+    python check_text_overlay.py
+    python check_text_overlay.py --width 1080 --height 1920 --text "アーティスト|曲名"
+"""
+import sys
+import os
+import io
+import argparse
+import contextlib
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src', 'scripts'))
+
+from add_text_to_video import SpriteCompositor, create_text_image  # noqa: E402
+from overlay_cache import crop_to_content  # noqa: E402
+
+# 確認するテキストのスタイル（半透明の背景と不透明な文字の両方の縁を含む）
+CHECK_STYLES = [
+    {'text_color': 'white', 'bg_color': 'black', 'bg_opacity': 0.7},
+    {'text_color': 'black', 'bg_color': 'white', 'bg_opacity': 1.0},
+    {'text_color': '#ff3366', 'bg_color': '#204080', 'bg_opacity': 0.35},
+]
+
+def composite_with_clips(frame, text_image):
+    """
+    MoviePy の CompositeVideoClip で1フレームを合成（以前の合成方法）
+
+    Args:
+        frame: RGBの背景フレーム
+        text_image: フレーム全体のRGBAテキスト画像
+
+    Returns:
+        numpy array: 合成したフレーム
+    """
+    try:
+        from moviepy import ImageClip, CompositeVideoClip
+    except ImportError:
+        from moviepy.editor import ImageClip, CompositeVideoClip
+
+    video = ImageClip(frame, duration=1)
+    text_clip = ImageClip(text_image, duration=1)
+    try:
+        text_clip = text_clip.with_position((0, 0))
+    except AttributeError:
+        text_clip = text_clip.set_position((0, 0))
+    return CompositeVideoClip([video, text_clip]).get_frame(0)
+
+def main():
+    parser = argparse.ArgumentParser(description='テキストオーバーレイの合成結果の確認')
+    parser.add_argument('--width', type=int, default=720, help='フレームの幅（デフォルト: 720）')
+    parser.add_argument('--height', type=int, default=1280, help='フレームの高さ（デフォルト: 1280）')
+    parser.add_argument('--text', default='テキスト合成の確認|Overlay check', help='表示するテキスト')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+
+    failures = 0
+    for style in CHECK_STYLES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            text_image = create_text_image(args.text, args.width, args.height, **style)
+        cropped = crop_to_content(text_image)
+        if cropped is None:
+            print(f"  {style}: empty text image, skipped")
+            continue
+
+        sprite, x, y = cropped
+        expected = composite_with_clips(frame, text_image)
+        actual = SpriteCompositor(sprite, x, y)(frame)
+
+        diff = np.abs(actual.astype(np.int16) - expected.astype(np.int16))
+        if diff.any():
+            failures += 1
+            print(f"  ✗ {style}: {np.count_nonzero(diff.any(axis=2))} pixels differ (max {diff.max()})")
+        else:
+            print(f"  ✓ {style}: identical")
+
+    if failures:
+        print(f"\n{failures}/{len(CHECK_STYLES)} styles differ from CompositeVideoClip")
+        return 1
+    print("\n✓ SpriteCompositor matches CompositeVideoClip")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -44,15 +44,134 @@ async function extractAudio(videoPath, outputPath) {
   });
 }
 
+/**
+ * 同期結果をログに出力
+ * @param {Object} result - 同期結果
+ */
+function logSyncResult(result) {
+  console.log('\n=== Python音声同期完了 ===');
+  console.log(`オフセット: ${result.offset.toFixed(3)}秒`);
+  console.log(`信頼度: ${result.confidence.toFixed(4)}`);
+  console.log(`品質: ${result.quality_jp} (${result.quality})`);
+
+  if (result.checkpoints) {
+    console.log(`\nチェックポイント結果:`);
+    result.checkpoints.forEach((cp, i) => {
+      console.log(`  ${i+1}. ${cp.position_name}: オフセット=${cp.offset.toFixed(3)}秒, 信頼度=${cp.confidence.toFixed(4)} (${cp.quality_jp})`);
+    });
+  }
+
+  if (result.budget_exhausted) {
+    console.warn(`⚠️ 時間制限に達したため途中の結果です（評価したスキャン位置: ${result.positions_evaluated}）`);
+  } else if (result.early_exit) {
+    console.log(`目標信頼度に到達したため探索を早期終了（評価したスキャン位置: ${result.positions_evaluated}）`);
+  }
+
+  if (result.profile) {
+    const phases = Object.entries(result.profile.phases)
+      .map(([name, phase]) => `${name}=${phase.time.toFixed(3)}秒`)
+      .join(', ');
+    console.log(`\n処理時間: ${result.profile.total_time.toFixed(3)}秒 (${phases})`);
+    if (result.profile.peak_rss) {
+      console.log(`最大メモリ使用量: ${(result.profile.peak_rss / (1024 * 1024)).toFixed(1)}MB`);
+    }
+  }
+}
+
+/**
+ * 常駐同期サーバー（audio_sync_advanced.py --serve --socket）にリクエストを送信
+ * @param {string} socketPath - Unixソケットのパス
+ * @param {Object} request - 同期リクエスト
+ * @returns {Promise<Object>} - 同期結果
+ */
+function requestSyncServer(socketPath, request) {
+  const net = require('net');
+
+  return new Promise((resolve, reject) => {
+    const client = net.createConnection(socketPath);
+    let buffer = '';
+
+    client.setEncoding('utf8');
+
+    client.on('connect', () => {
+      client.write(JSON.stringify(request) + '\n');
+    });
+
+    client.on('data', (chunk) => {
+      buffer += chunk;
+      const newlineIndex = buffer.indexOf('\n');
+      if (newlineIndex === -1) {
+        return;
+      }
+
+      client.end();
+      try {
+        const response = JSON.parse(buffer.substring(0, newlineIndex));
+        if (response.ok) {
+          resolve(response.result);
+        } else {
+          reject(new Error(`Sync server error (${response.error_type}): ${response.error}`));
+        }
+      } catch (error) {
+        reject(new Error(`Failed to parse sync server response: ${error.message}`));
+      }
+    });
+
+    client.on('error', (error) => {
+      reject(error);
+    });
+  });
+}
+
 /**
  * Pythonスクリプトを実行して高精度な音声同期を行う
- * @param {string} audioAPath - 動画Aの音声ファイル
- * @param {string} audioBPath - 動画Bの音声ファイル（基準）
+ * 環境変数 AUDIO_SYNC_SOCKET が設定されている場合は常駐同期サーバーを使用し、
+ * 接続できなければスクリプトを直接実行する
+ * 動画ファイルを直接渡すと、スクリプトが ffmpeg（FFMPEG_PATH）で必要な区間の音声だけをデコードする
+ * （常駐同期サーバーは FFMPEG_PATH か PATH 上の ffmpeg を使う）
+ * @param {string} audioAPath - 動画Aまたはその音声ファイル
+ * @param {string} audioBPath - 動画Bまたはその音声ファイル（基準）
  * @param {number} videoDuration - 動画の長さ（秒）
- * @param {string} mode - 'simple' または 'multi_checkpoint'
+ * @param {string} mode - 'simple'、'multi_checkpoint'、'gcc_phat'、'xcorr'、'pyramid'、'fingerprint' または 'drift'
  * @returns {Promise<Object>} - 同期結果
  */
 async function runPythonAudioSync(audioAPath, audioBPath, videoDuration, mode = 'multi_checkpoint') {
+  const socketPath = process.env.AUDIO_SYNC_SOCKET;
+
+  // multi_checkpoint の目標信頼度（到達した時点で探索を終了）と時間制限（秒）
+  const targetConfidence = process.env.AUDIO_SYNC_TARGET_CONFIDENCE
+    ? parseFloat(process.env.AUDIO_SYNC_TARGET_CONFIDENCE)
+    : null;
+  const timeBudget = process.env.AUDIO_SYNC_TIME_BUDGET
+    ? parseFloat(process.env.AUDIO_SYNC_TIME_BUDGET)
+    : null;
+
+  // 低メモリモード（複数の同期を同じホストで並行実行する場合）
+  const lowMemory = process.env.AUDIO_SYNC_LOW_MEMORY === '1';
+
+  if (socketPath) {
+    console.log(`\n=== 高精度音声同期開始（${mode}モード、同期サーバー） ===`);
+    try {
+      const result = await requestSyncServer(socketPath, {
+        id: Date.now(),
+        audio1: audioAPath,
+        audio2: audioBPath,
+        video_duration: videoDuration,
+        mode,
+        target_confidence: targetConfidence,
+        time_budget: timeBudget,
+        low_memory: lowMemory
+      });
+      logSyncResult(result);
+      return result;
+    } catch (error) {
+      if (error.code !== 'ENOENT' && error.code !== 'ECONNREFUSED') {
+        throw error;
+      }
+      console.warn(`同期サーバーに接続できません（${error.code}）。スクリプトを直接実行します`);
+    }
+  }
+
   return new Promise((resolve, reject) => {
     const scriptPath = path.join(__dirname, '../scripts/audio_sync_advanced.py');
 
@@ -61,17 +180,32 @@ async function runPythonAudioSync(audioAPath, audioBPath, videoDuration, mode =
     console.log(`音声B: ${path.basename(audioBPath)}`);
     console.log(`動画の長さ: ${videoDuration.toFixed(2)}秒`);
 
+    // 同じ参照音声の特徴を再利用するための特徴キャッシュ
+    const cacheDir = process.env.AUDIO_SYNC_CACHE_DIR || path.join(__dirname, '../../temp/audio_feature_cache');
+
     const pythonArgs = [
       scriptPath,
       audioAPath,
       audioBPath,
       videoDuration.toString(),
-      mode
+      mode,
+      '--cache-dir',
+      cacheDir
     ];
+    if (targetConfidence !== null) {
+      pythonArgs.push('--target-confidence', targetConfidence.toString());
+    }
+    if (timeBudget !== null) {
+      pythonArgs.push('--time-budget', timeBudget.toString());
+    }
+    if (lowMemory) {
+      pythonArgs.push('--low-memory');
+    }
 
     const python = spawn('python', pythonArgs, {
       env: {
         ...process.env,
+        FFMPEG_PATH: process.env.FFMPEG_PATH || require('@ffmpeg-installer/ffmpeg').path,
         PYTHONIOENCODING: 'utf-8'
       }
     });
@@ -143,18 +277,7 @@ async function runPythonAudioSync(audioAPath, audioBPath, videoDuration, mode =
       try {
         // JSON出力をパース
         const result = JSON.parse(jsonOutput.trim());
-        console.log('\n=== Python音声同期完了 ===');
-        console.log(`オフセット: ${result.offset.toFixed(3)}秒`);
-        console.log(`信頼度: ${result.confidence.toFixed(4)}`);
-        console.log(`品質: ${result.quality_jp} (${result.quality})`);
-
-        if (result.checkpoints) {
-          console.log(`\nチェックポイント結果:`);
-          result.checkpoints.forEach((cp, i) => {
-            console.log(`  ${i+1}. ${cp.position_name}: オフセット=${cp.offset.toFixed(3)}秒, 信頼度=${cp.confidence.toFixed(4)} (${cp.quality_jp})`);
-          });
-        }
-
+        logSyncResult(result);
         resolve(result);
       } catch (error) {
         console.error('\n=== JSON Parse Error ===');
@@ -181,9 +304,6 @@ async function runPythonAudioSync(audioAPath, audioBPath, videoDuration, mode =
  * @returns {Promise<Object>} - 同期情報
  */
 async function syncAudio(videoAPath, videoBPath) {
-  const tempDir = path.join(__dirname, '../../temp');
-  await fs.mkdir(tempDir, { recursive: true });
-
   // 音声トラックの存在を確認
   const [hasAudioA, hasAudioB] = await Promise.all([
     hasAudioTrack(videoAPath),
@@ -198,111 +318,84 @@ async function syncAudio(videoAPath, videoBPath) {
     throw new Error(`Video B (${path.basename(videoBPath)}) does not have an audio track.`);
   }
 
-  const audioAPath = path.join(tempDir, 'audioA.wav');
-  const audioBPath = path.join(tempDir, 'audioB.wav');
-
-  try {
-    // 音声を抽出
-    console.log('\n音声トラックを抽出中...');
-    await Promise.all([
-      extractAudio(videoAPath, audioAPath),
-      extractAudio(videoBPath, audioBPath)
-    ]);
-
-    // ファイルが存在するか確認
-    await Promise.all([
-      fs.access(audioAPath),
-      fs.access(audioBPath)
-    ]);
-
-    // 動画の長さを取得
-    const [durationA, durationB] = await Promise.all([
-      getVideoDuration(videoAPath),
-      getVideoDuration(videoBPath)
-    ]);
-
-    const videoDuration = Math.min(durationA, durationB);
-
-    // Pythonスクリプトで高精度同期を実行
-    const syncResult = await runPythonAudioSync(
-      audioAPath,
-      audioBPath,
-      videoDuration,
-      'multi_checkpoint' // マルチチェックポイントモード
-    );
-
-    const offsetSeconds = syncResult.offset;
-    const offsetMs = offsetSeconds * 1000;
-
-    console.log('\n=== 最終同期結果 ===');
-    console.log(`適用するオフセット: ${offsetMs.toFixed(1)}ms (${offsetSeconds.toFixed(3)}秒)`);
-    console.log(`信頼度: ${syncResult.confidence.toFixed(4)}`);
-    console.log(`品質: ${syncResult.quality_jp}`);
-    console.log(`使用手法: ${syncResult.method}`);
-
-    // トリミング範囲を計算
-    let startA = 0;
-    let startB = 0;
-
-    console.log(`\n動画の長さ: A=${durationA.toFixed(2)}秒, B=${durationB.toFixed(2)}秒`);
-
-    if (offsetSeconds > 0) {
-      // 動画Aが遅れている → 動画Bの開始をずらす
-      startB = offsetSeconds;
-      console.log(`動画Aが${offsetSeconds.toFixed(3)}秒遅れています`);
-      console.log(`→ 動画Bを${startB.toFixed(3)}秒の位置から開始`);
-    } else if (offsetSeconds < 0) {
-      // 動画Aが進んでいる → 動画Aの開始をずらす
-      startA = -offsetSeconds;
-      console.log(`動画Aが${(-offsetSeconds).toFixed(3)}秒進んでいます`);
-      console.log(`→ 動画Aを${startA.toFixed(3)}秒の位置から開始`);
-    } else {
-      console.log('完全に同期しています（オフセット0秒）');
-    }
+  // 動画の長さを取得
+  const [durationA, durationB] = await Promise.all([
+    getVideoDuration(videoAPath),
+    getVideoDuration(videoBPath)
+  ]);
 
-    // 最終的な動画の長さ
-    const finalDuration = Math.min(durationA - startA, durationB - startB);
+  const videoDuration = Math.min(durationA, durationB);
+
+  // Pythonスクリプトで高精度同期を実行（動画を直接渡し、必要な区間の音声だけを ffmpeg でデコード）
+  const syncResult = await runPythonAudioSync(
+    videoAPath,
+    videoBPath,
+    videoDuration,
+    'multi_checkpoint' // マルチチェックポイントモード
+  );
+
+  const offsetSeconds = syncResult.offset;
+  const offsetMs = offsetSeconds * 1000;
+
+  console.log('\n=== 最終同期結果 ===');
+  console.log(`適用するオフセット: ${offsetMs.toFixed(1)}ms (${offsetSeconds.toFixed(3)}秒)`);
+  console.log(`信頼度: ${syncResult.confidence.toFixed(4)}`);
+  console.log(`品質: ${syncResult.quality_jp}`);
+  console.log(`使用手法: ${syncResult.method}`);
+
+  // トリミング範囲を計算
+  let startA = 0;
+  let startB = 0;
+
+  console.log(`\n動画の長さ: A=${durationA.toFixed(2)}秒, B=${durationB.toFixed(2)}秒`);
+
+  if (offsetSeconds > 0) {
+    // 動画Aが遅れている → 動画Bの開始をずらす
+    startB = offsetSeconds;
+    console.log(`動画Aが${offsetSeconds.toFixed(3)}秒遅れています`);
+    console.log(`→ 動画Bを${startB.toFixed(3)}秒の位置から開始`);
+  } else if (offsetSeconds < 0) {
+    // 動画Aが進んでいる → 動画Aの開始をずらす
+    startA = -offsetSeconds;
+    console.log(`動画Aが${(-offsetSeconds).toFixed(3)}秒進んでいます`);
+    console.log(`→ 動画Aを${startA.toFixed(3)}秒の位置から開始`);
+  } else {
+    console.log('完全に同期しています（オフセット0秒）');
+  }
 
-    console.log(`\nトリミング情報:`);
-    console.log(`  動画A: ${startA.toFixed(3)}秒から${finalDuration.toFixed(3)}秒間`);
-    console.log(`  動画B: ${startB.toFixed(3)}秒から${finalDuration.toFixed(3)}秒間`);
-    console.log(`  最終動画の長さ: ${finalDuration.toFixed(3)}秒`);
+  // 最終的な動画の長さ
+  const finalDuration = Math.min(durationA - startA, durationB - startB);
 
-    // 警告: 信頼度が低い場合
-    if (syncResult.confidence < 0.5) {
-      console.warn('\n⚠️ 警告: 同期の信頼度が低いです');
-      console.warn('   2つの動画の音声が大きく異なる可能性があります');
-      console.warn('   結果を確認してください');
-    }
+  console.log(`\nトリミング情報:`);
+  console.log(`  動画A: ${startA.toFixed(3)}秒から${finalDuration.toFixed(3)}秒間`);
+  console.log(`  動画B: ${startB.toFixed(3)}秒から${finalDuration.toFixed(3)}秒間`);
+  console.log(`  最終動画の長さ: ${finalDuration.toFixed(3)}秒`);
 
-    return {
-      offsetSeconds,
-      offsetMs,
-      confidence: syncResult.confidence,
-      quality: syncResult.quality,
-      quality_jp: syncResult.quality_jp,
-      method: syncResult.method,
-      checkpoints: syncResult.checkpoints || [],
-      videoA: {
-        start: startA,
-        duration: finalDuration
-      },
-      videoB: {
-        start: startB,
-        duration: finalDuration
-      },
-      finalDuration
-    };
-
-  } finally {
-    // 一時ファイルをクリーンアップ
-    try {
-      await fs.unlink(audioAPath).catch(() => {});
-      await fs.unlink(audioBPath).catch(() => {});
-    } catch (err) {
-      console.error('一時ファイルの削除に失敗:', err);
-    }
+  // 警告: 信頼度が低い場合
+  if (syncResult.confidence < 0.5) {
+    console.warn('\n⚠️ 警告: 同期の信頼度が低いです');
+    console.warn('   2つの動画の音声が大きく異なる可能性があります');
+    console.warn('   結果を確認してください');
   }
+
+  return {
+    offsetSeconds,
+    offsetMs,
+    confidence: syncResult.confidence,
+    quality: syncResult.quality,
+    quality_jp: syncResult.quality_jp,
+    method: syncResult.method,
+    checkpoints: syncResult.checkpoints || [],
+    videoA: {
+      start: startA,
+      duration: finalDuration
+    },
+    videoB: {
+      start: startB,
+      duration: finalDuration
+    },
+    finalDuration
+  };
 }
 
 /**
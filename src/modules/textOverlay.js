@@ -161,6 +161,43 @@ function convertColorToRgba(color, opacity = 1.0) {
   return `0x${hex}${alphaHex}`;
 }
 
+/**
+ * オーバーレイするテキストを決める
+ * カスタムテキストがあればそれを使用、なければ自動生成
+ * @param {string} artistName - アーティスト名
+ * @param {string} songName - 曲名
+ * @param {Object} options - オプション（customText）
+ * @returns {string} - 表示するテキスト
+ */
+function buildOverlayText(artistName, songName, options = {}) {
+  if (options.customText && options.customText.trim()) {
+    return options.customText.trim();
+  }
+  return `${artistName}の「${songName}」弾いてみた`;
+}
+
+/**
+ * add_text_to_video.py に渡すオプションを作成（省略した項目はデフォルト値）
+ * @param {Object} options - applyTextOverlay のオプション
+ * @returns {Object} - スクリプトのオプション
+ */
+function buildOverlayOptions(options = {}) {
+  return {
+    fontFamily: options.fontFamily || 'msgothic',
+    fontWeight: options.fontWeight || 'normal',
+    textColor: options.textColor || 'black',
+    bgColor: options.bgColor || 'white',
+    bgOpacity: options.bgOpacity !== undefined ? options.bgOpacity : 1.0,
+    padding: options.padding !== undefined ? options.padding : 30,
+    positionX: options.positionX || 'center',
+    positionY: options.positionY !== undefined ? options.positionY : 0.25,
+    maxBgWidthRatio: options.maxBgWidthRatio || 0.9,
+    maxBgHeightRatio: options.maxBgHeightRatio || 0.3,
+    compositor: options.compositor || process.env.TEXT_OVERLAY_COMPOSITOR || 'auto',
+    segmentWorkers: options.segmentWorkers
+  };
+}
+
 /**
  * テキストオーバーレイを動画に適用（FFmpeg直接使用 - 超高速）
  * @param {string} inputPath - 入力動画パス
@@ -175,6 +212,8 @@ function convertColorToRgba(color, opacity = 1.0) {
  * @param {number} options.padding - パディング (デフォルト: 30)
  * @param {string|number} options.positionX - X位置 'left', 'center', 'right' または数値 (デフォルト: 'center')
  * @param {number} options.positionY - Y位置 0.0-1.0 の比率または数値 (デフォルト: 0.5)
+ * @param {string} options.compositor - 合成方式 'ffmpeg'、'segments'、'moviepy' または 'auto' (デフォルト: 環境変数 TEXT_OVERLAY_COMPOSITOR または 'auto')
+ * @param {number} options.segmentWorkers - 長い動画を区間に分割して並列にエンコードする区間の数の上限 (指定した場合または compositor が 'segments' の場合のみ分割、'segments' の省略時: CPUコア数、最大8)
  * @returns {Promise<string>} - 出力ファイルのパス
  */
 async function applyTextOverlay(inputPath, outputPath, artistName, songName, options = {}) {
@@ -182,31 +221,14 @@ async function applyTextOverlay(inputPath, outputPath, artistName, songName, opt
   const fs = require('fs').promises;
   const path = require('path');
 
-  // カスタムテキストがあればそれを使用、なければ自動生成
-  let text;
-  if (options.customText && options.customText.trim()) {
-    text = options.customText.trim();
-  } else {
-    text = `${artistName}の「${songName}」弾いてみた`;
-  }
+  const text = buildOverlayText(artistName, songName, options);
 
   // Pythonスクリプトを使用してテキストオーバーレイを適用
   // Base64エンコーディングで文字化けを防止
   const scriptPath = path.join(__dirname, '..', 'scripts', 'add_text_to_video.py');
 
   // オプションをBase64エンコード
-  const optionsObj = {
-    fontFamily: options.fontFamily || 'msgothic',
-    fontWeight: options.fontWeight || 'normal',
-    textColor: options.textColor || 'black',
-    bgColor: options.bgColor || 'white',
-    bgOpacity: options.bgOpacity !== undefined ? options.bgOpacity : 1.0,
-    padding: options.padding !== undefined ? options.padding : 30,
-    positionX: options.positionX || 'center',
-    positionY: options.positionY !== undefined ? options.positionY : 0.25,
-    maxBgWidthRatio: options.maxBgWidthRatio || 0.9,
-    maxBgHeightRatio: options.maxBgHeightRatio || 0.3
-  };
+  const optionsObj = buildOverlayOptions(options);
 
   const optionsJson = JSON.stringify(optionsObj);
   const optionsBase64 = Buffer.from(optionsJson, 'utf8').toString('base64');
@@ -234,6 +256,7 @@ async function applyTextOverlay(inputPath, outputPath, artistName, songName, opt
     const python = spawn('python', pythonArgs, {
       env: {
         ...process.env,
+        FFMPEG_PATH: process.env.FFMPEG_PATH || require('@ffmpeg-installer/ffmpeg').path,
         PYTHONIOENCODING: 'utf-8',  // Python I/OをUTF-8に設定
         PYTHONLEGACYWINDOWSSTDIO: '0'  // Windows標準入出力の問題を回避
       }
@@ -274,8 +297,100 @@ async function applyTextOverlay(inputPath, outputPath, artistName, songName, opt
   });
 }
 
+/**
+ * 複数の動画にテキストオーバーレイを適用（1つのPythonプロセスで処理）
+ * ジョブを改行区切りJSONで add_text_to_video.py --batch に渡し、フォントと描画したテキスト画像を
+ * ジョブ間で再利用する。同時に処理する動画の数は options.workers（デフォルト: 環境変数
+ * TEXT_OVERLAY_WORKERS または 2）
+ * @param {Array<Object>} jobs - [{ inputPath, outputPath, artistName, songName, options }]
+ *                               （options は applyTextOverlay と同じ）
+ * @param {Object} options - バッチのオプション
+ * @param {number} options.workers - 同時に処理する動画の数
+ * @param {Function} options.onStatus - ジョブの状態（started/done/failed）を受け取る関数
+ * @returns {Promise<Array<Object>>} - ジョブの順の結果 [{ index, input, output, status, ok, elapsed, error }]
+ */
+async function applyTextOverlayBatch(jobs, options = {}) {
+  const { spawn } = require('child_process');
+  const path = require('path');
+  const readline = require('readline');
+
+  const scriptPath = path.join(__dirname, '..', 'scripts', 'add_text_to_video.py');
+  const workers = options.workers || parseInt(process.env.TEXT_OVERLAY_WORKERS || '2', 10);
+
+  const input = jobs.map((job) => JSON.stringify({
+    input: job.inputPath,
+    output: job.outputPath,
+    text: buildOverlayText(job.artistName, job.songName, job.options),
+    options: buildOverlayOptions(job.options)
+  })).join('\n') + '\n';
+
+  return new Promise((resolve, reject) => {
+    console.log(`Pythonスクリプトで${jobs.length}本の動画にテキストオーバーレイを適用中（並列数: ${workers}）...`);
+
+    const python = spawn('python', ['-X', 'utf8', scriptPath, '--batch', '-', '--workers', workers.toString()], {
+      env: {
+        ...process.env,
+        FFMPEG_PATH: process.env.FFMPEG_PATH || require('@ffmpeg-installer/ffmpeg').path,
+        PYTHONIOENCODING: 'utf-8',
+        PYTHONLEGACYWINDOWSSTDIO: '0'
+      }
+    });
+
+    // 標準出力はジョブの状態のJSON行、標準エラーは各ジョブのログ
+    const results = new Array(jobs.length).fill(null);
+    let stderr = '';
+
+    readline.createInterface({ input: python.stdout }).on('line', (line) => {
+      if (!line.trim()) {
+        return;
+      }
+      let item;
+      try {
+        item = JSON.parse(line);
+      } catch {
+        console.log(line);
+        return;
+      }
+      if (item.status === 'started') {
+        console.log(`[${item.index + 1}/${jobs.length}] 開始: ${path.basename(item.input)}`);
+      } else if (item.ok) {
+        console.log(`[${item.index + 1}/${jobs.length}] 完了: ${path.basename(item.output)} (${item.elapsed.toFixed(1)}秒)`);
+        results[item.index] = item;
+      } else {
+        console.error(`[${item.index + 1}/${jobs.length}] 失敗: ${path.basename(item.input)}: ${item.error}`);
+        results[item.index] = item;
+      }
+      if (options.onStatus) {
+        options.onStatus(item);
+      }
+    });
+
+    python.stderr.on('data', (data) => {
+      const output = data.toString('utf8');
+      stderr += output;
+      console.error(output);
+    });
+
+    python.on('close', (code) => {
+      if (results.some((item) => item === null)) {
+        reject(new Error(`Python エラー (code ${code}): ${stderr}`));
+        return;
+      }
+      console.log(`\nテキストオーバーレイ完了（成功: ${results.filter((item) => item.ok).length}/${jobs.length}）`);
+      resolve(results);
+    });
+
+    python.on('error', (error) => {
+      reject(new Error(`Python 実行エラー: ${error.message}`));
+    });
+
+    python.stdin.end(input, 'utf8');
+  });
+}
+
 module.exports = {
   applyTextOverlay,
+  applyTextOverlayBatch,
   buildTextOverlayFilter,
   splitTextIntoLines,
   calculateFontSize
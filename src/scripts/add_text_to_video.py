@@ -4,10 +4,32 @@
 動画にテキストを直接描画するスクリプト
 MoviePyとPillowを使用（ImageMagick不要）
 Windows/Mac両対応、文字化け防止のためBase64エンコーディング使用
+
+描画したテキスト画像は overlay_cache にキャッシュされ、同じテキストとスタイルでは再利用される。
+compositor が 'ffmpeg' の場合、Pythonはテキスト画像を背景ボックスの範囲に切り抜いた
+PNGとして描画するだけで、合成は ffmpeg の overlay フィルタで行う（フレームがPythonを通らない）。
+'auto'（デフォルト）は ffmpeg が見つかればこの方式を使い、失敗した場合は MoviePy で合成する。
+'segments'（または segment_workers の指定）の場合は、長い動画をキーフレームの位置で区間に分割し、
+区間ごとの ffmpeg を並列に実行して concat demuxer で連結する
+
+--batch を指定すると、マニフェスト（JSON）または標準入力の改行区切りJSONに列挙した
+複数の動画を1つのプロセスで処理する（フォントと描画したテキスト画像を再利用する）
 """
 import sys
-import platform
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+import threading
+import contextlib
+import subprocess
+import tempfile
 import io
+import math
+import bisect
+from fractions import Fraction
 
 # Windows環境での文字化け防止（標準入出力をUTF-8に設定）
 if sys.platform == 'win32':
@@ -15,286 +37,227 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import numpy as np
 
-try:
-    # MoviePy 2.x の新しいインポート方式
-    from moviepy import VideoFileClip, ImageClip, CompositeVideoClip
-except ImportError:
-    # MoviePy 1.x の古いインポート方式
-    from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip
+from text_layout import get_font_path, layout_text, resolve_font_path
+import overlay_cache
 
-def get_font_path(font_family, font_weight='normal'):
+def load_moviepy():
     """
-    フォントファミリーとウェイトからフォントパスを取得（クロスプラットフォーム対応）
+    MoviePy のクラスをインポートする
 
-    Args:
-        font_family: フォントファミリー名
-        font_weight: normal または bold
+    MoviePy（と依存する imageio/ffmpeg の検出）は読み込みに時間がかかるため、
+    使用法の表示や引数エラーでは読み込まず、動画を処理する時点でインポートする
 
     Returns:
-        フォントファイルのパス
-    """
-    os_type = platform.system()
-
-    # Windows用フォントマップ
-    windows_fonts = {
-        'msgothic': {
-            'normal': 'C:/Windows/Fonts/msgothic.ttc',
-            'bold': 'C:/Windows/Fonts/msgothic.ttc'
-        },
-        'msmincho': {
-            'normal': 'C:/Windows/Fonts/msmincho.ttc',
-            'bold': 'C:/Windows/Fonts/msmincho.ttc'
-        },
-        'meiryo': {
-            'normal': 'C:/Windows/Fonts/meiryo.ttc',
-            'bold': 'C:/Windows/Fonts/meiryob.ttc'
-        },
-        'yugothic': {
-            'normal': 'C:/Windows/Fonts/YuGothM.ttc',
-            'bold': 'C:/Windows/Fonts/YuGothB.ttc'
-        },
-        'arial': {
-            'normal': 'C:/Windows/Fonts/arial.ttf',
-            'bold': 'C:/Windows/Fonts/arialbd.ttf'
-        },
-        'times': {
-            'normal': 'C:/Windows/Fonts/times.ttf',
-            'bold': 'C:/Windows/Fonts/timesbd.ttf'
-        }
-    }
-
-    # Mac用フォントマップ
-    mac_fonts = {
-        'msgothic': {
-            'normal': '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
-            'bold': '/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc'
-        },
-        'msmincho': {
-            'normal': '/System/Library/Fonts/ヒラギノ明朝 ProN W3.ttc',
-            'bold': '/System/Library/Fonts/ヒラギノ明朝 ProN W6.ttc'
-        },
-        'meiryo': {
-            'normal': '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
-            'bold': '/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc'
-        },
-        'yugothic': {
-            'normal': '/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc',
-            'bold': '/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc'
-        },
-        'arial': {
-            'normal': '/System/Library/Fonts/Supplemental/Arial.ttf',
-            'bold': '/System/Library/Fonts/Supplemental/Arial Bold.ttf'
-        },
-        'times': {
-            'normal': '/Library/Fonts/Times New Roman.ttf',
-            'bold': '/Library/Fonts/Times New Roman Bold.ttf'
-        }
-    }
-
-    # プラットフォームに応じてフォントマップを選択
-    if os_type == 'Darwin':  # macOS
-        font_map = mac_fonts
-    else:  # Windows, Linux
-        font_map = windows_fonts
-
-    font_paths = font_map.get(font_family, font_map.get('msgothic', {}))
-    return font_paths.get(font_weight, font_paths.get('normal', None))
-
-def wrap_text(text, font, max_width):
+        class: VideoFileClip
+    """
+    try:
+        # MoviePy 2.x の新しいインポート方式
+        from moviepy import VideoFileClip
+    except ImportError:
+        # MoviePy 1.x の古いインポート方式
+        from moviepy.editor import VideoFileClip
+    return VideoFileClip
+
+# 合成方式
+COMPOSITORS = ('auto', 'ffmpeg', 'segments', 'moviepy')
+
+# 区間に分割してエンコードする場合の区間の最短の長さ（秒、これの2倍より短い動画は分割しない）
+SEGMENT_MIN_SECONDS = 30
+
+# 'segments' で並列にエンコードする区間の数の上限（segment_workers を省略した場合はCPUコア数まで）
+SEGMENT_MAX_WORKERS = 8
+
+# ffmpeg の実行ファイルを指定する環境変数
+FFMPEG_ENV = 'FFMPEG_PATH'
+
+# CLI・マニフェストのオプション名と add_text_to_video の引数名の対応
+OPTION_KEYS = {
+    'fontFamily': 'font_family',
+    'fontWeight': 'font_weight',
+    'textColor': 'text_color',
+    'bgColor': 'bg_color',
+    'bgOpacity': 'bg_opacity',
+    'padding': 'padding',
+    'positionX': 'position_x',
+    'positionY': 'position_y',
+    'maxBgWidthRatio': 'max_bg_width_ratio',
+    'maxBgHeightRatio': 'max_bg_height_ratio',
+    'compositor': 'compositor',
+    'segmentWorkers': 'segment_workers'
+}
+
+# バッチ処理で同時に処理する動画の数（各ジョブの x264 はすべてのCPUコアを使う）
+DEFAULT_BATCH_WORKERS = 2
+
+# テキスト画像の描画（Pillow のフォントはスレッド間で共有できないため直列化する）
+_render_lock = threading.Lock()
+
+# 速度優先のx264設定（MoviePy と ffmpeg の両方の合成方式で共通）
+X264_PRESET = 'ultrafast'
+X264_CRF = '28'
+AUDIO_BITRATE = '128k'
+
+def x264_params(fps):
     """
-    テキストを指定幅に収まるように改行
-    改行文字 (\n) がある場合はそこで強制改行
+    速度優先のx264オプション（-preset と -crf 以外）
 
     Args:
-        text: 元のテキスト（改行で改行指定可能）
-        font: フォントオブジェクト
-        max_width: 最大幅
+        fps: 動画のフレームレート
 
     Returns:
-        改行されたテキスト行のリスト
-    """
-    temp_img = Image.new('RGB', (1, 1))
-    draw = ImageDraw.Draw(temp_img)
-
-    # 改行文字で改行指定されているかチェック
-    if '\n' in text:
-        # 手動改行モード：各行をチェックして必要に応じて自動改行
-        manual_lines = [line.strip() for line in text.split('\n') if line.strip()]
-        result_lines = []
-
-        for line in manual_lines:
-            # 各手動改行された行が幅を超える場合、さらに分割
-            bbox = draw.textbbox((0, 0), line, font=font)
-            line_width = bbox[2] - bbox[0]
-
-            if line_width <= max_width:
-                # そのまま追加
-                result_lines.append(line)
-            else:
-                # 幅を超える場合は自動改行
-                words = line.split()
-                current_line = ""
-
-                for word in words:
-                    test_line = current_line + word if not current_line else current_line + " " + word
-                    bbox = draw.textbbox((0, 0), test_line, font=font)
-                    test_width = bbox[2] - bbox[0]
-
-                    if test_width <= max_width:
-                        current_line = test_line
-                    else:
-                        if current_line:
-                            result_lines.append(current_line)
-                        current_line = word
-
-                if current_line:
-                    result_lines.append(current_line)
-
-        return result_lines
-
-    # 自動改行モード
-    words = text.split()
-    lines = []
-    current_line = ""
-
-    for word in words:
-        # 現在の行に単語を追加した場合の幅をチェック
-        test_line = current_line + word if not current_line else current_line + " " + word
-        bbox = draw.textbbox((0, 0), test_line, font=font)
-        test_width = bbox[2] - bbox[0]
-
-        if test_width <= max_width:
-            current_line = test_line
-        else:
-            # 現在の行を確定して、新しい行を開始
-            if current_line:
-                lines.append(current_line)
-            current_line = word
-
-    # 最後の行を追加
-    if current_line:
-        lines.append(current_line)
+        list: ffmpeg のコマンドライン引数
+    """
+    return [
+        '-crf', X264_CRF,       # 品質を下げて速度優先（23→28）
+        '-tune', 'fastdecode',  # 高速デコード用チューニング
+        '-movflags', '+faststart',  # ストリーミング最適化
+        '-g', str(int(fps * 2)),  # キーフレーム間隔を2秒に
+        '-bf', '0',             # Bフレームを無効化（速度優先）
+        '-refs', '1',           # 参照フレーム数を最小化
+        '-me_method', 'dia',    # 動き推定を最速アルゴリズムに
+        '-subq', '0',           # サブピクセル動き推定を無効化
+        '-trellis', '0',        # トレリス量子化を無効化
+    ]
+
+def find_ffmpeg():
+    """
+    ffmpeg の実行ファイルを探す（環境変数 FFMPEG_PATH、PATH、imageio-ffmpeg の順）
 
-    return lines
+    Returns:
+        str or None: 実行ファイルのパス（見つからない場合は None）
+    """
+    path = os.environ.get(FFMPEG_ENV)
+    if path and os.path.isfile(path):
+        return path
+    path = shutil.which('ffmpeg')
+    if path:
+        return path
+    try:
+        # MoviePy が使用する ffmpeg
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return None
 
-def calculate_optimal_font_size(text, max_width, max_height, min_font=10, max_font=30, max_lines=3,
-                               padding=30, font_family='msgothic', font_weight='normal'):
+def probe_video(input_video, ffmpeg_path):
     """
-    バウンドリー内に収まる最適なフォントサイズを計算
+    動画のサイズ・フレームレート・長さを取得
+
+    ffprobe が ffmpeg と同じディレクトリか PATH にあれば使い、なければ ffmpeg -i の出力を解析する。
+    回転メタデータがある場合は表示上のサイズ（ffmpeg が自動回転した後のサイズ）を返す
 
     Args:
-        text: 表示するテキスト
-        max_width: 最大幅（背景の最大幅）
-        max_height: 最大高さ（背景の最大高さ、0の場合は高さ制限なし）
-        min_font: 最小フォントサイズ
-        max_font: 最大フォントサイズ
-        max_lines: 最大行数
-        padding: パディング
-        font_family: フォントファミリー
-        font_weight: フォントウェイト
+        input_video: 入力動画パス
+        ffmpeg_path: ffmpeg の実行ファイル
 
     Returns:
-        (最適フォントサイズ, 改行されたテキスト行のリスト)
+        dict: {'width', 'height', 'fps', 'duration', 'has_audio'}
     """
-    # パディングを考慮した実際の使用可能幅・高さ
-    available_width = max_width - (padding * 2)
-    # 高さ制限が0の場合は、実質的に無制限（非常に大きな値を設定）
-    if max_height > 0:
-        available_height = max_height - (padding * 2)
-    else:
-        available_height = float('inf')  # 高さ制限なし
+    directory, name = os.path.split(ffmpeg_path)
+    ffprobe_path = os.path.join(directory, name.replace('ffmpeg', 'ffprobe'))
+    if ffprobe_path == ffmpeg_path or not os.path.isfile(ffprobe_path):
+        ffprobe_path = shutil.which('ffprobe')
+
+    if ffprobe_path:
+        result = subprocess.run(
+            [ffprobe_path, '-v', 'error', '-show_streams', '-show_format', '-of', 'json', input_video],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        info = json.loads(result.stdout.decode('utf-8'))
+        streams = info.get('streams', [])
+        video = next(stream for stream in streams if stream.get('codec_type') == 'video')
+        num, den = video.get('avg_frame_rate', '0/1').split('/')
+        if float(num) == 0 or float(den) == 0:
+            num, den = video.get('r_frame_rate', '30/1').split('/')
+        rotation = float(video.get('tags', {}).get('rotate', 0))
+        for side_data in video.get('side_data_list', []):
+            rotation = float(side_data.get('rotation', rotation))
+        width, height = int(video['width']), int(video['height'])
+        if int(abs(rotation)) % 180 == 90:
+            width, height = height, width
+        return {
+            'width': width,
+            'height': height,
+            'fps': float(num) / float(den),
+            'duration': float(info.get('format', {}).get('duration', 0.0)),
+            'has_audio': any(stream.get('codec_type') == 'audio' for stream in streams)
+        }
 
-    best_font_size = min_font
-    best_lines = []
+    # 出力を指定しない ffmpeg -i は終了コード 1 で入力の情報だけを出力する
+    result = subprocess.run([ffmpeg_path, '-hide_banner', '-nostdin', '-i', input_video],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    log = result.stderr.decode('utf-8', 'replace')
+    video = re.search(r'Stream #.*?Video: .*?(\d{2,5})x(\d{2,5}).*?([\d.]+) (?:fps|tbr)', log)
+    if video is None:
+        raise ValueError(f"No video stream found in {input_video}")
+    width, height = int(video.group(1)), int(video.group(2))
+    rotation = re.search(r'rotat(?:e\s*:|ion of)\s*(-?[\d.]+)', log)
+    if rotation and int(abs(float(rotation.group(1)))) % 180 == 90:
+        width, height = height, width
+    duration = re.search(r'Duration:\s*(\d+):(\d+):([\d.]+)', log)
+    return {
+        'width': width,
+        'height': height,
+        'fps': float(video.group(3)),
+        'duration': (int(duration.group(1)) * 3600 + int(duration.group(2)) * 60
+                     + float(duration.group(3))) if duration else 0.0,
+        'has_audio': re.search(r'Stream #.*?Audio:', log) is not None
+    }
 
-    font_path = get_font_path(font_family, font_weight)
+class SpriteCompositor:
+    """
+    テキスト画像の外接矩形（スプライト）だけをフレームにアルファ合成する
 
-    # 大きいサイズから試して、最初に収まるサイズを見つける
-    for font_size in range(max_font, min_font - 1, -1):
-        try:
-            font = ImageFont.truetype(font_path, font_size)
-        except:
-            try:
-                font = ImageFont.truetype('C:/Windows/Fonts/msgothic.ttc', font_size)
-            except:
-                font = ImageFont.load_default()
-
-        # テキストを改行
-        lines = wrap_text(text, font, available_width)
-
-        # 行数チェック
-        if len(lines) > max_lines:
-            continue
-
-        # 高さをチェック
-        temp_img = Image.new('RGB', (1, 1))
-        draw = ImageDraw.Draw(temp_img)
-
-        line_height = font_size * 1.3  # 行間を考慮
-        total_height = line_height * len(lines)
-
-        if total_height <= available_height:
-            # 幅もチェック
-            all_fit = True
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                line_width = bbox[2] - bbox[0]
-                if line_width > available_width:
-                    all_fit = False
-                    break
-
-            if all_fit:
-                best_font_size = font_size
-                best_lines = lines
-                break
-
-    # 最適なサイズが見つからなかった場合、最小フォントサイズで強制的に収める
-    if not best_lines:
-        print(f"  Warning: Could not fit text optimally. Using minimum font size {min_font}")
-        try:
-            font = ImageFont.truetype(font_path, min_font)
-        except:
-            # クロスプラットフォーム対応のフォールバック
-            fallback_fonts = []
-            if platform.system() == 'Darwin':  # macOS
-                fallback_fonts = [
-                    '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
-                    '/System/Library/Fonts/Helvetica.ttc',
-                    '/System/Library/Fonts/Supplemental/Arial.ttf'
-                ]
-            else:  # Windows
-                fallback_fonts = [
-                    'C:/Windows/Fonts/msgothic.ttc',
-                    'C:/Windows/Fonts/arial.ttf'
-                ]
-
-            font_loaded = False
-            for fallback in fallback_fonts:
-                try:
-                    font = ImageFont.truetype(fallback, min_font)
-                    font_loaded = True
-                    break
-                except:
-                    continue
-
-            if not font_loaded:
-                font = ImageFont.load_default()
-
-        best_lines = wrap_text(text, font, available_width)
-
-        # 行数が多すぎる場合は切り詰める
-        if len(best_lines) > max_lines:
-            best_lines = best_lines[:max_lines]
-            # 最後の行に省略記号を追加
-            if best_lines:
-                best_lines[-1] = best_lines[-1][:max(0, len(best_lines[-1]) - 3)] + '...'
-
-        best_font_size = min_font
-
-    return best_font_size, best_lines
+    スプライトは色にアルファを掛けた値（premultiplied）と 255 - アルファを事前に計算しておき、
+    フレームごとの合成は外接矩形内の整数演算のみで行う。出力フレームと作業用の配列は
+    最初のフレームで確保して再利用する。
+    結果は MoviePy の CompositeVideoClip（Pillow の alpha_composite）と同じ値になる
+    """
+
+    def __init__(self, sprite, x, y):
+        """
+        Args:
+            sprite: 外接矩形に切り抜いたRGBA画像（overlay_cache.crop_to_content の返り値）
+            x: スプライトを置くX座標
+            y: スプライトを置くY座標
+        """
+        alpha = sprite[:, :, 3:].astype(np.uint32)
+        self.premultiplied = sprite[:, :, :3] * alpha
+        self.inverse_alpha = 255 - alpha
+        self.x = x
+        self.y = y
+        self.height, self.width = sprite.shape[:2]
+        self._frame = None
+        self._blend = np.empty(self.premultiplied.shape, dtype=np.uint32)
+        self._carry = np.empty(self.premultiplied.shape, dtype=np.uint32)
+
+    def __call__(self, frame):
+        """
+        Args:
+            frame: RGBの動画フレーム（読み取り専用でもよい）
+
+        Returns:
+            numpy array: 合成したフレーム（同じ配列を次のフレームでも使うため、すぐに書き出すこと）
+        """
+        if self._frame is None or self._frame.shape != frame.shape:
+            self._frame = np.empty(frame.shape, dtype=np.uint8)
+        np.copyto(self._frame, frame)
+
+        region = self._frame[self.y:self.y + self.height, self.x:self.x + self.width]
+        blend = self._blend
+        carry = self._carry
+
+        # (色 * a + 背景 * (255 - a)) / 255 を四捨五入（Pillow と同じ丸め）
+        np.multiply(region, self.inverse_alpha, out=blend)
+        blend += self.premultiplied
+        blend += 128
+        np.right_shift(blend, 8, out=carry)
+        blend += carry
+        blend >>= 8
+        np.copyto(region, blend, casting='unsafe')
+        return self._frame
 
 def create_text_image(text, width, height, font_size=50, text_color='white',
                       bg_color='black', bg_opacity=0.7, padding=30,
@@ -331,50 +294,21 @@ def create_text_image(text, width, height, font_size=50, text_color='white',
     max_bg_width = int(width * max_bg_width_ratio)
     max_bg_height = int(height * max_bg_height_ratio)
 
-    # 最適なフォントサイズと改行を計算
-    optimal_font_size, text_lines = calculate_optimal_font_size(
-        text, max_bg_width, max_bg_height,
-        min_font=10, max_font=30, max_lines=3, padding=padding,
-        font_family=font_family, font_weight=font_weight
+    # 最適なフォントサイズと改行を計算（各行の寸法もレイアウトに含まれる）
+    layout = layout_text(
+        text, max_bg_width, max_bg_height, get_font_path(font_family, font_weight),
+        min_font=10, max_font=30, max_lines=3, padding=padding
     )
 
     print(f"  Font: {font_family} ({font_weight})")
-    print(f"  Optimal font size: {optimal_font_size}")
-    print(f"  Text lines: {len(text_lines)}")
-    for i, line in enumerate(text_lines):
+    print(f"  Optimal font size: {layout.font_size}")
+    print(f"  Text lines: {len(layout.lines)}")
+    for i, line in enumerate(layout.lines):
         print(f"    Line {i+1}: {line}")
 
-    # フォントを読み込み
-    font_path = get_font_path(font_family, font_weight)
-    try:
-        font = ImageFont.truetype(font_path, optimal_font_size)
-    except:
-        try:
-            font = ImageFont.truetype('C:/Windows/Fonts/msgothic.ttc', optimal_font_size)
-        except:
-            font = ImageFont.load_default()
-
-    # 各行のテキストサイズを測定して、全体のサイズを計算
-    line_height = optimal_font_size * 1.3
-    max_line_width = 0
-    max_line_text_height = 0
-
-    for line in text_lines:
-        bbox = draw.textbbox((0, 0), line, font=font)
-        line_width = bbox[2] - bbox[0]
-        line_text_height = bbox[3] - bbox[1]  # 実際のテキストの高さ
-        max_line_width = max(max_line_width, line_width)
-        max_line_text_height = max(max_line_text_height, line_text_height)
-
-    # 最後の行を除く行間込みの高さ + 最後の行の実際の高さ
-    if len(text_lines) > 1:
-        total_text_height = line_height * (len(text_lines) - 1) + max_line_text_height
-    else:
-        total_text_height = max_line_text_height
-
     # 背景ボックスのサイズ（テキストに合わせる、上下均等にパディング）
-    bg_width = max_line_width + (padding * 2)
-    bg_height = total_text_height + (padding * 2)
+    bg_width = layout.width + (padding * 2)
+    bg_height = layout.height + (padding * 2)
 
     # バウンドリーチェック（max_bg_widthとmax_bg_heightが0より大きい場合のみ制限）
     if max_bg_width > 0:
@@ -429,14 +363,12 @@ def create_text_image(text, width, height, font_size=50, text_color='white',
     text_rgba = text_rgb + (255,)
 
     current_y = bg_y + padding
-    for line in text_lines:
+    for line, line_width in zip(layout.lines, layout.line_widths):
         # 各行を中央揃え
-        bbox = draw.textbbox((0, 0), line, font=font)
-        line_width = bbox[2] - bbox[0]
         text_x = bg_x + (bg_width - line_width) // 2
 
-        draw.text((text_x, current_y), line, font=font, fill=text_rgba)
-        current_y += line_height
+        draw.text((text_x, current_y), line, font=layout.font, fill=text_rgba)
+        current_y += layout.line_height
 
     # NumPy配列に変換
     return np.array(img)
@@ -445,7 +377,8 @@ def add_text_to_video(input_video, output_video, text, font_size=80,
                       text_color='white', bg_color='black', bg_opacity=0.7,
                       padding=30, position_x='center', position_y=0.5,
                       max_bg_width_ratio=0.9, max_bg_height_ratio=0.3,
-                      font_family='msgothic', font_weight='normal'):
+                      font_family='msgothic', font_weight='normal', compositor='auto',
+                      segment_workers=None):
     """
     動画にテキストを追加
 
@@ -464,9 +397,304 @@ def add_text_to_video(input_video, output_video, text, font_size=80,
         max_bg_height_ratio: 背景の最大高さ比率
         font_family: フォントファミリー
         font_weight: フォントウェイト
+        compositor: 合成方式（'ffmpeg'、'segments'、'moviepy' または 'auto'）
+        segment_workers: 並列にエンコードする区間の数の上限（'auto' でも指定した場合は区間に分割する。
+                         'segments' で None の場合はCPUコア数、SEGMENT_MAX_WORKERS まで。
+                         それ以外で None の場合は分割しない）
+    """
+    if compositor not in COMPOSITORS:
+        raise ValueError(f"Unknown compositor: {compositor}")
+
+    cache = overlay_cache.open_cache()
+
+    def render(width, height):
+        # テキスト画像を生成（フォントサイズは自動計算される）
+        print(f"Creating text image with auto font sizing...")
+        print(f"  Text: {text}")
+        print(f"  Text color: {text_color}")
+        print(f"  Background color: {bg_color} (opacity: {bg_opacity})")
+        print(f"  Position: ({position_x}, {position_y})")
+        print(f"  Max background size: {max_bg_width_ratio * 100}% x {max_bg_height_ratio * 100}%")
+
+        # 同じテキスト・フォント・オプション・フレームサイズの画像はキャッシュから読み込む
+        options = {
+            'text_color': text_color, 'bg_color': bg_color, 'bg_opacity': bg_opacity,
+            'padding': padding, 'position_x': position_x, 'position_y': position_y,
+            'max_bg_width_ratio': max_bg_width_ratio, 'max_bg_height_ratio': max_bg_height_ratio,
+            'font_family': font_family, 'font_weight': font_weight
+        }
+        with _render_lock:
+            font_path = resolve_font_path(get_font_path(font_family, font_weight))
+            key = overlay_cache.overlay_key('add_text_to_video', text, font_path, options, width, height)
+
+            return overlay_cache.get_overlay(cache, key, lambda: create_text_image(
+                text, width, height, font_size,
+                text_color, bg_color, bg_opacity,
+                padding, position_x, position_y,
+                max_bg_width_ratio, max_bg_height_ratio,
+                font_family, font_weight
+            ))
+
+    ffmpeg_path = None if compositor == 'moviepy' else find_ffmpeg()
+    if ffmpeg_path is None and compositor in ('ffmpeg', 'segments'):
+        raise RuntimeError("ffmpeg was not found (set FFMPEG_PATH)")
+
+    # 区間への分割は 'segments' か segment_workers を指定した場合のみ（'ffmpeg' は常に1パス）
+    if compositor == 'ffmpeg' or (segment_workers is None and compositor != 'segments'):
+        segment_workers = 1
+    elif segment_workers is None:
+        import multiprocessing
+        segment_workers = min(SEGMENT_MAX_WORKERS, multiprocessing.cpu_count())
+    segment_workers = int(segment_workers)
+
+    if ffmpeg_path is not None:
+        try:
+            composite_with_ffmpeg(input_video, output_video, render, ffmpeg_path, segment_workers)
+            return
+        except (OSError, ValueError, KeyError, StopIteration, subprocess.CalledProcessError) as e:
+            if compositor in ('ffmpeg', 'segments'):
+                raise
+            print(f"Warning: ffmpeg compositing failed, falling back to MoviePy: {e}")
+
+    composite_with_moviepy(input_video, output_video, render)
+
+def probe_frames(input_video, ffmpeg_path):
+    """
+    動画ストリームの各フレームの表示時刻とキーフレームかどうかを表示順に取得
+
+    ffmpeg の framecrc 出力（-c copy のためデコードしない）からパケットの情報を解析する
+
+    Args:
+        input_video: 入力動画パス
+        ffmpeg_path: ffmpeg の実行ファイル
+
+    Returns:
+        list: (表示時刻（秒、Fraction）, キーフレームかどうか) のリスト（表示順）
+    """
+    result = subprocess.run([ffmpeg_path, '-hide_banner', '-nostdin', '-v', 'error', '-i', input_video,
+                             '-map', '0:v:0', '-c', 'copy', '-f', 'framecrc', '-'],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    time_base = None
+    frames = []
+    for line in result.stdout.decode('ascii', 'replace').splitlines():
+        if line.startswith('#tb'):
+            num, den = line.split(':', 1)[1].strip().split('/')
+            time_base = Fraction(int(num), int(den))
+        elif line and not line.startswith('#'):
+            # stream, dts, pts, duration, size, hash[, F=フラグ]（フラグはキーフレームのみの場合は省略される）
+            fields = [field.strip() for field in line.split(',')]
+            flags = 1
+            for field in fields[6:]:
+                if field.startswith('F='):
+                    flags = int(field[2:], 16)
+            if flags & 4:
+                # 編集リストで表示されないパケット（AV_PKT_FLAG_DISCARD）
+                continue
+            frames.append((int(fields[2]) * time_base, bool(flags & 1)))
+    if time_base is None:
+        raise ValueError(f"No video stream found in {input_video}")
+    frames.sort()
+    return frames
+
+def plan_segments(frames, workers, min_seconds=SEGMENT_MIN_SECONDS):
+    """
+    動画をキーフレームの位置でほぼ同じフレーム数の区間に分割
+
+    Args:
+        frames: probe_frames の返り値
+        workers: 並列にエンコードする区間の数の上限
+        min_seconds: 区間の最短の長さ（秒）
+
+    Returns:
+        list: {'seek': 区間の先頭のキーフレームの表示時刻（秒、Fraction。先頭の区間は None）,
+               'frames': フレーム数} のリスト
+    """
+    if not frames:
+        return []
+    duration = float(frames[-1][0] - frames[0][0])
+    count = max(1, min(workers, int(duration // min_seconds)))
+
+    # 均等に分けた位置に最も近いキーフレームを区間の先頭にする
+    keyframes = [index for index, (_, key) in enumerate(frames) if key and index > 0]
+    starts = {0}
+    for i in range(1, count):
+        if not keyframes:
+            break
+        target = len(frames) * i / count
+        position = bisect.bisect_left(keyframes, target)
+        candidates = keyframes[max(0, position - 1):position + 1]
+        starts.add(min(candidates, key=lambda index: abs(index - target)))
+    starts = sorted(starts)
+
+    segments = []
+    for start, end in zip(starts, starts[1:] + [len(frames)]):
+        segments.append({'seek': None if start == 0 else frames[start][0], 'frames': end - start})
+    return segments
+
+def overlay_inputs(overlay, png_path):
+    """
+    1つ目の入力（動画）にテキスト画像を合成する ffmpeg の引数
+
+    Args:
+        overlay: overlay_cache.get_overlay の返り値（None の場合は合成しない）
+        png_path: テキスト画像のPNGのパス
+
+    Returns:
+        list: 動画の入力の後に続ける ffmpeg のコマンドライン引数
+    """
+    if overlay is None:
+        return ['-map', '0:v:0']
+    # MoviePy と同じくRGBで合成する（yuv420 のまま合成すると奇数座標の縁が色ずれする）
+    return ['-i', png_path, '-filter_complex',
+            f"[0:v][1:v]overlay={overlay['x']}:{overlay['y']}:format=rgb[v]", '-map', '[v]']
+
+def composite_with_ffmpeg(input_video, output_video, render, ffmpeg_path, segment_workers=1,
+                          min_segment_seconds=SEGMENT_MIN_SECONDS):
+    """
+    テキスト画像を切り抜いたPNGにして、ffmpeg の overlay フィルタで合成
+
+    segment_workers が 2 以上で動画が十分に長い場合は、キーフレームの位置で区間に分割して
+    区間ごとの ffmpeg を並列に実行し、concat demuxer でストリームコピーして連結する
+
+    Args:
+        input_video: 入力動画パス
+        output_video: 出力動画パス
+        render: (幅, 高さ) から切り抜いたテキスト画像（overlay_cache.get_overlay の返り値）を返す関数
+        ffmpeg_path: ffmpeg の実行ファイル
+        segment_workers: 並列にエンコードする区間の数の上限（1 の場合は分割しない）
+        min_segment_seconds: 区間の最短の長さ（秒）
+    """
+    print(f"Probing video: {input_video}")
+    info = probe_video(input_video, ffmpeg_path)
+
+    print(f"Video size: [{info['width']}, {info['height']}]")
+    print(f"Video duration: {info['duration']}s")
+    print(f"Video fps: {info['fps']}")
+
+    segments = None
+    if segment_workers > 1 and info['duration'] >= 2 * min_segment_seconds:
+        segments = plan_segments(probe_frames(input_video, ffmpeg_path), segment_workers, min_segment_seconds)
+        if len(segments) < 2:
+            segments = None
+
+    overlay = render(info['width'], info['height'])
+
+    overlay_path = None
+    png_path = None
+    try:
+        if overlay is not None:
+            sprite = overlay['sprite']
+            print(f"Overlay: {sprite.shape[1]}x{sprite.shape[0]} at ({overlay['x']}, {overlay['y']})")
+            png_path = overlay['png']
+            if png_path is None:
+                # キャッシュしない場合は一時ファイルに書き出す（圧縮は速度優先）
+                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
+                    overlay_path = png_path = f.name
+                Image.fromarray(sprite).save(overlay_path, compress_level=1)
+
+        if segments is not None:
+            encode_segments(input_video, output_video, overlay, png_path, info, segments, ffmpeg_path)
+        else:
+            import multiprocessing
+            cpu_count = multiprocessing.cpu_count()
+
+            command = [ffmpeg_path, '-y', '-hide_banner', '-nostdin', '-v', 'error', '-i', input_video]
+            command += overlay_inputs(overlay, png_path)
+            command += ['-map', '0:a:0?',
+                        '-c:v', 'libx264', '-preset', X264_PRESET, '-pix_fmt', 'yuv420p',
+                        '-threads', str(cpu_count)] + x264_params(info['fps'])
+            command += ['-c:a', 'aac', '-b:a', AUDIO_BITRATE, output_video]
+
+            print(f"Writing output with ffmpeg overlay: {output_video}")
+            subprocess.run(command, check=True)
+    finally:
+        if overlay_path is not None:
+            os.remove(overlay_path)
+
+    print("Done!")
+
+def encode_segments(input_video, output_video, overlay, png_path, info, segments, ffmpeg_path):
+    """
+    区間ごとに合成・エンコードする ffmpeg を並列に実行し、映像をストリームコピーで連結する
+
+    各区間は -frames:v でフレーム数を固定するため、連結した映像のフレームは入力と一致する。
+    音声は連結時に元の動画から一度だけエンコードする
+
+    Args:
+        input_video: 入力動画パス
+        output_video: 出力動画パス
+        overlay: overlay_cache.get_overlay の返り値（None の場合は合成しない）
+        png_path: テキスト画像のPNGのパス
+        info: probe_video の返り値
+        segments: plan_segments の返り値
+        ffmpeg_path: ffmpeg の実行ファイル
+    """
+    import multiprocessing
+    from concurrent.futures import ThreadPoolExecutor
+
+    # 各区間の x264 が使うスレッド数（合計がCPUコア数程度になるようにする）
+    threads = max(1, multiprocessing.cpu_count() // len(segments))
+
+    # 区間のファイルは出力と同じディレクトリに作る（長い動画でもシステムの一時領域を圧迫しない）
+    output_dir = os.path.dirname(os.path.abspath(output_video))
+    with tempfile.TemporaryDirectory(prefix='segments_', dir=output_dir) as segment_dir:
+        if overlay is not None:
+            # キャッシュ内のPNGはエンコード中に他のプロセスが削除する場合があるため、区間のディレクトリに
+            # ハードリンクしてから使う（リンクできない場合はメモリ上のテキスト画像から書き出す）
+            local_png = os.path.join(segment_dir, 'overlay.png')
+            try:
+                os.link(png_path, local_png)
+            except OSError:
+                Image.fromarray(overlay['sprite']).save(local_png, compress_level=1)
+            png_path = local_png
+        overlay_args = overlay_inputs(overlay, png_path)
+
+        def encode(index):
+            segment = segments[index]
+            command = [ffmpeg_path, '-y', '-hide_banner', '-nostdin', '-v', 'error']
+            if segment['seek'] is not None:
+                # マイクロ秒に切り捨てて指定する（キーフレームを落とさず、先頭のタイムスタンプがほぼ 0 になる。
+                # キーフレームより手前にシークすると、固定フレームレートの出力で先頭のフレームが複製される）
+                microseconds = math.floor(segment['seek'] * 1000000)
+                command += ['-ss', f'{microseconds // 1000000}.{microseconds % 1000000:06d}']
+            command += ['-i', input_video] + overlay_args
+            command += ['-an', '-frames:v', str(segment['frames']),
+                        '-c:v', 'libx264', '-preset', X264_PRESET, '-pix_fmt', 'yuv420p',
+                        '-threads', str(threads)] + x264_params(info['fps'])
+            command.append(os.path.join(segment_dir, f'segment_{index:03d}.mp4'))
+            subprocess.run(command, check=True)
+
+        print(f"Encoding {len(segments)} segments in parallel: "
+              f"{', '.join(str(segment['frames']) for segment in segments)} frames")
+        with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+            list(executor.map(encode, range(len(segments))))
+
+        # concat demuxer のリストは相対パス（リストのディレクトリ基準）で書く
+        list_path = os.path.join(segment_dir, 'segments.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for index in range(len(segments)):
+                f.write(f"file 'segment_{index:03d}.mp4'\n")
+
+        print(f"Concatenating segments: {output_video}")
+        command = [ffmpeg_path, '-y', '-hide_banner', '-nostdin', '-v', 'error',
+                   '-f', 'concat', '-safe', '0', '-i', list_path, '-i', input_video,
+                   '-map', '0:v:0', '-map', '1:a:0?', '-c:v', 'copy',
+                   '-c:a', 'aac', '-b:a', AUDIO_BITRATE, '-movflags', '+faststart', output_video]
+        subprocess.run(command, check=True)
+
+def composite_with_moviepy(input_video, output_video, render):
+    """
+    MoviePy でフレームごとにテキスト画像の外接矩形を合成
+
+    Args:
+        input_video: 入力動画パス
+        output_video: 出力動画パス
+        render: (幅, 高さ) から切り抜いたテキスト画像（overlay_cache.get_overlay の返り値）を返す関数
     """
     print(f"Loading video: {input_video}")
 
+    VideoFileClip = load_moviepy()
+
     # 動画を読み込み
     video = VideoFileClip(input_video)
 
@@ -474,37 +702,20 @@ def add_text_to_video(input_video, output_video, text, font_size=80,
     print(f"Video duration: {video.duration}s")
     print(f"Video fps: {video.fps}")
 
-    # テキスト画像を生成（フォントサイズは自動計算される）
-    print(f"Creating text image with auto font sizing...")
-    print(f"  Text: {text}")
-    print(f"  Text color: {text_color}")
-    print(f"  Background color: {bg_color} (opacity: {bg_opacity})")
-    print(f"  Position: ({position_x}, {position_y})")
-    print(f"  Max background size: {max_bg_width_ratio * 100}% x {max_bg_height_ratio * 100}%")
-
-    text_img = create_text_image(
-        text, video.w, video.h, font_size,
-        text_color, bg_color, bg_opacity,
-        padding, position_x, position_y,
-        max_bg_width_ratio, max_bg_height_ratio,
-        font_family, font_weight
-    )
-
-    # ImageClipを作成
-    text_clip = ImageClip(text_img, duration=video.duration)
-
-    # テキスト画像は動画と同じサイズで既に中央配置されているため、(0,0)に配置
-    # MoviePy 2.x では with_position を使用
-    try:
-        text_clip = text_clip.with_position((0, 0))
-    except AttributeError:
-        # MoviePy 1.x との互換性
-        text_clip = text_clip.set_position((0, 0))
-
-    print(f"Text clip created")
+    overlay = render(video.w, video.h)
 
-    # 動画とテキストを合成
-    final_video = CompositeVideoClip([video, text_clip])
+    if overlay is None:
+        final_video = video
+    else:
+        # テキストの外接矩形だけをフレームごとに合成（全画面のマスク合成を行わない）
+        sprite, x, y = overlay['sprite'], overlay['x'], overlay['y']
+        print(f"Text sprite: {sprite.shape[1]}x{sprite.shape[0]} at ({x}, {y})")
+        compositor = SpriteCompositor(sprite, x, y)
+        try:
+            final_video = video.image_transform(compositor)
+        except AttributeError:
+            # MoviePy 1.x との互換性
+            final_video = video.fl_image(compositor)
 
     print(f"Writing output: {output_video}")
 
@@ -518,22 +729,12 @@ def add_text_to_video(input_video, output_video, text, font_size=80,
         codec='libx264',
         audio_codec='aac',
         fps=video.fps,
-        preset='ultrafast',     # 最速プリセット
+        preset=X264_PRESET,     # 最速プリセット
         threads=cpu_count,      # 全CPUコアを使用
-        ffmpeg_params=[
-            '-crf', '28',       # 品質を下げて速度優先（23→28）
-            '-tune', 'fastdecode',  # 高速デコード用チューニング
-            '-movflags', '+faststart',  # ストリーミング最適化
-            '-g', str(int(video.fps * 2)),  # キーフレーム間隔を2秒に
-            '-bf', '0',         # Bフレームを無効化（速度優先）
-            '-refs', '1',       # 参照フレーム数を最小化
-            '-me_method', 'dia',  # 動き推定を最速アルゴリズムに
-            '-subq', '0',       # サブピクセル動き推定を無効化
-            '-trellis', '0',    # トレリス量子化を無効化
-        ],
+        ffmpeg_params=x264_params(video.fps),
         logger=None,            # ログを抑制
         write_logfile=False,    # ログファイル作成を無効化
-        audio_bitrate='128k'    # 音声ビットレートを下げる
+        audio_bitrate=AUDIO_BITRATE  # 音声ビットレートを下げる
     )
 
     # クリーンアップ
@@ -542,12 +743,130 @@ def add_text_to_video(input_video, output_video, text, font_size=80,
 
     print("Done!")
 
+def options_to_kwargs(options):
+    """
+    CLI・マニフェストのオプション（textColor などのキー）を add_text_to_video の引数に変換
+
+    Args:
+        options: オプションの辞書
+
+    Returns:
+        dict: add_text_to_video のキーワード引数
+    """
+    return {name: options[key] for key, name in OPTION_KEYS.items() if key in options}
+
+def load_overlay_jobs(manifest_path):
+    """
+    バッチ処理のジョブを読み込む
+
+    形式（マニフェスト、相対パスはマニフェストのディレクトリから解決）:
+        {"options": {"textColor": "black"},
+         "jobs": [{"input": "a.mp4", "output": "a_text.mp4", "text": "タイトル", "options": {...}}]}
+    または '-' を指定した場合、標準入力の1行に1ジョブのJSON（改行区切りJSON）
+
+    Args:
+        manifest_path: マニフェストファイルのパス、または '-'
+
+    Returns:
+        list: [{'input', 'output', 'text', 'options'}, ...]（options は共通オプションと統合済み）
+    """
+    if manifest_path == '-':
+        base_dir = os.getcwd()
+        defaults = {}
+        jobs = [json.loads(line) for line in sys.stdin if line.strip()]
+    else:
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest, list):
+            manifest = {'jobs': manifest}
+        defaults = manifest.get('options', {})
+        jobs = manifest['jobs']
+
+    def resolve(path):
+        return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+    return [{
+        'input': resolve(job['input']),
+        'output': resolve(job['output']),
+        'text': job['text'],
+        'options': {**defaults, **job.get('options', {})}
+    } for job in jobs]
+
+def _run_overlay_job(index, job, report):
+    # 1つのジョブを処理して結果を報告（例外は結果に含める）
+    base = {'index': index, 'input': job['input'], 'output': job['output']}
+    report({**base, 'status': 'started'})
+    started = time.perf_counter()
+    try:
+        add_text_to_video(job['input'], job['output'], job['text'], **options_to_kwargs(job['options']))
+        item = {**base, 'status': 'done', 'ok': True}
+    except Exception as e:
+        item = {**base, 'status': 'failed', 'ok': False, 'error': str(e), 'error_type': type(e).__name__}
+    item['elapsed'] = round(time.perf_counter() - started, 3)
+    report(item)
+    return item
+
+def batch_add_text(jobs, workers=DEFAULT_BATCH_WORKERS, report=None):
+    """
+    複数の動画にテキストを追加（スレッドプール）
+
+    ffmpeg での合成・エンコードは子プロセスで行われるため、スレッドで並行に処理できる。
+    フォント・レイアウト・テキスト画像はプロセス内で共有され、同じタイトルは一度だけ描画される
+
+    Args:
+        jobs: load_overlay_jobs の返り値
+        workers: 同時に処理する動画の数
+        report: ジョブの開始・終了時に状態の辞書を受け取る関数
+                （{'index', 'input', 'output', 'status': 'started' | 'done' | 'failed', ...}）
+
+    Returns:
+        list: ジョブの順の結果（{'index', 'input', 'output', 'status', 'ok', 'elapsed'} と失敗時は
+              'error'、'error_type'）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    report_lock = threading.Lock()
+
+    def locked_report(item):
+        if report is not None:
+            with report_lock:
+                report(item)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(_run_overlay_job, index, job, locked_report)
+                   for index, job in enumerate(jobs)]
+        return [future.result() for future in futures]
+
 if __name__ == '__main__':
-    import json
     import base64
 
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        parser = argparse.ArgumentParser(
+            description='複数の動画にテキストを追加',
+            usage='python add_text_to_video.py --batch <manifest.json | -> [--workers N]'
+        )
+        parser.add_argument('--batch', required=True, metavar='MANIFEST',
+                            help="ジョブのマニフェスト（JSON）。'-' の場合は標準入力の改行区切りJSON")
+        parser.add_argument('--workers', type=int, default=DEFAULT_BATCH_WORKERS,
+                            help=f'同時に処理する動画の数（デフォルト: {DEFAULT_BATCH_WORKERS}）')
+        args = parser.parse_args()
+
+        jobs = load_overlay_jobs(args.batch)
+
+        # 標準出力はジョブの状態のJSON行のみ（各ジョブのログは標準エラーへ）
+        status_output = sys.stdout
+
+        def report(item):
+            print(json.dumps(item, ensure_ascii=False), file=status_output, flush=True)
+
+        with contextlib.redirect_stdout(sys.stderr):
+            results = batch_add_text(jobs, workers=args.workers, report=report)
+        sys.exit(0 if all(item['ok'] for item in results) else 1)
+
     if len(sys.argv) < 4:
         print("Usage: python add_text_to_video.py <input_video> <output_video> <text_base64> [options_base64]")
+        print("       python add_text_to_video.py --batch <manifest.json | -> [--workers N]")
         print("Text and options are passed as Base64-encoded strings")
         sys.exit(1)
 
@@ -563,20 +882,8 @@ if __name__ == '__main__':
         print(f"Error: Could not decode text: {e}")
         sys.exit(1)
 
-    # デフォルト設定
-    font_size = 80  # 使用されない（自動計算）
-    font_family = 'msgothic'
-    font_weight = 'normal'
-    text_color = 'white'
-    bg_color = 'black'
-    bg_opacity = 0.7
-    padding = 30
-    position_x = 'center'
-    position_y = 0.5
-    max_bg_width_ratio = 0.9
-    max_bg_height_ratio = 0.3
-
-    # オプションがBase64エンコードされたJSON形式で渡された場合
+    # オプションがBase64エンコードされたJSON形式で渡された場合（省略したオプションはデフォルト値）
+    kwargs = {}
     if len(sys.argv) > 4:
         try:
             # Base64デコード（UTF-8で文字化け防止）
@@ -585,25 +892,10 @@ if __name__ == '__main__':
 
             print(f"Decoded options: {options}")
 
-            font_family = options.get('fontFamily', font_family)
-            font_weight = options.get('fontWeight', font_weight)
-            text_color = options.get('textColor', text_color)
-            bg_color = options.get('bgColor', bg_color)
-            bg_opacity = options.get('bgOpacity', bg_opacity)
-            padding = options.get('padding', padding)
-            position_x = options.get('positionX', position_x)
-            position_y = options.get('positionY', position_y)
-            max_bg_width_ratio = options.get('maxBgWidthRatio', max_bg_width_ratio)
-            max_bg_height_ratio = options.get('maxBgHeightRatio', max_bg_height_ratio)
+            kwargs = options_to_kwargs(options)
         except (base64.binascii.Error, json.JSONDecodeError, UnicodeDecodeError) as e:
             # 後方互換性: Base64でない場合はデフォルト値を使用
             print(f"Warning: Could not parse options: {e}")
             pass
 
-    add_text_to_video(
-        input_video, output_video, text, font_size,
-        text_color, bg_color, bg_opacity,
-        padding, position_x, position_y,
-        max_bg_width_ratio, max_bg_height_ratio,
-        font_family, font_weight
-    )
+    add_text_to_video(input_video, output_video, text, **kwargs)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+スペクトルピークのランドマーク（フィンガープリント）による音声オフセット検出
+参照音声のピーク対をハッシュ化してインデックスを作成し、
+比較音声で一致したハッシュの時間差を投票してオフセットを求める。
+計算量は探索範囲の広さにほとんど依存しない
+"""
+import numpy as np
+
+# フィンガープリント用のサンプリングレートとSTFT設定
+FINGERPRINT_SR = 8000
+FINGERPRINT_N_FFT = 1024
+FINGERPRINT_HOP = 256
+
+# ピーク検出の近傍サイズ（周波数ビン, フレーム）
+PEAK_NEIGHBORHOOD = (15, 15)
+
+# 1秒あたりに残すピーク数の上限
+PEAKS_PER_SECOND = 30
+
+# ピーク対の探索範囲: 時間差（フレーム）と周波数差（ビン）、アンカーあたりの対の数
+TARGET_MAX_DT = 63
+TARGET_MAX_DF = 64
+FAN_OUT = 10
+
+# 参照内でこれより多く出現するハッシュは識別力が低いため無視
+MAX_HASH_OCCURRENCES = 64
+
+# STFTを計算するブロックの長さ（フレーム数、メモリ使用量を一定に保つ）
+BLOCK_FRAMES = 2048
+
+def find_spectral_peaks(y, n_fft=FINGERPRINT_N_FFT, hop_length=FINGERPRINT_HOP, sr=FINGERPRINT_SR):
+    """
+    スペクトログラムの局所最大値（ランドマーク）を検出
+
+    STFTはブロックごとに計算するため、長い録音でもメモリ使用量は一定
+
+    Args:
+        y: 波形
+        n_fft: FFT長
+        hop_length: ホップ長
+        sr: サンプリングレート
+
+    Returns:
+        tuple: (フレーム番号の配列, 周波数ビンの配列)（時間順）
+    """
+    import librosa
+    from scipy.ndimage import maximum_filter
+
+    n_frames = max(0, 1 + (len(y) - n_fft) // hop_length)
+    pad = PEAK_NEIGHBORHOOD[1] // 2
+    block_seconds = BLOCK_FRAMES * hop_length / sr
+    max_peaks = max(1, int(PEAKS_PER_SECOND * block_seconds))
+
+    all_times = []
+    all_freqs = []
+
+    for block_start in range(0, n_frames, BLOCK_FRAMES):
+        block_end = min(n_frames, block_start + BLOCK_FRAMES)
+        # 近傍判定のため前後に pad フレーム分を含めて計算
+        frame_lo = max(0, block_start - pad)
+        frame_hi = min(n_frames, block_end + pad)
+        segment = y[frame_lo * hop_length:(frame_hi - 1) * hop_length + n_fft]
+
+        spec = np.abs(librosa.stft(segment, n_fft=n_fft, hop_length=hop_length, center=False))
+        spec_db = librosa.amplitude_to_db(spec, ref=1.0)
+        del spec
+
+        local_max = maximum_filter(spec_db, size=PEAK_NEIGHBORHOOD, mode='constant', cval=-np.inf)
+        threshold = np.median(spec_db) + 10.0
+        freqs, times = np.nonzero((spec_db == local_max) & (spec_db > threshold))
+
+        # ブロック中心部のピークのみ採用（重複区間は隣のブロックで扱う）
+        times = times + frame_lo
+        core = (times >= block_start) & (times < block_end)
+        freqs, times = freqs[core], times[core]
+
+        # 強いピークから上限数まで残す
+        if len(times) > max_peaks:
+            strength = spec_db[freqs, times - frame_lo]
+            keep = np.argsort(strength)[::-1][:max_peaks]
+            freqs, times = freqs[keep], times[keep]
+
+        all_times.append(times)
+        all_freqs.append(freqs)
+
+    if not all_times:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    times = np.concatenate(all_times).astype(np.int64)
+    freqs = np.concatenate(all_freqs).astype(np.int64)
+    order = np.lexsort((freqs, times))
+    return times[order], freqs[order]
+
+def compute_landmarks(y, sr=FINGERPRINT_SR, n_fft=FINGERPRINT_N_FFT, hop_length=FINGERPRINT_HOP):
+    """
+    ピーク対（アンカー, ターゲット）からランドマークハッシュを作成
+
+    ハッシュは (アンカー周波数, ターゲット周波数, 時間差) を32bitに詰めたもの
+
+    Args:
+        y: 波形（sr でリサンプル済み）
+        sr: サンプリングレート
+        n_fft: FFT長
+        hop_length: ホップ長
+
+    Returns:
+        tuple: (ハッシュの配列, アンカーのフレーム番号の配列)
+    """
+    times, freqs = find_spectral_peaks(y, n_fft=n_fft, hop_length=hop_length, sr=sr)
+    n_peaks = len(times)
+    if n_peaks < 2:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int64)
+
+    # 各アンカーのターゲット候補の範囲（時間順に並んでいる）
+    lo = np.searchsorted(times, times + 1, side='left')
+    hi = np.searchsorted(times, times + TARGET_MAX_DT, side='right')
+    anchors = np.arange(n_peaks)
+    taken = np.zeros(n_peaks, dtype=np.int64)
+
+    hash_list = []
+    time_list = []
+
+    for k in range(int((hi - lo).max(initial=0))):
+        target = lo + k
+        valid = (target < hi) & (taken < FAN_OUT)
+        if not valid.any():
+            break
+        a = anchors[valid]
+        t = target[valid]
+        df = freqs[t] - freqs[a]
+        near = np.abs(df) <= TARGET_MAX_DF
+        a, t = a[near], t[near]
+        taken[a] += 1
+
+        dt = times[t] - times[a]
+        hashes = (freqs[a].astype(np.uint32) << 16) | (freqs[t].astype(np.uint32) << 6) | dt.astype(np.uint32)
+        hash_list.append(hashes)
+        time_list.append(times[a])
+
+    if not hash_list:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int64)
+
+    return np.concatenate(hash_list), np.concatenate(time_list)
+
+class LandmarkIndex:
+    """
+    参照音声のランドマークハッシュの検索インデックス（ハッシュでソートした配列）
+    """
+
+    def __init__(self, hashes, times):
+        order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[order]
+        self.times = times[order]
+
+    @classmethod
+    def from_audio(cls, y, sr=FINGERPRINT_SR):
+        """波形からインデックスを作成"""
+        return cls(*compute_landmarks(y, sr=sr))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def match(self, hashes, times, max_delta=None):
+        """
+        一致したハッシュの時間差（参照 - 比較、フレーム）を投票
+
+        Args:
+            hashes: 比較音声のハッシュ
+            times: 比較音声のアンカーのフレーム番号
+            max_delta: 時間差の絶対値の上限（フレーム、Noneの場合は制限なし）
+
+        Returns:
+            dict: {'delta', 'votes', 'matches', 'query_hashes', 'query_times'}
+                  （query_times は最多票の時間差で一致した比較側のフレーム番号）
+                  一致がない場合は None
+        """
+        left = np.searchsorted(self.hashes, hashes, side='left')
+        right = np.searchsorted(self.hashes, hashes, side='right')
+        counts = right - left
+
+        # 出現回数が多すぎるハッシュは除外
+        usable = (counts > 0) & (counts <= MAX_HASH_OCCURRENCES)
+        if not usable.any():
+            return None
+        left, counts, query_times = left[usable], counts[usable], times[usable]
+
+        # 一致したすべての (比較, 参照) の組を展開
+        query_idx = np.repeat(np.arange(len(left)), counts)
+        starts = np.repeat(left - np.cumsum(counts) + counts, counts)
+        ref_idx = starts + np.arange(len(query_idx))
+        deltas = self.times[ref_idx] - query_times[query_idx]
+
+        if max_delta is not None:
+            keep = np.abs(deltas) <= max_delta
+            deltas, query_idx = deltas[keep], query_idx[keep]
+            if len(deltas) == 0:
+                return None
+
+        base = deltas.min()
+        histogram = np.bincount(deltas - base)
+        best = int(np.argmax(histogram))
+
+        return {
+            'delta': int(best + base),
+            'votes': int(histogram[best]),
+            'matches': int(len(deltas)),
+            'query_hashes': int(len(hashes)),
+            'query_times': query_times[query_idx[deltas == best + base]]
+        }
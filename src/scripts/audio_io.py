@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音声ファイルの読み込み
+16bit PCM の WAVはヘッダを一度だけ解析し、
+サンプルを int16 の np.memmap として公開する。解析する区間だけを float32 に変換するため、
+ウィンドウごとのデコードやリサンプルが不要になる。
+
+動画などそれ以外の形式は、ffmpeg で要求された区間だけを 16bit PCM（モノラル）にデコードし、
+標準出力のパイプから読み込む（一時WAVファイルは作らない）。
+ffmpeg が見つからない場合は librosa で読み込む
+（librosa はフォールバックが必要になった時点でインポートする）
+"""
+import os
+import re
+import shutil
+import struct
+import subprocess
+import threading
+from collections import OrderedDict
+import numpy as np
+
+import sync_profile
+
+# WAVフォーマットタグ
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# WAVE_FORMAT_EXTENSIBLE の PCM サブフォーマットGUIDの末尾14バイト
+_PCM_SUBFORMAT_TAIL = b'\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71'
+
+# ffmpeg の実行ファイルを指定する環境変数（audioSync.js が @ffmpeg-installer/ffmpeg のパスを渡す）
+FFMPEG_ENV = 'FFMPEG_PATH'
+
+# ffprobe の実行ファイルを指定する環境変数（音声ストリームの長さの取得に使う）
+FFPROBE_ENV = 'FFPROBE_PATH'
+
+# ffmpeg のログに出力されるコンテナの長さ
+_DURATION_PATTERN = re.compile(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)')
+
+# 開いたWAVのメモリマップを保持する数
+WAV_MEMO_SIZE = 16
+_wav_memo = OrderedDict()
+_wav_memo_lock = threading.Lock()
+
+def _parse_wav_header(audio_path):
+    # RIFFチャンクを走査し、16bit PCM の場合のみ (チャンネル数, サンプリングレート, データ位置, フレーム数) を返す
+    with open(audio_path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            return None
+
+        fmt = None
+        file_size = os.fstat(f.fileno()).st_size
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                if len(body) < 16:
+                    return None
+                format_tag, channels, sr, _byte_rate, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE:
+                    if len(body) < 40 or body[26:40] != _PCM_SUBFORMAT_TAIL:
+                        return None
+                    format_tag = struct.unpack('<H', body[24:26])[0]
+                if format_tag != WAVE_FORMAT_PCM or bits != 16 or block_align != 2 * channels:
+                    return None
+                fmt = (channels, sr)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    return None
+                data_offset = f.tell()
+                # ストリーミング出力でサイズが未確定（0 または 0xFFFFFFFF）の場合はファイル末尾まで
+                available = file_size - data_offset
+                if chunk_size == 0 or chunk_size > available:
+                    chunk_size = available
+                channels, sr = fmt
+                return channels, sr, data_offset, chunk_size // (2 * channels)
+            else:
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+def open_wav(audio_path):
+    """
+    16bit PCM の WAV をメモリマップで開く
+
+    Args:
+        audio_path: 音声ファイルのパス
+
+    Returns:
+        dict or None: {'samples': int16 の memmap（フレーム数 x チャンネル数）, 'sr', 'channels'}
+                      対応していない形式の場合は None
+    """
+    stat = os.stat(audio_path)
+    memo_key = (os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns)
+    with _wav_memo_lock:
+        wav = _wav_memo.get(memo_key)
+        if wav is not None:
+            _wav_memo.move_to_end(memo_key)
+            return wav
+
+    try:
+        header = _parse_wav_header(audio_path)
+    except (OSError, struct.error):
+        header = None
+    if header is None:
+        return None
+
+    channels, sr, data_offset, n_frames = header
+    if n_frames == 0:
+        samples = np.zeros((0, channels), dtype=np.int16)
+    else:
+        samples = np.memmap(audio_path, dtype='<i2', mode='r', offset=data_offset,
+                            shape=(n_frames, channels))
+    wav = {'samples': samples, 'sr': sr, 'channels': channels, 'data_offset': data_offset}
+
+    with _wav_memo_lock:
+        _wav_memo[memo_key] = wav
+        while len(_wav_memo) > WAV_MEMO_SIZE:
+            _wav_memo.popitem(last=False)
+    return wav
+
+def load_audio(audio_path, sr=22050, offset=0.0, duration=None, mmap=True):
+    """
+    音声をモノラルの float32 で読み込む（librosa.load と同じ結果）
+
+    サンプリングレートが一致する 16bit PCM の WAV は、要求された区間だけを
+    メモリマップから変換する。WAV以外（動画など）は ffmpeg で区間だけをデコードし、
+    ffmpeg が見つからない場合やサンプリングレートが異なる WAV は librosa.load を使う
+
+    Args:
+        audio_path: 音声ファイルのパス
+        sr: サンプリングレート
+        offset: 開始オフセット（秒）
+        duration: 読み込む秒数（Noneの場合は末尾まで）
+        mmap: Falseの場合はメモリマップを使わずに区間をファイルから直接読む
+              （長いファイルを順に読み進める場合に、読み終えたページがメモリに残らない）
+
+    Returns:
+        tuple: (波形, サンプリングレート)
+    """
+    with sync_profile.phase('decode'):
+        y, sr = _load_audio(audio_path, sr, offset, duration, mmap)
+    sync_profile.count('bytes_decoded', y.nbytes)
+    return y, sr
+
+def _load_audio(audio_path, sr, offset, duration, mmap):
+    wav = open_wav(audio_path)
+    if wav is None:
+        ffmpeg_path = find_ffmpeg()
+        if ffmpeg_path is not None:
+            sync_profile.count('ffmpeg_decodes')
+            return _pipe_audio(ffmpeg_path, audio_path, sr, offset, duration), sr
+    if wav is None or wav['sr'] != sr:
+        import librosa
+        sync_profile.count('librosa_decodes')
+        return librosa.load(audio_path, sr=sr, offset=offset, duration=duration, mono=True)
+
+    # librosa（soundfile）と同じく開始位置と長さは切り捨て
+    samples = wav['samples']
+    start = int(offset * sr) if offset else 0
+    stop = len(samples) if duration is None else min(len(samples), start + int(duration * sr))
+    if mmap:
+        block = samples[start:stop]
+    else:
+        channels = wav['channels']
+        count = max(0, stop - start) * channels
+        with open(audio_path, 'rb') as f:
+            f.seek(wav['data_offset'] + start * 2 * channels)
+            block = np.fromfile(f, dtype='<i2', count=count).reshape(-1, channels)
+
+    y = block.astype(np.float32)
+    y *= np.float32(1.0 / 32768.0)
+    if wav['channels'] == 1:
+        return y[:, 0], sr
+    return y.mean(axis=1), sr
+
+def find_ffmpeg():
+    """
+    ffmpeg の実行ファイルを探す（環境変数 FFMPEG_PATH、なければ PATH）
+
+    Returns:
+        str or None: 実行ファイルのパス（見つからない場合は None）
+    """
+    path = os.environ.get(FFMPEG_ENV)
+    if path and os.path.isfile(path):
+        return path
+    return shutil.which('ffmpeg')
+
+def find_ffprobe():
+    """
+    ffprobe の実行ファイルを探す（環境変数 FFPROBE_PATH、ffmpeg と同じディレクトリ、PATH の順）
+
+    Returns:
+        str or None: 実行ファイルのパス（見つからない場合は None）
+    """
+    path = os.environ.get(FFPROBE_ENV)
+    if path and os.path.isfile(path):
+        return path
+    ffmpeg_path = find_ffmpeg()
+    if ffmpeg_path is not None:
+        directory, name = os.path.split(ffmpeg_path)
+        sibling = os.path.join(directory, name.replace('ffmpeg', 'ffprobe'))
+        if sibling != ffmpeg_path and os.path.isfile(sibling):
+            return sibling
+    return shutil.which('ffprobe')
+
+def _pipe_audio(ffmpeg_path, audio_path, sr, offset, duration):
+    # -ss/-t を入力オプションにして、区間の前後はデコードせずにシークする
+    # （extractAudio と同じく ffmpeg でモノラルにダウンミックス・リサンプルする）
+    command = [ffmpeg_path, '-nostdin', '-v', 'error']
+    if offset:
+        command += ['-ss', f'{offset:.6f}']
+    if duration is not None:
+        command += ['-t', f'{duration:.6f}']
+    command += ['-i', audio_path, '-vn', '-ac', '1', '-ar', str(sr),
+                '-acodec', 'pcm_s16le', '-f', 's16le', 'pipe:1']
+
+    # 標準出力と標準エラーを同時に読む（片方だけ読むと、もう一方のパイプが詰まって止まる）
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        message = process.stderr.decode('utf-8', 'replace').strip()
+        raise ValueError(f"ffmpeg could not decode {audio_path}: {message}")
+
+    samples = np.frombuffer(process.stdout, dtype='<i2', count=len(process.stdout) // 2)
+    y = samples.astype(np.float32)
+    y *= np.float32(1.0 / 32768.0)
+    return y
+
+def get_duration(audio_path):
+    """
+    音声の長さ（秒）を返す（WAVはヘッダのみから計算）
+
+    WAV以外は ffprobe で音声ストリームの長さを取得する。ffprobe がない場合は
+    ffmpeg が出力するコンテナの長さ、ffmpeg もない場合は librosa を使う
+
+    Args:
+        audio_path: 音声ファイルのパス
+
+    Returns:
+        float: 音声の長さ（秒）
+    """
+    wav = open_wav(audio_path)
+    if wav is not None:
+        return len(wav['samples']) / wav['sr']
+
+    ffprobe_path = find_ffprobe()
+    if ffprobe_path is not None:
+        process = subprocess.run([ffprobe_path, '-v', 'error', '-select_streams', 'a:0',
+                                  '-show_entries', 'stream=duration', '-of', 'default=nw=1:nk=1',
+                                  audio_path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            return float(process.stdout.decode('utf-8', 'replace').split()[0])
+        except (IndexError, ValueError):
+            pass
+
+    ffmpeg_path = find_ffmpeg()
+    if ffmpeg_path is not None:
+        # 出力を指定しない ffmpeg -i は終了コード 1 で入力の情報だけを出力する
+        process = subprocess.run([ffmpeg_path, '-nostdin', '-hide_banner', '-i', audio_path],
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        match = _DURATION_PATTERN.search(process.stderr.decode('utf-8', 'replace'))
+        if match:
+            hours, minutes, seconds = match.groups()
+            return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    import librosa
+    return librosa.get_duration(path=audio_path)
@@ -4,13 +4,30 @@
 高精度音声同期スクリプト
 librosaを使用した音響特徴抽出（メルスペクトログラム、クロマ特徴、MFCC）
 複数のチェックポイントで検証し、最も信頼性の高いオフセットを返す
+
+起動を速くするため、librosa と scipy は使用する関数の中でインポートする
+（--help や引数エラー、WAV入力の gcc_phat/xcorr では読み込まれない）
+
+音声ファイルの代わりに動画ファイルを直接指定できる（audio_io が ffmpeg で必要な区間だけを
+デコードし、パイプから読み込む）
 """
 import sys
 import io
+import os
 import json
+import hashlib
+import argparse
+import time
+import threading
+import contextlib
+from collections import OrderedDict
 import numpy as np
-import librosa
-from scipy.signal import correlate
+from numpy.lib.stride_tricks import sliding_window_view
+
+from disk_cache import DiskCache, DEFAULT_MAX_BYTES, make_key
+import audio_fingerprint
+import audio_io
+import sync_profile
 
 # Windows環境での文字化け防止（標準入出力をUTF-8に設定）
 if sys.platform == 'win32':
@@ -18,145 +35,820 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-def extract_audio_features(audio_path, sr=22050, duration=5.0, offset=0.0):
+# トラック全体の特徴量を計算する際の固定ホップ長（サンプル数）
+DEFAULT_HOP_LENGTH = 512
+
+# スペクトル特徴のFFT長（librosa のデフォルトと同じ）
+DEFAULT_N_FFT = 2048
+
+# 低メモリモードでトラック全体のスペクトル特徴をまとめて計算するフレーム数
+FEATURE_BLOCK_FRAMES = 1024
+
+# power_to_db(ref=np.max) のデフォルトのダイナミックレンジ（dB）
+MEL_TOP_DB = 80.0
+
+# 特徴キャッシュの保存形式を変更した場合はこの値を上げる
+FEATURE_CACHE_VERSION = 1
+
+# librosa の numba カーネルのJITキャッシュの保存先（環境変数 NUMBA_CACHE_DIR が優先）
+JIT_CACHE_ENV = 'NUMBA_CACHE_DIR'
+DEFAULT_JIT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'temp', 'numba_cache')
+
+# メモリ上に保持するトラック数（常駐サーバーモードで使用、0の場合は保持しない）
+TRACK_MEMO_SIZE = 0
+_track_memo = OrderedDict()
+_track_memo_lock = threading.Lock()
+
+# キャッシュキーに使うファイル先頭・末尾の長さ（バイト、動画全体を読まずにキーを作る）
+DIGEST_EDGE_BYTES = 1024 * 1024
+
+# キャッシュキーに使うファイルの識別情報を保持する数
+DIGEST_MEMO_SIZE = 64
+_digest_memo = OrderedDict()
+_digest_memo_lock = threading.Lock()
+
+# 特徴量レジストリ: 特徴名 -> {'compute', 'framewise', 'window_transform'}
+FEATURE_REGISTRY = {}
+
+# 類似度レジストリ: 手法名 -> {'compute', 'features'}
+SIMILARITY_REGISTRY = {}
+
+# 一括スコア計算で一度に処理する候補ウィンドウ数（メモリ使用量の上限）
+BATCH_CHUNK_SIZE = 64
+
+# 'combined' スコアの重み（調整可能）
+COMBINED_WEIGHTS = {
+    'raw': 0.3,      # 波形相関
+    'mel': 0.3,      # メルスペクトログラム
+    'chroma': 0.2,   # クロマ特徴
+    'mfcc': 0.2      # MFCC
+}
+
+def register_feature(name, framewise=True, window_transform=None):
+    """
+    音響特徴をレジストリに登録するデコレータ
+
+    登録した関数は AudioFeatures を受け取り、特徴量を返す。
+    他の特徴が必要な場合は受け取った features から参照すればよい
+
+    Args:
+        name: 特徴名（特徴辞書のキー）
+        framewise: Trueの場合はフレーム単位の行列（最後の軸が時間）。
+                   トラックでは全体で一度だけ計算し、ウィンドウはスライスで得る
+        window_transform: ウィンドウ単位で適用する後処理
+    """
+    def decorator(func):
+        FEATURE_REGISTRY[name] = {
+            'compute': func,
+            'framewise': framewise,
+            'window_transform': window_transform
+        }
+        return func
+    return decorator
+
+def register_similarity(name, features):
+    """
+    類似度手法をレジストリに登録するデコレータ
+
+    登録した関数は2つの特徴辞書を受け取り、0-1の類似度を返す。
+    COMBINED_WEIGHTS に重みを追加すると 'combined' スコアにも反映される
+
+    Args:
+        name: 手法名（compute_feature_similarity の method）
+        features: この手法が参照する特徴名のリスト
+    """
+    def decorator(func):
+        SIMILARITY_REGISTRY[name] = {
+            'compute': func,
+            'features': tuple(features)
+        }
+        return func
+    return decorator
+
+def register_batch_similarity(name):
+    """
+    類似度手法の一括計算版をレジストリに登録するデコレータ
+
+    登録した関数は (参照ウィンドウの特徴, 比較トラック, 開始サンプルの配列, 開始フレームの配列) を
+    受け取り、各候補ウィンドウの類似度の配列を返す。候補はすべて参照ウィンドウと同じ長さで
+    トラック内に収まることが保証される
+
+    Args:
+        name: 手法名（register_similarity で登録済みのもの）
+    """
+    def decorator(func):
+        SIMILARITY_REGISTRY[name]['batch'] = func
+        return func
+    return decorator
+
+def required_features(method='combined'):
+    """
+    類似度手法が必要とする特徴名を返す
+
+    Args:
+        method: 類似度手法名
+
+    Returns:
+        list: 特徴名のリスト
+    """
+    if method == 'combined':
+        methods = [m for m, w in COMBINED_WEIGHTS.items() if w]
+    else:
+        methods = [method]
+
+    names = []
+    for m in methods:
+        for name in SIMILARITY_REGISTRY[m]['features']:
+            if name not in names:
+                names.append(name)
+    return names
+
+class AudioFeatures(dict):
+    """
+    必要になった特徴だけを計算する遅延評価の特徴辞書
+
+    'raw'（波形）と 'sr' 以外のキーは初回アクセス時に FEATURE_REGISTRY から
+    計算され、以降は同じ値が返される（ウィンドウごとに最大1回）。
+    source が指定された場合、フレーム単位の特徴は source のトラック全体の
+    行列から切り出す。low_memory の場合、トラック全体のスペクトル特徴は
+    STFT全体を保持せずにブロックごとに計算する（結果は同じ）
+    """
+
+    def __init__(self, y, sr, hop_length=DEFAULT_HOP_LENGTH, window=True,
+                 source=None, start_frame=0, n_frames=None, n_fft=DEFAULT_N_FFT, low_memory=False):
+        super().__init__(raw=y, sr=sr)
+        self.hop_length = hop_length
+        self.n_fft = n_fft
+        self.low_memory = low_memory
+        self.window = window
+        self.source = source
+        self.start_frame = start_frame
+        self.n_frames = n_frames
+
+    def __missing__(self, name):
+        spec = FEATURE_REGISTRY.get(name)
+        if spec is None:
+            raise KeyError(name)
+
+        if spec['framewise'] and self.source is not None:
+            end_frame = None if self.n_frames is None else self.start_frame + self.n_frames
+            value = self.source[name][..., self.start_frame:end_frame]
+        else:
+            with sync_profile.phase(f'feature:{name}'):
+                value = spec['compute'](self)
+
+        if self.window and spec['window_transform'] is not None:
+            value = spec['window_transform'](value)
+
+        self[name] = value
+        return value
+
+    def compute(self, names):
+        """
+        指定した特徴をまとめて計算する
+
+        Args:
+            names: 特徴名のリスト
+
+        Returns:
+            AudioFeatures: self
+        """
+        for name in names:
+            self[name]
+        return self
+
+def _normalize_mel_window(mel_spec_db):
+    # power_to_db(ref=np.max) と同じ正規化をウィンドウ単位で適用
+    return np.maximum(mel_spec_db - mel_spec_db.max(), -MEL_TOP_DB)
+
+def _blockwise(features):
+    # トラック全体の特徴をブロックごとに計算するか（低メモリモードのトラックのみ）
+    return features.low_memory and not features.window
+
+def _power_blocks(y, n_fft, hop_length, block_frames=FEATURE_BLOCK_FRAMES):
+    """
+    librosa.stft(center=True) と同じフレームのパワースペクトログラムをブロックごとに返す
+
+    入力区間・STFT・パワーのバッファはブロック間で再利用するため、
+    返したブロックは次のブロックに進む前に使い終えること
+
+    Args:
+        y: 波形
+        n_fft: FFT長
+        hop_length: ホップ長
+        block_frames: 1ブロックのフレーム数
+
+    Yields:
+        tuple: (開始フレーム, 終了フレーム, パワースペクトログラム（周波数ビン x フレーム）)
+    """
+    import librosa
+    n_frames = 1 + len(y) // hop_length
+    pad = n_fft // 2
+    segment_buffer = np.empty((block_frames - 1) * hop_length + n_fft, dtype=np.float32)
+    stft_buffer = np.empty((1 + n_fft // 2, block_frames), dtype=np.complex64)
+    power_buffer = np.empty((1 + n_fft // 2, block_frames), dtype=np.float32)
+
+    for start in range(0, n_frames, block_frames):
+        stop = min(n_frames, start + block_frames)
+        # 中心化したフレームが覆う区間（信号の外はゼロ、librosa の pad_mode='constant' と同じ）
+        lo = start * hop_length - pad
+        hi = (stop - 1) * hop_length - pad + n_fft
+        segment = segment_buffer[:hi - lo]
+        src_lo, src_hi = max(lo, 0), min(hi, len(y))
+        if src_lo > lo or src_hi < hi:
+            segment[:] = 0
+        segment[src_lo - lo:src_hi - lo] = y[src_lo:src_hi]
+
+        spec = librosa.stft(segment, n_fft=n_fft, hop_length=hop_length, center=False, out=stft_buffer)
+        power = np.abs(spec, out=power_buffer[:, :stop - start])
+        np.square(power, out=power)
+        yield start, stop, power
+
+def _blockwise_mel_power(features, fmax=None):
+    # melspectrogram(n_mels=128) と同じメルパワースペクトログラムをブロックごとに計算
+    import librosa
+    y, sr = features['raw'], features['sr']
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=features.n_fft, n_mels=128, fmax=fmax)
+    mel_power = np.empty((len(mel_basis), 1 + len(y) // features.hop_length), dtype=np.float32)
+    for start, stop, power in _power_blocks(y, features.n_fft, features.hop_length):
+        np.matmul(mel_basis, power, out=mel_power[:, start:stop])
+    return mel_power
+
+def _power_to_db_inplace(power, top_db=None):
+    # power_to_db(ref=1.0) を新しい配列を確保せずに適用
+    np.maximum(power, 1e-10, out=power)
+    np.log10(power, out=power)
+    power *= 10.0
+    if top_db is not None:
+        np.maximum(power, power.max() - top_db, out=power)
+    return power
+
+def _blockwise_chroma(features):
+    # chroma_stft と同じクロマ特徴をブロックごとに計算
+    # 1回目でチューニングを推定し（piptrack はフレーム単位なので候補を集めれば全体と同じ）、
+    # 2回目でクロマフィルタを適用する
+    import librosa
+    y, sr = features['raw'], features['sr']
+    n_fft, hop_length = features.n_fft, features.hop_length
+
+    pitches = []
+    magnitudes = []
+    for _start, _stop, power in _power_blocks(y, n_fft, hop_length):
+        pitch, mag = librosa.piptrack(S=power, sr=sr, n_fft=n_fft)
+        voiced = pitch > 0
+        pitches.append(pitch[voiced])
+        magnitudes.append(mag[voiced])
+    pitches = np.concatenate(pitches)
+    magnitudes = np.concatenate(magnitudes)
+    threshold = np.median(magnitudes) if len(magnitudes) else 0.0
+    tuning = librosa.pitch_tuning(pitches[magnitudes >= threshold], bins_per_octave=12)
+    del pitches, magnitudes
+
+    chroma_basis = librosa.filters.chroma(sr=sr, n_fft=n_fft, tuning=tuning, n_chroma=12)
+    chroma = np.empty((12, 1 + len(y) // hop_length), dtype=np.float32)
+    for start, stop, power in _power_blocks(y, n_fft, hop_length):
+        block = np.matmul(chroma_basis, power, out=chroma[:, start:stop])
+        chroma[:, start:stop] = librosa.util.normalize(block, norm=np.inf, axis=-2)
+    return chroma
+
+# 1. メルスペクトログラム（周波数特徴）
+# 絶対値のdBで計算し、ウィンドウごとに最大値で正規化する
+@register_feature('mel_spec', window_transform=_normalize_mel_window)
+def _feature_mel_spec(features):
+    import librosa
+    if _blockwise(features):
+        return _power_to_db_inplace(_blockwise_mel_power(features, fmax=8000))
+    mel_spec = librosa.feature.melspectrogram(y=features['raw'], sr=features['sr'], n_mels=128,
+                                              fmax=8000, n_fft=features.n_fft, hop_length=features.hop_length)
+    return librosa.power_to_db(mel_spec, ref=1.0, top_db=None)
+
+# 2. クロマ特徴（音楽的特徴、ピッチクラス）
+@register_feature('chroma')
+def _feature_chroma(features):
+    import librosa
+    if _blockwise(features):
+        return _blockwise_chroma(features)
+    return librosa.feature.chroma_stft(y=features['raw'], sr=features['sr'], n_fft=features.n_fft,
+                                       hop_length=features.hop_length)
+
+# 3. MFCC（音色特徴）
+@register_feature('mfcc')
+def _feature_mfcc(features):
+    import librosa
+    from scipy import fft as sp_fft
+    if _blockwise(features):
+        # dB変換の top_db はトラック全体の最大値が基準のため、メル帯域のdBを保持してからDCTする
+        mel_db = _power_to_db_inplace(_blockwise_mel_power(features), top_db=80.0)
+        mfcc = np.empty((13, mel_db.shape[1]), dtype=np.float32)
+        for start in range(0, mel_db.shape[1], FEATURE_BLOCK_FRAMES):
+            block = mel_db[:, start:start + FEATURE_BLOCK_FRAMES]
+            mfcc[:, start:start + FEATURE_BLOCK_FRAMES] = sp_fft.dct(block, axis=0, type=2, norm='ortho')[:13]
+        return mfcc
+    return librosa.feature.mfcc(y=features['raw'], sr=features['sr'], n_mfcc=13, n_fft=features.n_fft,
+                                hop_length=features.hop_length)
+
+# 4. スペクトル・コントラスト（音響パワー分布）
+@register_feature('contrast')
+def _feature_contrast(features):
+    import librosa
+    return librosa.feature.spectral_contrast(y=features['raw'], sr=features['sr'], n_fft=features.n_fft,
+                                             hop_length=features.hop_length)
+
+# 5. テンポとビート（ビート位置はウィンドウ基準のため切り出さずに計算）
+@register_feature('beat_track', framewise=False)
+def _feature_beat_track(features):
+    import librosa
+    return librosa.beat.beat_track(y=features['raw'], sr=features['sr'], hop_length=features.hop_length)
+
+@register_feature('tempo', framewise=False)
+def _feature_tempo(features):
+    return features['beat_track'][0]
+
+@register_feature('beats', framewise=False)
+def _feature_beats(features):
+    return features['beat_track'][1]
+
+# 6. ゼロ交差率（音声の時間的変化）
+@register_feature('zcr')
+def _feature_zcr(features):
+    import librosa
+    return librosa.feature.zero_crossing_rate(features['raw'], hop_length=features.hop_length)
+
+# 7. RMSエネルギー（音量）
+@register_feature('rms')
+def _feature_rms(features):
+    import librosa
+    return librosa.feature.rms(y=features['raw'], hop_length=features.hop_length)
+
+def extract_audio_features(audio_path, sr=22050, duration=5.0, offset=0.0, features=None):
     """
     音声ファイルから高度な音響特徴を抽出
 
+    特徴は FEATURE_REGISTRY に従って必要になった時点で計算される
+
     Args:
         audio_path: 音声ファイルのパス
         sr: サンプリングレート
         duration: 抽出する秒数
         offset: 開始オフセット（秒）
+        features: 先に計算しておく特徴名のリスト（Noneの場合はすべて遅延評価）
 
     Returns:
-        dict: 複数の音響特徴を含む辞書
+        AudioFeatures: 音響特徴の辞書
     """
-    # 音声を読み込み
-    y, sr = librosa.load(audio_path, sr=sr, duration=duration, offset=offset, mono=True)
+    # 音声を読み込み（16bit PCM の WAV はメモリマップから区間のみ変換）
+    y, sr = audio_io.load_audio(audio_path, sr=sr, offset=offset, duration=duration)
 
     if len(y) == 0:
         raise ValueError(f"No audio data found at offset {offset}")
 
-    # 1. メルスペクトログラム（周波数特徴）
-    mel_spec = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128, fmax=8000)
-    mel_spec_db = librosa.power_to_db(mel_spec, ref=np.max)
+    result = AudioFeatures(y, sr)
+    if features:
+        result.compute(features)
+    return result
+
+def _write_track_entry(track, features, path):
+    # 波形と特徴行列をメモリマップ可能な .npy として保存
+    np.save(os.path.join(path, 'raw.npy'), track['raw'])
+    for name in features:
+        np.save(os.path.join(path, f'{name}.npy'), track[name])
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'sr': track['sr'],
+            'hop_length': track['hop_length'],
+            'n_fft': track.n_fft,
+            'duration': track['duration'],
+            'features': list(features)
+        }, f)
+
+def _read_track_entry(path, low_memory=False):
+    # キャッシュエントリをメモリマップで読み込み、トラックを復元
+    # （キャッシュにない特徴は low_memory の設定で計算する）
+    with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    y = np.load(os.path.join(path, 'raw.npy'), mmap_mode='r')
+    track = AudioFeatures(y, meta['sr'], hop_length=meta['hop_length'], window=False, n_fft=meta['n_fft'],
+                          low_memory=low_memory)
+    track['hop_length'] = meta['hop_length']
+    track['duration'] = meta['duration']
+    for name in meta['features']:
+        track[name] = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+    return track
+
+def load_feature_track(audio_path, sr=22050, hop_length=DEFAULT_HOP_LENGTH, cache=None, features=None,
+                       n_fft=DEFAULT_N_FFT, low_memory=False):
+    """
+    音声ファイルを一度だけデコードし、トラック全体の音響特徴を固定ホップで計算
+
+    探索ではこのトラックを slice_features で切り出すだけなので、
+    候補オフセットごとのデコードと特徴抽出が不要になる。
+    特徴行列は初めて参照されたときにトラック全体で一度だけ計算される
 
-    # 2. クロマ特徴（音楽的特徴、ピッチクラス）
-    chroma = librosa.feature.chroma_stft(y=y, sr=sr)
+    cache を指定した場合、ファイルの識別情報（source_digest）・サンプリングレート・ホップ長・
+    特徴セットをキーとして波形と特徴行列をディスクに保存し、次回はデコードせずに
+    メモリマップで読み込む
 
-    # 3. MFCC（音色特徴）
-    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    Args:
+        audio_path: 音声ファイルのパス
+        sr: サンプリングレート
+        hop_length: 特徴フレームのホップ長（サンプル数）
+        cache: DiskCache（Noneの場合はキャッシュしない）
+        features: キャッシュに保存する特徴名（Noneの場合は 'combined' が使う特徴）
+        n_fft: スペクトル特徴のFFT長
+        low_memory: Trueの場合、音声をメモリマップせずに読み込み、スペクトル特徴を
+                    ブロックごとに計算する（STFT全体を保持しないため最大メモリが小さい）
 
-    # 4. スペクトル・コントラスト（音響パワー分布）
-    contrast = librosa.feature.spectral_contrast(y=y, sr=sr)
+    TRACK_MEMO_SIZE が正の場合、同じファイル（パス・サイズ・更新時刻が一致）の
+    トラックは計算済みの特徴ごとメモリ上で再利用される
 
-    # 5. テンポとビート
-    tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
+    Returns:
+        AudioFeatures: トラック全体の特徴（'hop_length'、'duration' を含む）
+    """
+    if features is None:
+        features = required_features('combined')
+    # キャッシュできるのはトラック全体で計算するフレーム単位の特徴のみ
+    features = sorted(name for name in features
+                      if name in FEATURE_REGISTRY and FEATURE_REGISTRY[name]['framewise'])
+
+    memo_key = None
+    if TRACK_MEMO_SIZE > 0:
+        memo_key = _track_memo_key(audio_path, sr, hop_length, n_fft, low_memory)
+        with _track_memo_lock:
+            track = _track_memo.get(memo_key)
+            if track is not None:
+                _track_memo.move_to_end(memo_key)
+                return track
+
+    track = _decode_feature_track(audio_path, sr, hop_length, n_fft, low_memory, cache, features)
+
+    if memo_key is not None:
+        remember_track(audio_path, track)
+
+    return track
+
+def _track_memo_key(audio_path, sr, hop_length, n_fft, low_memory):
+    # パス・サイズ・更新時刻が同じファイルは同じトラックとみなす
+    # （低メモリモードのトラックは波形をメモリマップせず、特徴もブロックごとに計算するため区別する）
+    stat = os.stat(audio_path)
+    return (os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns, sr, hop_length, n_fft, low_memory)
+
+def source_digest(audio_path):
+    """
+    キャッシュキーに使うファイルの識別情報（パス・サイズ・更新時刻と、先頭・末尾の内容のハッシュ）
 
-    # 6. ゼロ交差率（音声の時間的変化）
-    zcr = librosa.feature.zero_crossing_rate(y)
+    動画全体をハッシュすると同期のたびにファイル全体を読むことになるため、
+    読み込むのは先頭と末尾の DIGEST_EDGE_BYTES バイトずつに限る。
+    プロセス内ではファイルごとに一度だけ計算する
 
-    # 7. RMSエネルギー（音量）
-    rms = librosa.feature.rms(y=y)
+    Args:
+        audio_path: 音声ファイル（動画）のパス
 
-    return {
-        'raw': y,
-        'sr': sr,
-        'mel_spec': mel_spec_db,
-        'chroma': chroma,
-        'mfcc': mfcc,
-        'contrast': contrast,
-        'tempo': tempo,
-        'beats': beats,
-        'zcr': zcr,
-        'rms': rms
-    }
+    Returns:
+        str: 16進数のハッシュ値
+    """
+    stat = os.stat(audio_path)
+    memo_key = (os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns)
+    with _digest_memo_lock:
+        digest = _digest_memo.get(memo_key)
+        if digest is not None:
+            _digest_memo.move_to_end(memo_key)
+            return digest
+
+    with sync_profile.phase('digest'):
+        digest = hashlib.sha256(json.dumps(memo_key).encode('utf-8'))
+        with open(audio_path, 'rb') as f:
+            digest.update(f.read(DIGEST_EDGE_BYTES))
+            if stat.st_size > 2 * DIGEST_EDGE_BYTES:
+                f.seek(-DIGEST_EDGE_BYTES, os.SEEK_END)
+            digest.update(f.read(DIGEST_EDGE_BYTES))
+        digest = digest.hexdigest()
+
+    with _digest_memo_lock:
+        _digest_memo[memo_key] = digest
+        while len(_digest_memo) > DIGEST_MEMO_SIZE:
+            _digest_memo.popitem(last=False)
+    return digest
+
+def remember_track(audio_path, track):
+    """
+    計算済みのトラックをメモリ上のトラックに登録（TRACK_MEMO_SIZE が正の場合のみ有効）
+
+    Args:
+        audio_path: トラックの音声ファイル
+        track: load_feature_track の返り値
+    """
+    memo_key = _track_memo_key(audio_path, track['sr'], track['hop_length'], track.n_fft, track.low_memory)
+    with _track_memo_lock:
+        _track_memo[memo_key] = track
+        _track_memo.move_to_end(memo_key)
+        while len(_track_memo) > TRACK_MEMO_SIZE:
+            _track_memo.popitem(last=False)
+
+def _decode_feature_track(audio_path, sr, hop_length, n_fft, low_memory, cache, features):
+    # ディスクキャッシュを確認し、なければデコードしてトラックを作成
+    # （低メモリモードの特徴は通常と同じ値のため、キャッシュは共通）
+    if cache is not None:
+        key = make_key('feature_track', FEATURE_CACHE_VERSION, source_digest(audio_path),
+                       sr, hop_length, n_fft, features)
+        entry = cache.get(key)
+        if entry is not None:
+            print(f"  特徴キャッシュを使用: {os.path.basename(audio_path)}")
+            sync_profile.count('feature_cache_hits')
+            return _read_track_entry(entry, low_memory)
+        sync_profile.count('feature_cache_misses')
+
+    y, sr = audio_io.load_audio(audio_path, sr=sr, mmap=not low_memory)
+
+    if len(y) == 0:
+        raise ValueError(f"No audio data found in {audio_path}")
+
+    track = AudioFeatures(y, sr, hop_length=hop_length, window=False, n_fft=n_fft, low_memory=low_memory)
+    track['hop_length'] = hop_length
+    track['duration'] = len(y) / sr
+
+    if cache is not None:
+        track.compute(features)
+        cache.put(key, lambda path: _write_track_entry(track, features, path))
+
+    return track
+
+def slice_features(track, offset, duration):
+    """
+    load_feature_track のトラックから1ウィンドウ分の特徴を切り出す
+
+    返り値は extract_audio_features と同じ遅延評価の特徴辞書なので、
+    そのまま compute_feature_similarity に渡せる。
+    特徴フレームの位置はホップ単位に丸められる（22050Hz/512で約11.6ms以内）
+
+    Args:
+        track: load_feature_track の返り値
+        offset: 開始オフセット（秒）
+        duration: 切り出す秒数
+
+    Returns:
+        AudioFeatures: ウィンドウの音響特徴
+    """
+    sr = track['sr']
+    hop_length = track['hop_length']
+    start = int(round(offset * sr))
+
+    if start < 0 or start >= len(track['raw']):
+        raise ValueError(f"No audio data found at offset {offset}")
+
+    y = track['raw'][start:start + int(round(duration * sr))]
+
+    # librosaのセンタリングされたフレームと同じ本数を切り出す
+    return AudioFeatures(y, sr, hop_length=hop_length, source=track,
+                         start_frame=int(round(start / hop_length)),
+                         n_frames=1 + len(y) // hop_length,
+                         n_fft=track.n_fft, low_memory=track.low_memory)
+
+def _sum_of_products(a, b):
+    # 同じ形の配列の全要素の積和（平坦化のコピーを作らない）
+    axes = list(range(a.ndim))
+    return np.einsum(a, axes, b, axes, [])
+
+def _cosine_similarity(a, b):
+    # 平坦化して短い方に揃えたコサイン類似度
+    if a.shape == b.shape:
+        norm = np.sqrt(_sum_of_products(a, a) * _sum_of_products(b, b))
+        return _sum_of_products(a, b) / norm if norm > 0 else 0
+
+    # 形が異なる（トラック末尾で切れた）場合のみ平坦化して揃える
+    a_flat = np.ravel(a)
+    b_flat = np.ravel(b)
+    min_len = min(len(a_flat), len(b_flat))
+    a_flat = a_flat[:min_len]
+    b_flat = b_flat[:min_len]
+
+    dot_product = np.dot(a_flat, b_flat)
+    norm1 = np.linalg.norm(a_flat)
+    norm2 = np.linalg.norm(b_flat)
+    return dot_product / (norm1 * norm2) if (norm1 * norm2) > 0 else 0
+
+@register_similarity('raw', features=['raw'])
+def _similarity_raw(features1, features2):
+    # 生の波形で相互相関
+    from scipy.signal import correlate
+    corr = correlate(features1['raw'], features2['raw'], mode='valid')
+    max_corr = np.max(np.abs(corr))
+    norm = np.sqrt(np.dot(features1['raw'], features1['raw']) * np.dot(features2['raw'], features2['raw']))
+    return max_corr / norm if norm > 0 else 0
+
+@register_similarity('mel', features=['mel_spec'])
+def _similarity_mel(features1, features2):
+    # メルスペクトログラムの類似度（コサイン類似度）
+    return _cosine_similarity(features1['mel_spec'], features2['mel_spec'])
+
+@register_similarity('chroma', features=['chroma'])
+def _similarity_chroma(features1, features2):
+    # クロマ特徴の類似度
+    return _cosine_similarity(features1['chroma'], features2['chroma'])
+
+@register_similarity('mfcc', features=['mfcc'])
+def _similarity_mfcc(features1, features2):
+    # MFCC特徴の類似度
+    return _cosine_similarity(features1['mfcc'], features2['mfcc'])
 
 def compute_feature_similarity(features1, features2, method='combined'):
     """
     2つの音響特徴間の類似度を計算
 
+    各手法が必要とする特徴だけが参照されるため、遅延評価の特徴辞書では
+    使われない特徴は計算されない
+
     Args:
         features1, features2: 音響特徴の辞書
-        method: 'combined', 'mel', 'chroma', 'mfcc', 'raw'
+        method: 'combined' または SIMILARITY_REGISTRY の手法名（'mel', 'chroma', 'mfcc', 'raw'）
 
     Returns:
         float: 類似度スコア（0-1、高いほど類似）
     """
-    if method == 'raw' or method == 'combined':
-        # 生の波形で相互相関
-        corr = correlate(features1['raw'], features2['raw'], mode='valid')
-        max_corr = np.max(np.abs(corr))
-        norm = np.sqrt(np.sum(features1['raw']**2) * np.sum(features2['raw']**2))
-        raw_similarity = max_corr / norm if norm > 0 else 0
-
-    if method == 'mel' or method == 'combined':
-        # メルスペクトログラムの類似度（コサイン類似度）
-        mel1_flat = features1['mel_spec'].flatten()
-        mel2_flat = features2['mel_spec'].flatten()
-        min_len = min(len(mel1_flat), len(mel2_flat))
-        mel1_flat = mel1_flat[:min_len]
-        mel2_flat = mel2_flat[:min_len]
-
-        dot_product = np.dot(mel1_flat, mel2_flat)
-        norm1 = np.linalg.norm(mel1_flat)
-        norm2 = np.linalg.norm(mel2_flat)
-        mel_similarity = dot_product / (norm1 * norm2) if (norm1 * norm2) > 0 else 0
-
-    if method == 'chroma' or method == 'combined':
-        # クロマ特徴の類似度
-        chroma1_flat = features1['chroma'].flatten()
-        chroma2_flat = features2['chroma'].flatten()
-        min_len = min(len(chroma1_flat), len(chroma2_flat))
-        chroma1_flat = chroma1_flat[:min_len]
-        chroma2_flat = chroma2_flat[:min_len]
-
-        dot_product = np.dot(chroma1_flat, chroma2_flat)
-        norm1 = np.linalg.norm(chroma1_flat)
-        norm2 = np.linalg.norm(chroma2_flat)
-        chroma_similarity = dot_product / (norm1 * norm2) if (norm1 * norm2) > 0 else 0
-
-    if method == 'mfcc' or method == 'combined':
-        # MFCC特徴の類似度
-        mfcc1_flat = features1['mfcc'].flatten()
-        mfcc2_flat = features2['mfcc'].flatten()
-        min_len = min(len(mfcc1_flat), len(mfcc2_flat))
-        mfcc1_flat = mfcc1_flat[:min_len]
-        mfcc2_flat = mfcc2_flat[:min_len]
-
-        dot_product = np.dot(mfcc1_flat, mfcc2_flat)
-        norm1 = np.linalg.norm(mfcc1_flat)
-        norm2 = np.linalg.norm(mfcc2_flat)
-        mfcc_similarity = dot_product / (norm1 * norm2) if (norm1 * norm2) > 0 else 0
+    sync_profile.count('similarity_evaluations')
+    if method != 'combined':
+        return SIMILARITY_REGISTRY[method]['compute'](features1, features2)
 
     # 組み合わせスコア（重み付け平均）
+    combined_score = 0.0
+    for name, weight in COMBINED_WEIGHTS.items():
+        if weight:
+            combined_score += weight * SIMILARITY_REGISTRY[name]['compute'](features1, features2)
+    return combined_score
+
+# 一括スコア計算の作業バッファ（スレッドごとに確保して再利用）
+_scratch = threading.local()
+
+def _scratch_buffer(name, shape, dtype):
+    # name の作業バッファを shape の形で返す（容量が足りない場合のみ確保し直す）
+    size = int(np.prod(shape))
+    buffer = getattr(_scratch, name, None)
+    if buffer is None or buffer.size < size or buffer.dtype != dtype:
+        buffer = np.empty(size, dtype=dtype)
+        setattr(_scratch, name, buffer)
+    return buffer[:size].reshape(shape)
+
+def _batch_cosine(ref_matrix, matrix, start_frames, normalize=None):
+    # フレーム単位の特徴行列から候補ウィンドウを (候補数, 次元, フレーム数) のスタックに並べ、
+    # _cosine_similarity と同じく平坦化したベクトルのコサイン類似度を1回の行列ベクトル積で計算
+    # （開始フレームが同じ候補は1回だけ計算、スタックは作業バッファを再利用）
+    frames, inverse = np.unique(start_frames, return_inverse=True)
+    windows = sliding_window_view(matrix, ref_matrix.shape[-1], axis=-1).transpose(1, 0, 2)
+    stack = _scratch_buffer('stack', (len(frames),) + windows.shape[1:], matrix.dtype)
+    for i, frame in enumerate(frames):
+        # np.take やファンシーインデックスはストライドビュー全体や候補全体の一時配列を作るため1件ずつコピー
+        stack[i] = windows[frame]
+    if normalize is not None:
+        normalize(stack)
+
+    ref_flat = np.ravel(ref_matrix)
+    flat = stack.reshape(len(stack), -1)
+    dots = flat @ ref_flat
+    norms = np.sqrt(np.einsum('ij,ij->i', flat, flat) * np.dot(ref_flat, ref_flat))
+    scores = np.where(norms > 0, dots / np.where(norms > 0, norms, 1), 0.0)
+    return scores[inverse]
+
+def _normalize_mel_stack(stack):
+    # _normalize_mel_window をウィンドウごとに適用（in-place）
+    stack -= stack.max(axis=(1, 2), keepdims=True)
+    np.maximum(stack, -MEL_TOP_DB, out=stack)
+
+@register_batch_similarity('raw')
+def _batch_similarity_raw(features1, track, starts, frames):
+    # 候補ウィンドウの内積を求め、ノルムは累積和で計算する。候補の間隔が広い場合は
+    # 各ウィンドウのビューとの内積（重なったウィンドウの行列をコピーすると内積より遅い）、
+    # 密な場合は区間全体の相互相関をFFTで1回計算する
+    from scipy.signal import correlate
+    ref = features1['raw']
+    n = len(ref)
+    lo = int(starts.min())
+    segment = track['raw'][lo:int(starts.max()) + n]
+    index = starts - lo
+
+    if track.low_memory:
+        # 低メモリモード: float32 のまま各ウィンドウのビューで内積とノルムを計算（作業配列なし）
+        dots = np.array([np.dot(segment[i:i + n], ref) for i in index])
+        energy = np.array([np.dot(segment[i:i + n], segment[i:i + n]) for i in index])
+        norm = np.sqrt(np.dot(ref, ref) * energy)
+        return np.where(norm > 0, np.abs(dots) / np.where(norm > 0, norm, 1), 0.0)
+
+    fft_cost = 6 * len(segment) * np.log2(max(len(segment), 2))
+    if len(starts) * n <= fft_cost:
+        dots = np.array([np.dot(segment[i:i + n], ref) for i in index])
+    else:
+        dots = correlate(np.asarray(segment, dtype=np.float64), np.asarray(ref, dtype=np.float64),
+                         mode='valid', method='fft')[index]
+
+    cumsum_sq = np.concatenate(([0.0], np.cumsum(np.square(segment, dtype=np.float64))))
+    norm = np.sqrt(np.dot(ref, ref) * (cumsum_sq[index + n] - cumsum_sq[index]))
+    return np.where(norm > 0, np.abs(dots) / np.where(norm > 0, norm, 1), 0.0)
+
+@register_batch_similarity('mel')
+def _batch_similarity_mel(features1, track, starts, frames):
+    return _batch_cosine(features1['mel_spec'], track['mel_spec'], frames, normalize=_normalize_mel_stack)
+
+@register_batch_similarity('chroma')
+def _batch_similarity_chroma(features1, track, starts, frames):
+    return _batch_cosine(features1['chroma'], track['chroma'], frames)
+
+@register_batch_similarity('mfcc')
+def _batch_similarity_mfcc(features1, track, starts, frames):
+    return _batch_cosine(features1['mfcc'], track['mfcc'], frames)
+
+def compute_batch_similarity(ref_features, track, starts, duration, method='combined',
+                             chunk_size=BATCH_CHUNK_SIZE):
+    """
+    1つの参照ウィンドウと、トラック上の複数の候補ウィンドウの類似度を一括で計算
+
+    候補ごとに slice_features + compute_feature_similarity を呼ぶのと同じスコアを、
+    特徴行列のストライドビューに対する行列演算で求める（重みも 'combined' と同じ）。
+    トラックの末尾で切れる候補は1件ずつの計算に、範囲外の候補は 0 になる
+
+    Args:
+        ref_features: 参照ウィンドウの特徴（slice_features の返り値）
+        track: 候補を切り出すトラック（load_feature_track の返り値）
+        starts: 候補ウィンドウの開始サンプルの配列
+        duration: ウィンドウの長さ（秒）
+        method: 'combined' または SIMILARITY_REGISTRY の手法名
+        chunk_size: 一度に処理する候補数
+
+    Returns:
+        np.ndarray: 各候補の類似度スコア
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    scores = np.zeros(len(starts))
+    if len(starts) == 0:
+        return scores
+    sync_profile.count('batch_candidates', len(starts))
+
+    sr = track['sr']
+    hop_length = track['hop_length']
+    n_raw = len(track['raw'])
+    ref_len = len(ref_features['raw'])
+    n_frames = 1 + ref_len // hop_length
+    frames = np.rint(starts / hop_length).astype(np.int64)
+
     if method == 'combined':
-        # 各特徴量の重み（調整可能）
-        weights = {
-            'raw': 0.3,      # 波形相関
-            'mel': 0.3,      # メルスペクトログラム
-            'chroma': 0.2,   # クロマ特徴
-            'mfcc': 0.2      # MFCC
-        }
+        weights = {name: weight for name, weight in COMBINED_WEIGHTS.items() if weight}
+    else:
+        weights = {method: 1.0}
+
+    # 参照ウィンドウがトラック末尾で切れている場合は候補ごとの計算と結果が一致しないため一括計算しない
+    ref_full = all(
+        ref_features[name].shape[-1] == n_frames
+        for m in weights for name in SIMILARITY_REGISTRY[m]['features']
+        if name in FEATURE_REGISTRY and FEATURE_REGISTRY[name]['framewise']
+    )
+
+    window_len = int(round(duration * sr))
+    in_range = (starts >= 0) & (starts < n_raw)
+    full = (in_range & (np.minimum(window_len, n_raw - starts) == ref_len)
+            & (frames + n_frames <= 1 + n_raw // hop_length))
+    if not ref_full:
+        full[:] = False
+
+    for idx in np.flatnonzero(in_range & ~full):
+        try:
+            window = slice_features(track, starts[idx] / sr, duration)
+            scores[idx] = compute_feature_similarity(ref_features, window, method=method)
+        except Exception:
+            scores[idx] = 0
+
+    full_idx = np.flatnonzero(full)
+    for chunk_start in range(0, len(full_idx), chunk_size):
+        chunk = full_idx[chunk_start:chunk_start + chunk_size]
+        for name, weight in weights.items():
+            kernel = SIMILARITY_REGISTRY[name].get('batch')
+            if kernel is not None:
+                values = kernel(ref_features, track, starts[chunk], frames[chunk])
+            else:
+                values = [SIMILARITY_REGISTRY[name]['compute'](
+                    ref_features, slice_features(track, start / sr, duration)) for start in starts[chunk]]
+            scores[chunk] += weight * np.asarray(values, dtype=np.float64)
 
-        combined_score = (
-            weights['raw'] * raw_similarity +
-            weights['mel'] * mel_similarity +
-            weights['chroma'] * chroma_similarity +
-            weights['mfcc'] * mfcc_similarity
-        )
-        return combined_score
-    elif method == 'raw':
-        return raw_similarity
-    elif method == 'mel':
-        return mel_similarity
-    elif method == 'chroma':
-        return chroma_similarity
-    elif method == 'mfcc':
-        return mfcc_similarity
+    return scores
+
+def evaluate_quality(score):
+    """
+    類似度スコアから同期品質を評価
+
+    Args:
+        score: 類似度スコア（0-1）
+
+    Returns:
+        tuple: (品質, 品質の日本語表記)
+    """
+    if score > 0.8:
+        return "excellent", "優秀"
+    elif score > 0.6:
+        return "good", "良好"
+    elif score > 0.4:
+        return "fair", "普通"
+    else:
+        return "poor", "不良"
 
 def find_audio_offset_advanced(audio1_path, audio2_path, search_duration=30.0,
-                                sample_duration=5.0, max_offset=30.0, sr=22050):
+                                sample_duration=5.0, max_offset=30.0, sr=22050, cache=None, analysis=None):
     """
     高精度な音声オフセット検出（librosaベース）
 
@@ -167,6 +859,8 @@ def find_audio_offset_advanced(audio1_path, audio2_path, search_duration=30.0,
         sample_duration: 各サンプルの長さ（秒）
         max_offset: 最大オフセット範囲（秒）
         sr: サンプリングレート
+        cache: 特徴キャッシュ（DiskCache）
+        analysis: 特徴解析の設定（analysis_options の返り値）
 
     Returns:
         dict: オフセット情報と信頼度スコア
@@ -178,9 +872,14 @@ def find_audio_offset_advanced(audio1_path, audio2_path, search_duration=30.0,
     print(f"  サンプル長: {sample_duration}秒")
     print(f"  最大オフセット: ±{max_offset}秒")
 
-    # 参照音声から特徴を抽出（最初の部分）
-    print("\n参照音声から特徴を抽出中...")
-    ref_features = extract_audio_features(audio1_path, sr=sr, duration=sample_duration, offset=0)
+    # 両方の音声を一度だけデコードして特徴を計算
+    print("\n音声トラックの特徴を計算中...")
+    with sync_profile.phase('load_tracks'):
+        ref_track = load_feature_track(audio1_path, sr=sr, cache=cache, **(analysis or {}))
+        test_track = load_feature_track(audio2_path, sr=sr, cache=cache, **(analysis or {}))
+
+    # 参照音声から特徴を切り出す（最初の部分）
+    ref_features = slice_features(ref_track, 0, sample_duration)
 
     # 比較音声で最適なオフセットを探索
     print(f"\n比較音声から最適なオフセットを探索中（±{max_offset}秒）...")
@@ -188,22 +887,10 @@ def find_audio_offset_advanced(audio1_path, audio2_path, search_duration=30.0,
     # -max_offset から +max_offset まで0.1秒刻みで探索
     step = 0.1  # 探索ステップ（秒）
     offsets = np.arange(-max_offset, max_offset + step, step)
-    scores = []
-
-    for offset in offsets:
-        try:
-            # オフセット位置から特徴を抽出
-            test_features = extract_audio_features(audio2_path, sr=sr, duration=sample_duration, offset=max(0, offset))
-
-            # 類似度を計算
-            similarity = compute_feature_similarity(ref_features, test_features, method='combined')
-            scores.append(similarity)
-
-        except Exception as e:
-            # オフセットが範囲外の場合はスキップ
-            scores.append(0)
-
-    scores = np.array(scores)
+    # 全オフセットの類似度を一括で計算（範囲外のオフセットは0）
+    starts = np.rint(np.maximum(0, offsets) * sr).astype(np.int64)
+    with sync_profile.phase('search'):
+        scores = compute_batch_similarity(ref_features, test_track, starts, sample_duration)
 
     # 最大スコアのオフセットを見つける
     best_idx = np.argmax(scores)
@@ -214,18 +901,7 @@ def find_audio_offset_advanced(audio1_path, audio2_path, search_duration=30.0,
     print(f"信頼度スコア: {best_score:.4f}")
 
     # 信頼度の評価
-    if best_score > 0.8:
-        quality = "excellent"
-        quality_jp = "優秀"
-    elif best_score > 0.6:
-        quality = "good"
-        quality_jp = "良好"
-    elif best_score > 0.4:
-        quality = "fair"
-        quality_jp = "普通"
-    else:
-        quality = "poor"
-        quality_jp = "不良"
+    quality, quality_jp = evaluate_quality(best_score)
 
     print(f"同期品質: {quality_jp} ({quality})")
 
@@ -237,35 +913,105 @@ def find_audio_offset_advanced(audio1_path, audio2_path, search_duration=30.0,
         'method': 'librosa_advanced'
     }
 
-def multi_checkpoint_sync(audio1_path, audio2_path, video_duration,
-                          checkpoint_positions=[0.25, 0.5, 0.75],
-                          sample_duration=5.0, max_offset=30.0):
-    """
-    複数のチェックポイントで音声同期を検証
+# プロセスプールのワーカーが保持するトラック（参照, 比較）
+_worker_tracks = ()
 
-    動画全体をスキャンして、最も音声が一致する開始位置を見つける
+def _init_unit_worker(ref_track, test_track):
+    global _worker_tracks
+    _worker_tracks = (ref_track, test_track)
 
-    Args:
-        audio1_path: 参照音声ファイル
-        audio2_path: 比較音声ファイル
-        video_duration: 動画の長さ（秒）
-        checkpoint_positions: チェックポイント位置のリスト（0-1の比率）
-        sample_duration: 各チェックポイントのサンプル長（秒）
-        max_offset: 最大オフセット範囲（秒）
+def _call_unit(func, args):
+    return func(*_worker_tracks, *args)
 
-    Returns:
-        dict: 総合的な同期情報
+class _UnitRunner:
     """
-    print(f"\n=== 動画全体スキャン音声同期 ===")
-    print(f"動画の長さ: {video_duration:.2f}秒")
-    print(f"最大オフセット範囲: ±{max_offset}秒")
+    2つのトラックを共有する独立した作業単位を直列・スレッド・プロセスで実行
 
-    # 複数のスキャン位置を試して、最も信頼性の高い結果を採用
-    print(f"\n--- フェーズ1: マルチポジション全体スキャン ---")
+    結果は常に入力順に返すため、並列実行しても直列実行と同じ結果になる
+    """
+
+    def __init__(self, ref_track, test_track, workers=1, executor='thread'):
+        self.tracks = (ref_track, test_track)
+        self.workers = max(1, workers or 1)
+        self.process = executor == 'process'
+        self._pool = None
+
+        if self.workers > 1:
+            from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+            if self.process:
+                self._pool = ProcessPoolExecutor(self.workers, initializer=_init_unit_worker,
+                                                 initargs=self.tracks)
+            else:
+                self._pool = ThreadPoolExecutor(self.workers)
+
+    def map(self, func, arg_list):
+        arg_list = list(arg_list)
+        if self._pool is None:
+            return [func(*self.tracks, *args) for args in arg_list]
+        if self.process:
+            return list(self._pool.map(_call_unit, [func] * len(arg_list), arg_list))
+        return list(self._pool.map(lambda args: func(*self.tracks, *args), arg_list))
+
+    def split(self, values):
+        # 配列をワーカー数の連続したチャンクに分割
+        return [chunk for chunk in np.array_split(values, self.workers) if len(chunk)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+def _score_offsets(ref_track, test_track, ref_offset, duration, offsets, video_duration):
+    # ref_offset のウィンドウと、比較音声の ref_offset + offset のウィンドウの類似度
+    ref_features = slice_features(ref_track, ref_offset, duration)
+    test_offsets = ref_offset + np.asarray(offsets)
+    valid = (test_offsets >= 0) & (test_offsets <= video_duration - duration)
+
+    scores = np.zeros(len(test_offsets))
+    starts = np.rint(test_offsets[valid] * test_track['sr']).astype(np.int64)
+    scores[valid] = compute_batch_similarity(ref_features, test_track, starts, duration)
+    return scores
+
+def _verify_checkpoint(ref_track, test_track, position, offset, sample_duration, video_duration):
+    # 検出したオフセットを1つのチェックポイントで検証
+    checkpoint_time = video_duration * position
+    result = {
+        'position': position,
+        'position_name': f"{int(position * 100)}%地点",
+        'time': checkpoint_time,
+        'offset': float(offset)
+    }
+
+    try:
+        # 参照音声の特徴を抽出
+        ref_features = slice_features(ref_track, checkpoint_time, sample_duration)
+
+        # 検出したオフセットを適用した位置の音声と比較
+        test_offset = checkpoint_time + offset
+        if test_offset < 0 or test_offset > video_duration - sample_duration:
+            result.update(confidence=0.0, quality='out_of_range', quality_jp='範囲外')
+            return result
+
+        test_features = slice_features(test_track, test_offset, sample_duration)
+
+        # 類似度を計算
+        similarity = compute_feature_similarity(ref_features, test_features, method='combined')
+
+        # 信頼度評価
+        quality, quality_jp = evaluate_quality(similarity)
+        result.update(confidence=float(similarity), quality=quality, quality_jp=quality_jp)
+
+    except Exception as e:
+        result.update(confidence=0.0, quality='error', quality_jp='エラー', error=str(e))
+
+    return result
+
+def _scan_layout(video_duration):
+    # スキャン長と3つのスキャン位置（開始後、中盤、終了前）
     scan_duration = min(15.0, video_duration * 0.15)  # 動画の15%または15秒（長めに）
 
-    # 3つのスキャン位置を試す（開始後、中盤、終了前）
-    scan_positions = []
     if video_duration > 40:
         # 長い動画の場合、20秒、中盤、終了20秒前
         scan_positions = [
@@ -281,187 +1027,38 @@ def multi_checkpoint_sync(audio1_path, audio2_path, video_duration,
             min(video_duration - scan_duration - 5.0, video_duration * 0.75)
         ]
 
-    print(f"スキャン長: {scan_duration:.1f}秒")
-    print(f"スキャン位置: {[f'{p:.1f}秒' for p in scan_positions]}")
-
-    # 各スキャン位置で最良のオフセットを検出
-    all_position_results = []
-
-    for scan_idx, scan_offset in enumerate(scan_positions):
-        print(f"\n  スキャン位置 {scan_idx+1}/{len(scan_positions)}: {scan_offset:.1f}秒")
-
-        ref_features = extract_audio_features(audio1_path, sr=22050, duration=scan_duration, offset=scan_offset)
-
-        # -max_offset から +max_offset まで1秒刻みで粗い探索
-        coarse_step = 1.0
-        coarse_offsets = np.arange(-max_offset, max_offset + coarse_step, coarse_step)
-        coarse_scores = []
-
-        for offset in coarse_offsets:
-            test_offset = scan_offset + offset
-            if test_offset < 0 or test_offset > video_duration - scan_duration:
-                coarse_scores.append(0)
-                continue
-
-            try:
-                test_features = extract_audio_features(audio2_path, sr=22050, duration=scan_duration, offset=test_offset)
-                similarity = compute_feature_similarity(ref_features, test_features, method='combined')
-                coarse_scores.append(similarity)
-            except:
-                coarse_scores.append(0)
-
-        coarse_scores = np.array(coarse_scores)
-        best_idx = np.argmax(coarse_scores)
-        best_offset_for_position = coarse_offsets[best_idx]
-        best_score_for_position = coarse_scores[best_idx]
-
-        # トップ5の結果を記録
-        top5_indices = np.argsort(coarse_scores)[-5:][::-1]
-        print(f"    トップ5スコア:")
-        for rank, idx in enumerate(top5_indices, 1):
-            print(f"      {rank}. オフセット={coarse_offsets[idx]:+.1f}秒, スコア={coarse_scores[idx]:.4f}")
-
-        all_position_results.append({
-            'scan_offset': scan_offset,
-            'best_offset': best_offset_for_position,
-            'best_score': best_score_for_position,
-            'all_scores': coarse_scores.copy()
-        })
-
-    # 最もスコアが高かった位置の結果を採用
-    best_position_idx = np.argmax([r['best_score'] for r in all_position_results])
-    best_position_result = all_position_results[best_position_idx]
-    best_coarse_offset = best_position_result['best_offset']
-    best_coarse_score = best_position_result['best_score']
-
-    print(f"\n  最良スキャン位置: {best_position_result['scan_offset']:.1f}秒")
-    print(f"  粗い探索結果: オフセット={best_coarse_offset:.1f}秒, スコア={best_coarse_score:.4f}")
-
-    # スコア分布を確認
-    scores_mean = best_position_result['all_scores'].mean()
-    scores_std = best_position_result['all_scores'].std()
-    score_range = best_position_result['all_scores'].max() - best_position_result['all_scores'].min()
-    print(f"  スコア統計: 平均={scores_mean:.4f}, 標準偏差={scores_std:.4f}, 範囲={score_range:.4f}")
-
-    if score_range < 0.1:
-        print(f"  ⚠️ 警告: スコアの差が小さいため、検出精度が低い可能性があります")
-
-    # 最良のオフセット周辺を0.1秒刻みで細かく探索
-    print(f"\n--- フェーズ2: 細かい探索（±5秒範囲） ---")
-    fine_step = 0.1
-    fine_range = 5.0
-    fine_offsets = np.arange(best_coarse_offset - fine_range, best_coarse_offset + fine_range + fine_step, fine_step)
-    fine_scores = []
-
-    # 最良スキャン位置で細かい探索を実行
-    best_scan_offset = best_position_result['scan_offset']
-    ref_features = extract_audio_features(audio1_path, sr=22050, duration=scan_duration, offset=best_scan_offset)
-
-    for offset in fine_offsets:
-        test_offset = best_scan_offset + offset
-        if test_offset < 0 or test_offset > video_duration - scan_duration:
-            fine_scores.append(0)
-            continue
-
-        try:
-            test_features = extract_audio_features(audio2_path, sr=22050, duration=scan_duration, offset=test_offset)
-            similarity = compute_feature_similarity(ref_features, test_features, method='combined')
-            fine_scores.append(similarity)
-        except:
-            fine_scores.append(0)
-
-    fine_scores = np.array(fine_scores)
-    best_fine_idx = np.argmax(fine_scores)
-    best_offset = fine_offsets[best_fine_idx]
-    best_score = fine_scores[best_fine_idx]
-
-    print(f"細かい探索結果: オフセット={best_offset:.3f}秒, スコア={best_score:.4f}")
-
-    # 細かい探索のトップ5も表示
-    top5_fine_indices = np.argsort(fine_scores)[-5:][::-1]
-    print(f"  トップ5スコア:")
-    for rank, idx in enumerate(top5_fine_indices, 1):
-        print(f"    {rank}. オフセット={fine_offsets[idx]:+.3f}秒, スコア={fine_scores[idx]:.4f}")
+    return scan_duration, scan_positions
 
-    # フェーズ3: 検出したオフセットをチェックポイントで検証
-    print(f"\n--- フェーズ3: チェックポイント検証（オフセット={best_offset:.3f}秒） ---")
+def _verify_checkpoints(runner, checkpoint_positions, offset, sample_duration, video_duration):
+    # 検出したオフセットを全チェックポイントで検証してログを出力
+    print(f"\n--- フェーズ3: チェックポイント検証（オフセット={offset:.3f}秒） ---")
     print(f"チェックポイント数: {len(checkpoint_positions)}")
 
-    checkpoint_results = []
-
-    for i, position in enumerate(checkpoint_positions):
-        checkpoint_time = video_duration * position
-        checkpoint_name = f"{int(position * 100)}%地点"
-
-        print(f"\nチェックポイント {i+1}/{len(checkpoint_positions)}: {checkpoint_name} ({checkpoint_time:.2f}秒)")
+    with sync_profile.phase('checkpoint_verification'):
+        checkpoint_results = runner.map(_verify_checkpoint, [
+            (position, offset, sample_duration, video_duration)
+            for position in checkpoint_positions
+        ])
+
+    for i, result in enumerate(checkpoint_results):
+        print(f"\nチェックポイント {i+1}/{len(checkpoint_positions)}: {result['position_name']} ({result['time']:.2f}秒)")
+        if result['quality'] == 'out_of_range':
+            print(f"  警告: オフセット位置が範囲外 ({result['time'] + offset:.2f}秒)")
+        elif result['quality'] == 'error':
+            print(f"  エラー: {result['error']}")
+        else:
+            print(f"  信頼度: {result['confidence']:.4f} ({result['quality_jp']})")
 
-        try:
-            # 参照音声の特徴を抽出
-            ref_features = extract_audio_features(audio1_path, sr=22050,
-                                                   duration=sample_duration,
-                                                   offset=checkpoint_time)
-
-            # 検出したオフセットを適用した位置の音声と比較
-            test_offset = checkpoint_time + best_offset
-            if test_offset < 0 or test_offset > video_duration - sample_duration:
-                print(f"  警告: オフセット位置が範囲外 ({test_offset:.2f}秒)")
-                checkpoint_results.append({
-                    'position': position,
-                    'position_name': checkpoint_name,
-                    'time': checkpoint_time,
-                    'offset': float(best_offset),
-                    'confidence': 0.0,
-                    'quality': 'out_of_range',
-                    'quality_jp': '範囲外'
-                })
-                continue
+    return checkpoint_results
 
-            test_features = extract_audio_features(audio2_path, sr=22050,
-                                                    duration=sample_duration,
-                                                    offset=test_offset)
-
-            # 類似度を計算
-            similarity = compute_feature_similarity(ref_features, test_features, method='combined')
-
-            # 信頼度評価
-            if similarity > 0.8:
-                quality = "excellent"
-                quality_jp = "優秀"
-            elif similarity > 0.6:
-                quality = "good"
-                quality_jp = "良好"
-            elif similarity > 0.4:
-                quality = "fair"
-                quality_jp = "普通"
-            else:
-                quality = "poor"
-                quality_jp = "不良"
-
-            print(f"  信頼度: {similarity:.4f} ({quality_jp})")
-
-            checkpoint_results.append({
-                'position': position,
-                'position_name': checkpoint_name,
-                'time': checkpoint_time,
-                'offset': float(best_offset),
-                'confidence': float(similarity),
-                'quality': quality,
-                'quality_jp': quality_jp
-            })
-
-        except Exception as e:
-            print(f"  エラー: {str(e)}")
-            checkpoint_results.append({
-                'position': position,
-                'position_name': checkpoint_name,
-                'time': checkpoint_time,
-                'offset': float(best_offset),
-                'confidence': 0.0,
-                'quality': 'error',
-                'quality_jp': 'エラー',
-                'error': str(e)
-            })
+def _checkpoint_confidence(best_score, checkpoint_results):
+    # 全体スキャンのスコアとチェックポイントの平均信頼度の平均（検証していない場合はスキャンのスコア）
+    if not checkpoint_results:
+        return best_score
+    avg_checkpoint_confidence = sum(r['confidence'] for r in checkpoint_results) / len(checkpoint_results)
+    return (best_score + avg_checkpoint_confidence) / 2.0
 
+def _combine_checkpoint_result(best_offset, best_score, checkpoint_results, method):
     # チェックポイントの平均信頼度を計算
     total_confidence = sum(r['confidence'] for r in checkpoint_results)
     avg_checkpoint_confidence = total_confidence / len(checkpoint_results) if checkpoint_results else 0.0
@@ -469,7 +1066,7 @@ def multi_checkpoint_sync(audio1_path, audio2_path, video_duration,
     # 全体スキャンの結果と、チェックポイント検証の結果を組み合わせ
     # 全体スキャンで見つけたオフセットを使用し、チェックポイントの平均信頼度と組み合わせる
     final_offset = best_offset
-    final_confidence = (best_score + avg_checkpoint_confidence) / 2.0  # 両方のスコアの平均
+    final_confidence = _checkpoint_confidence(best_score, checkpoint_results)
 
     print(f"\n=== 総合結果 ===")
     print(f"検出オフセット: {final_offset:.3f}秒")
@@ -478,18 +1075,7 @@ def multi_checkpoint_sync(audio1_path, audio2_path, video_duration,
     print(f"総合信頼度: {final_confidence:.4f}")
 
     # 総合品質評価
-    if final_confidence > 0.8:
-        overall_quality = "excellent"
-        overall_quality_jp = "優秀"
-    elif final_confidence > 0.6:
-        overall_quality = "good"
-        overall_quality_jp = "良好"
-    elif final_confidence > 0.4:
-        overall_quality = "fair"
-        overall_quality_jp = "普通"
-    else:
-        overall_quality = "poor"
-        overall_quality_jp = "不良"
+    overall_quality, overall_quality_jp = evaluate_quality(final_confidence)
 
     print(f"総合品質: {overall_quality_jp} ({overall_quality})")
 
@@ -501,50 +1087,1426 @@ def multi_checkpoint_sync(audio1_path, audio2_path, video_duration,
         'scan_score': float(best_score),
         'verification_score': float(avg_checkpoint_confidence),
         'checkpoints': checkpoint_results,
-        'method': 'full_scan_librosa'
+        'method': method
     }
 
-if __name__ == '__main__':
-    if len(sys.argv) < 4:
-        print("Usage: python audio_sync_advanced.py <audio1> <audio2> <video_duration> [mode]", file=sys.stderr)
-        print("  mode: 'simple' (default) or 'multi_checkpoint'", file=sys.stderr)
-        sys.exit(1)
-
-    audio1_path = sys.argv[1]
-    audio2_path = sys.argv[2]
+def multi_checkpoint_sync(audio1_path, audio2_path, video_duration,
+                          checkpoint_positions=[0.25, 0.5, 0.75],
+                          sample_duration=5.0, max_offset=30.0, cache=None,
+                          workers=1, executor='thread', time_budget=None, target_confidence=None,
+                          analysis=None):
+    """
+    複数のチェックポイントで音声同期を検証
 
-    try:
-        video_duration = float(sys.argv[3])
-    except ValueError as e:
-        print(f"Error: Invalid video_duration '{sys.argv[3]}': {e}", file=sys.stderr)
-        sys.exit(1)
+    動画全体をスキャンして、最も音声が一致する開始位置を見つける
 
-    mode = sys.argv[4] if len(sys.argv) > 4 else 'simple'
+    スキャン位置・細かい探索・チェックポイントはそれぞれ独立した作業単位として
+    workers 個のワーカーに分散できる（結果は直列実行と同じ）
 
-    # 入力ファイルの存在確認
-    import os
-    if not os.path.exists(audio1_path):
-        print(f"Error: Audio file 1 not found: {audio1_path}", file=sys.stderr)
-        sys.exit(1)
-    if not os.path.exists(audio2_path):
-        print(f"Error: Audio file 2 not found: {audio2_path}", file=sys.stderr)
-        sys.exit(1)
+    Args:
+        audio1_path: 参照音声ファイル
+        audio2_path: 比較音声ファイル
+        video_duration: 動画の長さ（秒）
+        checkpoint_positions: チェックポイント位置のリスト（0-1の比率）
+        sample_duration: 各チェックポイントのサンプル長（秒）
+        max_offset: 最大オフセット範囲（秒）
+        cache: 特徴キャッシュ（DiskCache）
+        workers: 並列実行するワーカー数（1の場合は直列）
+        executor: 'thread'（numpy/BLASはGILを解放する）または 'process'
+        time_budget: 時間制限（秒、デコードと特徴計算を含む）。超えた場合は最良の途中結果を
+                     'budget_exhausted': True で返す
+        target_confidence: この総合信頼度を検証できた時点で探索を終了する（'early_exit': True）
+        analysis: 特徴解析の設定（analysis_options の返り値）
 
-    try:
-        if mode == 'multi_checkpoint':
-            result = multi_checkpoint_sync(
-                audio1_path, audio2_path, video_duration,
-                checkpoint_positions=[0.25, 0.5, 0.75],
-                sample_duration=5.0,
-                max_offset=30.0
-            )
-        else:
-            result = find_audio_offset_advanced(
-                audio1_path, audio2_path,
-                search_duration=30.0,
-                sample_duration=5.0,
-                max_offset=30.0
-            )
+    Returns:
+        dict: 総合的な同期情報
+    """
+    started = time.perf_counter()
+    print(f"\n=== 動画全体スキャン音声同期 ===")
+    print(f"動画の長さ: {video_duration:.2f}秒")
+    print(f"最大オフセット範囲: ±{max_offset}秒")
+
+    # 複数のスキャン位置を試して、最も信頼性の高い結果を採用
+    print(f"\n--- フェーズ1: マルチポジション全体スキャン ---")
+    scan_duration, scan_positions = _scan_layout(video_duration)
+
+    print(f"スキャン長: {scan_duration:.1f}秒")
+    print(f"スキャン位置: {[f'{p:.1f}秒' for p in scan_positions]}")
+
+    # 両方の音声を一度だけデコードし、以降はトラックから切り出して比較
+    print(f"\n音声トラックの特徴を計算中...")
+    with sync_profile.phase('load_tracks'):
+        ref_track = load_feature_track(audio1_path, sr=22050, cache=cache, **(analysis or {}))
+        test_track = load_feature_track(audio2_path, sr=22050, cache=cache, **(analysis or {}))
+
+        # 並列実行前にトラック全体の特徴を計算しておく（各特徴は一度だけ計算される）
+        ref_track.compute(required_features('combined'))
+        test_track.compute(required_features('combined'))
+
+    with _UnitRunner(ref_track, test_track, workers=workers, executor=executor) as runner:
+        if time_budget is None and target_confidence is None:
+            return _multi_checkpoint_search(runner, scan_positions, scan_duration, checkpoint_positions,
+                                            sample_duration, max_offset, video_duration)
+
+        deadline = None if time_budget is None else started + time_budget
+        return _anytime_checkpoint_search(runner, scan_positions, scan_duration, checkpoint_positions,
+                                          sample_duration, max_offset, video_duration,
+                                          deadline=deadline, target_confidence=target_confidence)
+
+def _report_position(scan_idx, n_positions, scan_offset, coarse_offsets, coarse_scores):
+    # 1つのスキャン位置の粗い探索結果を記録してログを出力
+    print(f"\n  スキャン位置 {scan_idx+1}/{n_positions}: {scan_offset:.1f}秒")
+
+    best_idx = np.argmax(coarse_scores)
+    best_offset_for_position = coarse_offsets[best_idx]
+    best_score_for_position = coarse_scores[best_idx]
+
+    # トップ5の結果を記録
+    top5_indices = np.argsort(coarse_scores)[-5:][::-1]
+    print(f"    トップ5スコア:")
+    for rank, idx in enumerate(top5_indices, 1):
+        print(f"      {rank}. オフセット={coarse_offsets[idx]:+.1f}秒, スコア={coarse_scores[idx]:.4f}")
+
+    return {
+        'scan_offset': scan_offset,
+        'best_offset': best_offset_for_position,
+        'best_score': best_score_for_position,
+        'all_scores': coarse_scores.copy()
+    }
+
+def _fine_search(runner, position_result, scan_duration, video_duration):
+    # 粗い探索の最良オフセット周辺を0.1秒刻みで細かく探索（オフセットをワーカー数に分割）
+    best_coarse_offset = position_result['best_offset']
+    print(f"\n--- フェーズ2: 細かい探索（±5秒範囲） ---")
+    fine_step = 0.1
+    fine_range = 5.0
+    fine_offsets = np.arange(best_coarse_offset - fine_range, best_coarse_offset + fine_range + fine_step, fine_step)
+
+    with sync_profile.phase('fine_search'):
+        fine_scores = np.concatenate(runner.map(_score_offsets, [
+            (position_result['scan_offset'], scan_duration, chunk, video_duration)
+            for chunk in runner.split(fine_offsets)
+        ]))
+    best_fine_idx = np.argmax(fine_scores)
+    best_offset = fine_offsets[best_fine_idx]
+    best_score = fine_scores[best_fine_idx]
+
+    print(f"細かい探索結果: オフセット={best_offset:.3f}秒, スコア={best_score:.4f}")
+
+    # 細かい探索のトップ5も表示
+    top5_fine_indices = np.argsort(fine_scores)[-5:][::-1]
+    print(f"  トップ5スコア:")
+    for rank, idx in enumerate(top5_fine_indices, 1):
+        print(f"    {rank}. オフセット={fine_offsets[idx]:+.3f}秒, スコア={fine_scores[idx]:.4f}")
+
+    return best_offset, best_score
+
+def _multi_checkpoint_search(runner, scan_positions, scan_duration, checkpoint_positions,
+                             sample_duration, max_offset, video_duration):
+    # multi_checkpoint_sync のフェーズ1〜3（作業単位は runner で実行）
+
+    # -max_offset から +max_offset まで1秒刻みで粗い探索
+    coarse_step = 1.0
+    coarse_offsets = np.arange(-max_offset, max_offset + coarse_step, coarse_step)
+
+    # 各スキャン位置で最良のオフセットを検出
+    with sync_profile.phase('coarse_scan'):
+        position_scores = runner.map(_score_offsets, [
+            (scan_offset, scan_duration, coarse_offsets, video_duration)
+            for scan_offset in scan_positions
+        ])
+
+    all_position_results = [
+        _report_position(scan_idx, len(scan_positions), scan_offset, coarse_offsets, coarse_scores)
+        for scan_idx, (scan_offset, coarse_scores) in enumerate(zip(scan_positions, position_scores))
+    ]
+
+    # 最もスコアが高かった位置の結果を採用
+    best_position_idx = np.argmax([r['best_score'] for r in all_position_results])
+    best_position_result = all_position_results[best_position_idx]
+    best_coarse_offset = best_position_result['best_offset']
+    best_coarse_score = best_position_result['best_score']
+
+    print(f"\n  最良スキャン位置: {best_position_result['scan_offset']:.1f}秒")
+    print(f"  粗い探索結果: オフセット={best_coarse_offset:.1f}秒, スコア={best_coarse_score:.4f}")
+
+    # スコア分布を確認
+    scores_mean = best_position_result['all_scores'].mean()
+    scores_std = best_position_result['all_scores'].std()
+    score_range = best_position_result['all_scores'].max() - best_position_result['all_scores'].min()
+    print(f"  スコア統計: 平均={scores_mean:.4f}, 標準偏差={scores_std:.4f}, 範囲={score_range:.4f}")
+
+    if score_range < 0.1:
+        print(f"  ⚠️ 警告: スコアの差が小さいため、検出精度が低い可能性があります")
+
+    # 最良スキャン位置で細かい探索を実行
+    best_offset, best_score = _fine_search(runner, best_position_result, scan_duration, video_duration)
+
+    # フェーズ3: 検出したオフセットをチェックポイントで検証
+    checkpoint_results = _verify_checkpoints(runner, checkpoint_positions, best_offset,
+                                             sample_duration, video_duration)
+
+    return _combine_checkpoint_result(best_offset, best_score, checkpoint_results, 'full_scan_librosa')
+
+def _anytime_checkpoint_search(runner, scan_positions, scan_duration, checkpoint_positions,
+                               sample_duration, max_offset, video_duration,
+                               deadline=None, target_confidence=None):
+    """
+    時間制限と目標信頼度つきの multi_checkpoint 探索
+
+    スキャン位置を中盤から順に（端に近い位置はオフセットが範囲外になりやすい）runner の
+    ワーカー数ずつまとめて粗い探索し、最良の粗いスコアが更新された場合はその位置で細かい探索と
+    チェックポイント検証まで進める。総合信頼度が target_confidence 以上になった時点で終了し、
+    deadline を過ぎた場合はその時点で最良の結果を返す（どちらもまとめた探索の間で判定する）。
+    粗いスコアが同じ位置はスキャン位置の順で先の位置を採用するため、どちらにも達しなかった
+    場合の結果は _multi_checkpoint_search と同じ
+
+    Args:
+        runner: _UnitRunner
+        scan_positions: スキャン位置のリスト（秒）
+        scan_duration: スキャン長（秒）
+        checkpoint_positions: チェックポイント位置のリスト（0-1の比率）
+        sample_duration: 各チェックポイントのサンプル長（秒）
+        max_offset: 最大オフセット範囲（秒）
+        video_duration: 動画の長さ（秒）
+        deadline: time.perf_counter() の締め切り（Noneの場合は制限なし）
+        target_confidence: 早期終了する総合信頼度（Noneの場合は早期終了しない）
+
+    Returns:
+        dict: 総合的な同期情報（'early_exit'、'budget_exhausted'、'positions_evaluated' を含む）
+    """
+    coarse_step = 1.0
+    coarse_offsets = np.arange(-max_offset, max_offset + coarse_step, coarse_step)
+
+    def out_of_time():
+        return deadline is not None and time.perf_counter() >= deadline
+
+    order = sorted(range(len(scan_positions)), key=lambda i: abs(scan_positions[i] - video_duration / 2))
+    best_position = None
+    best = None  # 最良位置の {'offset', 'score', 'checkpoints'}
+    early_exit = False
+    budget_exhausted = False
+    evaluated = 0
+
+    for wave_start in range(0, len(order), runner.workers):
+        if evaluated and out_of_time():
+            budget_exhausted = True
+            break
+
+        wave = order[wave_start:wave_start + runner.workers]
+        with sync_profile.phase('coarse_scan'):
+            wave_scores = runner.map(_score_offsets, [
+                (scan_positions[scan_idx], scan_duration, coarse_offsets, video_duration)
+                for scan_idx in wave
+            ])
+        evaluated += len(wave)
+
+        # 最良の粗いスコアが更新された場合のみ細かい探索と検証を行う
+        # （同じスコアはスキャン位置の順で先の位置を採用し、np.argmax と同じ位置を選ぶ）
+        improved = False
+        for scan_idx, coarse_scores in zip(wave, wave_scores):
+            position_result = _report_position(scan_idx, len(scan_positions), scan_positions[scan_idx],
+                                               coarse_offsets, coarse_scores)
+            if (best_position is None or position_result['best_score'] > best_position['best_score']
+                    or (position_result['best_score'] == best_position['best_score']
+                        and scan_idx < best_position['scan_idx'])):
+                best_position = dict(position_result, scan_idx=scan_idx)
+                improved = True
+        if not improved:
+            continue
+
+        if out_of_time():
+            budget_exhausted = True
+            best = {'offset': best_position['best_offset'], 'score': best_position['best_score'],
+                    'checkpoints': []}
+            break
+
+        offset, score = _fine_search(runner, best_position, scan_duration, video_duration)
+        best = {'offset': offset, 'score': score, 'checkpoints': []}
+
+        if out_of_time():
+            budget_exhausted = True
+            break
+
+        best['checkpoints'] = _verify_checkpoints(runner, checkpoint_positions, offset,
+                                                  sample_duration, video_duration)
+        confidence = _checkpoint_confidence(score, best['checkpoints'])
+        if target_confidence is not None and confidence >= target_confidence:
+            print(f"\n  目標信頼度 {target_confidence:.2f} に到達（{confidence:.4f}）、探索を終了します")
+            early_exit = True
+            break
+
+    if budget_exhausted:
+        print(f"\n  ⚠️ 時間制限に達したため、それまでの最良の結果を返します")
+
+    result = _combine_checkpoint_result(best['offset'], best['score'], best['checkpoints'],
+                                        'full_scan_librosa')
+    result.update(early_exit=early_exit, budget_exhausted=budget_exhausted,
+                  positions_evaluated=evaluated)
+    return result
+
+def compute_gcc_phat(y1, y2, max_lag, phat=True):
+    """
+    FFTによる全ラグ相互相関（GCC-PHAT）
+
+    r[k] = Σ y1[n] * y2[n + k] を ±max_lag の範囲で一度に計算する
+
+    Args:
+        y1: 参照波形
+        y2: 比較波形
+        max_lag: 最大ラグ（サンプル数）
+        phat: Trueの場合、PHAT重み付け（振幅を正規化して位相のみで相関）
+
+    Returns:
+        tuple: (ラグの配列, 各ラグの相関値)
+    """
+    # 線形相関になるように両信号の長さの和までゼロ埋め
+    from scipy import fft as sp_fft
+    n_fft = sp_fft.next_fast_len(len(y1) + len(y2) - 1, real=True)
+    spec1 = sp_fft.rfft(y1, n_fft, workers=-1)
+    spec2 = sp_fft.rfft(y2, n_fft, workers=-1)
+
+    cross = np.conj(spec1) * spec2
+    del spec1, spec2
+    if phat:
+        cross /= np.maximum(np.abs(cross), np.finfo(cross.real.dtype).tiny)
+
+    cc = sp_fft.irfft(cross, n_fft, workers=-1)
+
+    # 負のラグは末尾に折り返されている
+    max_neg = min(max_lag, len(y1) - 1)
+    max_pos = min(max_lag, len(y2) - 1)
+    lags = np.arange(-max_neg, max_pos + 1)
+    values = np.concatenate((cc[n_fft - max_neg:], cc[:max_pos + 1]))
+
+    return lags, values
+
+def gcc_phat_sync(audio1_path, audio2_path, max_offset=30.0, sr=22050, phat=True):
+    """
+    FFT相互相関による音声オフセット検出（サンプル精度）
+
+    ウィンドウごとの比較を繰り返す代わりに、±max_offset の全ラグを
+    O(n log n) の1回の計算で評価してピークを返す
+
+    Args:
+        audio1_path: 参照音声ファイル
+        audio2_path: 比較音声ファイル
+        max_offset: 最大オフセット範囲（秒）
+        sr: サンプリングレート
+        phat: PHAT重み付けを行うか
+
+    Returns:
+        dict: オフセット情報と信頼度スコア
+    """
+    method = 'gcc_phat' if phat else 'fft_xcorr'
+    print(f"音声同期を開始します（FFT相互相関モード: {method}）")
+    print(f"  参照音声: {audio1_path}")
+    print(f"  比較音声: {audio2_path}")
+    print(f"  最大オフセット: ±{max_offset}秒")
+
+    # 波形のみ使用（トラックの特徴は計算されない）
+    with sync_profile.phase('load_tracks'):
+        y1 = load_feature_track(audio1_path, sr=sr)['raw']
+        y2 = load_feature_track(audio2_path, sr=sr)['raw']
+
+    print("\n全ラグの相互相関を計算中...")
+    with sync_profile.phase('correlation'):
+        lags, values = compute_gcc_phat(y1, y2, int(round(max_offset * sr)), phat=phat)
+
+    best_idx = np.argmax(np.abs(values))
+    best_lag = int(lags[best_idx])
+    best_offset = best_lag / sr
+
+    # 信頼度は重なり区間の正規化相互相関（compute_feature_similarity の raw と同じ尺度）
+    seg1 = y1[max(0, -best_lag):]
+    seg2 = y2[max(0, best_lag):]
+    overlap = min(len(seg1), len(seg2))
+    seg1 = seg1[:overlap]
+    seg2 = seg2[:overlap]
+    norm = np.sqrt(np.dot(seg1, seg1) * np.dot(seg2, seg2))
+    confidence = abs(np.dot(seg1, seg2)) / norm if norm > 0 else 0.0
+
+    print(f"\n最適なオフセット: {best_offset:.4f}秒 ({best_lag}サンプル)")
+    print(f"信頼度スコア: {confidence:.4f}")
+
+    quality, quality_jp = evaluate_quality(confidence)
+    print(f"同期品質: {quality_jp} ({quality})")
+
+    return {
+        'offset': float(best_offset),
+        'confidence': float(confidence),
+        'quality': quality,
+        'quality_jp': quality_jp,
+        'lag_samples': best_lag,
+        'method': method
+    }
+
+def parabolic_peak(values, index):
+    """
+    ピーク位置を前後の値から放物線補間してサブサンプル精度で求める
+
+    Args:
+        values: 相関値の配列
+        index: 整数のピーク位置
+
+    Returns:
+        float: 補間したピーク位置
+    """
+    if index <= 0 or index >= len(values) - 1:
+        return float(index)
+
+    left, center, right = values[index - 1], values[index], values[index + 1]
+    denom = left - 2 * center + right
+    if denom == 0:
+        return float(index)
+    return index + 0.5 * (left - right) / denom
+
+def _coarse_envelope(mel_spec_db, coarse_factor, band_factor=8):
+    # メルスペクトログラム（dB）を時間方向と周波数方向に平均して間引いた粗いエンベロープ
+    n_bands = mel_spec_db.shape[0] // band_factor
+    n_frames = mel_spec_db.shape[1] // coarse_factor
+    pooled = mel_spec_db[:n_bands * band_factor, :n_frames * coarse_factor]
+    # float64 の複製を作らずに float64 で平均する
+    return pooled.reshape(n_bands, band_factor, n_frames, coarse_factor).mean(axis=(1, 3), dtype=np.float64)
+
+def _envelope_candidates(ref_env, test_env, min_start, max_start, top_k, min_separation):
+    # 粗いエンベロープ（バンド × フレーム）の正規化相互相関で、上位 top_k 個のピーク（開始フレーム）を返す
+    from scipy.signal import correlate
+    n = ref_env.shape[1]
+    ref_centered = ref_env - ref_env.mean(axis=1, keepdims=True)
+    ref_norm = np.linalg.norm(ref_centered)
+
+    segment = test_env[:, min_start:max_start + n]
+    if ref_norm == 0 or segment.shape[1] < n:
+        return []
+
+    numerator = sum(correlate(segment[b], ref_centered[b], mode='valid') for b in range(len(segment)))
+
+    # 各候補ウィンドウのバンドごとの分散を累積和で計算
+    zeros = np.zeros((len(segment), 1))
+    cumsum = np.concatenate((zeros, np.cumsum(segment, axis=1)), axis=1)
+    cumsum_sq = np.concatenate((zeros, np.cumsum(segment ** 2, axis=1)), axis=1)
+    window_sum = cumsum[:, n:] - cumsum[:, :-n]
+    window_var = np.maximum(cumsum_sq[:, n:] - cumsum_sq[:, :-n] - window_sum ** 2 / n, 0.0).sum(axis=0)
+    denom = ref_norm * np.sqrt(window_var)
+    ncc = np.where(denom > 0, numerator / np.maximum(denom, np.finfo(float).tiny), 0.0)
+
+    # 上位から近すぎるピークを除外して選択
+    candidates = []
+    for idx in np.argsort(ncc)[::-1]:
+        if len(candidates) >= top_k:
+            break
+        if all(abs(idx - c) >= min_separation for c, _ in candidates):
+            candidates.append((int(idx), float(ncc[idx])))
+
+    return [(min_start + idx, score) for idx, score in candidates]
+
+def pyramid_offset_search(ref_track, test_track, ref_offset, duration, max_offset, video_duration,
+                          coarse_factor=4, top_k=5, survivors=3):
+    """
+    粗い解像度から細かい解像度へのピラミッド探索でオフセットを検出
+
+    1. メルスペクトログラム（dB）を coarse_factor フレーム × 8バンドごとに平均した
+       粗いエンベロープで ±max_offset 全体を正規化相互相関し、上位 top_k 個のピークを選ぶ
+       （単一のオンセット包絡は拍が規則的な音楽ではピークが曖昧になるため、帯域情報を残す）
+    2. 各ピーク周辺をフレーム解像度のMFCC類似度（安価な特徴）で評価し、
+       上位 survivors 個に絞り込む
+    3. 残った候補だけを 'combined' スコアで評価
+    4. 最良候補の周辺で波形の相互相関を計算し、放物線補間でサブサンプル精度に補正
+
+    Args:
+        ref_track, test_track: load_feature_track の返り値
+        ref_offset: 参照ウィンドウの開始位置（秒）
+        duration: ウィンドウの長さ（秒）
+        max_offset: 最大オフセット範囲（秒）
+        video_duration: 動画の長さ（秒）
+        coarse_factor: 粗い段の間引き率（フレーム数）
+        top_k: 粗い段で残すピーク数
+        survivors: 'combined' で評価する候補数
+
+    Returns:
+        dict: {'offset', 'score', 'evaluations'}（evaluations は 'combined' の評価回数）
+              候補が見つからない場合は None
+    """
+    from scipy.signal import correlate
+    sr = ref_track['sr']
+    hop_length = ref_track['hop_length']
+    frame_rate = sr / hop_length
+
+    ref_features = slice_features(ref_track, ref_offset, duration)
+    ref_frame = int(round(round(ref_offset * sr) / hop_length))
+    n_frames = ref_features['mel_spec'].shape[1]
+
+    # 比較音声で有効な開始フレームの範囲
+    min_start = max(0, int(np.ceil((ref_offset - max_offset) * frame_rate)))
+    max_start = int(np.floor(min(ref_offset + max_offset, video_duration - duration) * frame_rate))
+    max_start = min(max_start, test_track['mel_spec'].shape[1] - n_frames)
+    if max_start < min_start:
+        return None
+
+    # 1. 粗い段: 間引いたエンベロープの相互相関
+    ref_env = _coarse_envelope(ref_track['mel_spec'][:, ref_frame:ref_frame + n_frames], coarse_factor)
+    test_env = _coarse_envelope(test_track['mel_spec'], coarse_factor)
+    coarse = _envelope_candidates(ref_env, test_env,
+                                  min_start // coarse_factor, max_start // coarse_factor,
+                                  top_k, min_separation=max(1, int(frame_rate / coarse_factor * 0.5)))
+    if not coarse:
+        return None
+
+    # 2. 中間段: ピーク周辺をフレーム解像度のMFCC類似度で評価
+    candidates = []
+    for coarse_start, _ in coarse:
+        center = coarse_start * coarse_factor + coarse_factor // 2
+        for frame in range(center - coarse_factor, center + coarse_factor + 1):
+            if min_start <= frame <= max_start and frame not in candidates:
+                candidates.append(frame)
+    candidates = np.array(candidates, dtype=np.int64)
+    mfcc_scores = compute_batch_similarity(ref_features, test_track, candidates * hop_length,
+                                           duration, method='mfcc')
+    finalists = candidates[np.argsort(-mfcc_scores, kind='stable')[:survivors]]
+
+    # 3. 細かい段: 生き残った候補のみ 'combined' で評価
+    combined_scores = compute_batch_similarity(ref_features, test_track, finalists * hop_length, duration)
+    combined = {int(frame): float(score) for frame, score in zip(finalists, combined_scores)}
+    best_frame = max(combined, key=combined.get)
+    best_offset = (best_frame - ref_frame) * hop_length / sr
+
+    # 4. サブサンプル補正: ±1ホップの範囲で波形の相互相関を計算して放物線補間
+    ref_raw = ref_features['raw']
+    ref_start = int(round(ref_offset * sr))
+    test_start = ref_start + int(round(best_offset * sr)) - hop_length
+    lo = max(0, test_start)
+    segment = test_track['raw'][lo:test_start + len(ref_raw) + 2 * hop_length]
+    if len(segment) >= len(ref_raw) + 2:
+        corr = correlate(segment, ref_raw, mode='valid')
+        peak = int(np.argmax(corr))
+        best_offset = (lo + parabolic_peak(corr, peak) - ref_start) / sr
+
+    return {
+        'offset': float(best_offset),
+        'score': float(combined[best_frame]),
+        'evaluations': len(combined)
+    }
+
+def pyramid_sync(audio1_path, audio2_path, video_duration,
+                 checkpoint_positions=[0.25, 0.5, 0.75],
+                 sample_duration=5.0, max_offset=30.0, cache=None, analysis=None):
+    """
+    ピラミッド探索による音声同期（multi_checkpoint と同じスキャン位置と検証）
+
+    固定の1秒/0.1秒グリッドの代わりに pyramid_offset_search を各スキャン位置で
+    実行するため、'combined' スコアの評価回数が大幅に減り、結果はサブミリ秒精度になる
+
+    Args:
+        audio1_path: 参照音声ファイル
+        audio2_path: 比較音声ファイル
+        video_duration: 動画の長さ（秒）
+        checkpoint_positions: チェックポイント位置のリスト（0-1の比率）
+        sample_duration: 各チェックポイントのサンプル長（秒）
+        max_offset: 最大オフセット範囲（秒）
+        cache: 特徴キャッシュ（DiskCache）
+        analysis: 特徴解析の設定（analysis_options の返り値）
+
+    Returns:
+        dict: 総合的な同期情報
+    """
+    print(f"\n=== ピラミッド探索音声同期 ===")
+    print(f"動画の長さ: {video_duration:.2f}秒")
+    print(f"最大オフセット範囲: ±{max_offset}秒")
+
+    scan_duration, scan_positions = _scan_layout(video_duration)
+    print(f"スキャン長: {scan_duration:.1f}秒")
+    print(f"スキャン位置: {[f'{p:.1f}秒' for p in scan_positions]}")
+
+    print(f"\n音声トラックの特徴を計算中...")
+    with sync_profile.phase('load_tracks'):
+        ref_track = load_feature_track(audio1_path, sr=22050, cache=cache, **(analysis or {}))
+        test_track = load_feature_track(audio2_path, sr=22050, cache=cache, **(analysis or {}))
+
+    best = None
+    evaluations = 0
+    for scan_idx, scan_offset in enumerate(scan_positions):
+        with sync_profile.phase('pyramid_search'):
+            result = pyramid_offset_search(ref_track, test_track, scan_offset, scan_duration,
+                                           max_offset, video_duration)
+        if result is None:
+            print(f"\n  スキャン位置 {scan_idx+1}/{len(scan_positions)}: {scan_offset:.1f}秒 → 候補なし")
+            continue
+
+        evaluations += result['evaluations']
+        print(f"\n  スキャン位置 {scan_idx+1}/{len(scan_positions)}: {scan_offset:.1f}秒 → "
+              f"オフセット={result['offset']:+.4f}秒, スコア={result['score']:.4f}")
+        if best is None or result['score'] > best['score']:
+            best = result
+
+    if best is None:
+        raise ValueError("No valid scan position for pyramid search")
+
+    print(f"\n  'combined' 評価回数: {evaluations}")
+    print(f"  ピラミッド探索結果: オフセット={best['offset']:.4f}秒, スコア={best['score']:.4f}")
+
+    with _UnitRunner(ref_track, test_track) as runner:
+        checkpoint_results = _verify_checkpoints(runner, checkpoint_positions, best['offset'],
+                                                 sample_duration, video_duration)
+
+    result = _combine_checkpoint_result(best['offset'], best['score'], checkpoint_results, 'pyramid_librosa')
+    result['evaluations'] = evaluations
+    return result
+
+def _write_landmark_entry(hashes, times, path):
+    np.save(os.path.join(path, 'hashes.npy'), hashes)
+    np.save(os.path.join(path, 'times.npy'), times)
+
+def load_landmarks(audio_path, cache=None):
+    """
+    音声ファイル全体のランドマークハッシュを計算（キャッシュ指定時はディスクに保存）
+
+    Args:
+        audio_path: 音声ファイルのパス
+        cache: DiskCache（Noneの場合はキャッシュしない）
+
+    Returns:
+        tuple: (ハッシュの配列, アンカーのフレーム番号の配列, 音声の長さ（秒）)
+    """
+    sr = audio_fingerprint.FINGERPRINT_SR
+    if cache is not None:
+        key = make_key('landmarks', FEATURE_CACHE_VERSION, source_digest(audio_path), sr,
+                       audio_fingerprint.FINGERPRINT_N_FFT, audio_fingerprint.FINGERPRINT_HOP)
+        entry = cache.get(key)
+        if entry is not None:
+            print(f"  ランドマークキャッシュを使用: {os.path.basename(audio_path)}")
+            sync_profile.count('landmark_cache_hits')
+            hashes = np.load(os.path.join(entry, 'hashes.npy'))
+            times = np.load(os.path.join(entry, 'times.npy'))
+            return hashes, times, audio_io.get_duration(audio_path)
+
+    y, sr = audio_io.load_audio(audio_path, sr=sr)
+    if len(y) == 0:
+        raise ValueError(f"No audio data found in {audio_path}")
+
+    hashes, times = audio_fingerprint.compute_landmarks(y, sr=sr)
+
+    if cache is not None:
+        cache.put(key, lambda path: _write_landmark_entry(hashes, times, path))
+
+    return hashes, times, len(y) / sr
+
+def fingerprint_sync(audio1_path, audio2_path, max_offset=None, sample_duration=5.0, sr=22050, cache=None):
+    """
+    ランドマークフィンガープリントによる音声同期
+
+    比較音声（audio2）のランドマークハッシュのインデックスを作成し、
+    参照音声のハッシュの一致から時間差を投票してオフセットを求める。
+    計算量は探索範囲にほとんど依存しないため、数分以上ずれた録音にも使える。
+    得られたオフセットは一致が集中した区間で波形相関により精密化し、
+    同じ区間の 'combined' スコアを信頼度とする
+
+    Args:
+        audio1_path: 参照音声ファイル
+        audio2_path: 比較音声ファイル
+        max_offset: 最大オフセット範囲（秒、Noneの場合は制限なし）
+        sample_duration: 精密化と信頼度計算に使う区間の長さ（秒）
+        sr: 精密化に使うサンプリングレート
+        cache: 特徴キャッシュ（DiskCache）
+
+    Returns:
+        dict: オフセット情報と信頼度スコア
+    """
+    from scipy.signal import correlate
+    print(f"音声同期を開始します（フィンガープリントモード）")
+    print(f"  参照音声: {audio1_path}")
+    print(f"  比較音声: {audio2_path}")
+    if max_offset is None:
+        print(f"  最大オフセット: 制限なし")
+    else:
+        print(f"  最大オフセット: ±{max_offset}秒")
+
+    frame_seconds = audio_fingerprint.FINGERPRINT_HOP / audio_fingerprint.FINGERPRINT_SR
+
+    print("\nランドマークを計算中...")
+    with sync_profile.phase('landmarks'):
+        ref_hashes, ref_times, ref_duration = load_landmarks(audio2_path, cache=cache)
+        query_hashes, query_times, query_duration = load_landmarks(audio1_path, cache=cache)
+    sync_profile.count('landmarks', len(ref_hashes) + len(query_hashes))
+    print(f"  ランドマーク数: 比較={len(ref_hashes)}, 参照={len(query_hashes)}")
+
+    with sync_profile.phase('matching'):
+        index = audio_fingerprint.LandmarkIndex(ref_hashes, ref_times)
+        max_delta = None if max_offset is None else int(np.ceil(max_offset / frame_seconds))
+        match = index.match(query_hashes, query_times, max_delta=max_delta)
+    if match is None:
+        raise ValueError("No matching landmarks found between the audio files")
+
+    coarse_offset = match['delta'] * frame_seconds
+    print(f"  投票結果: オフセット={coarse_offset:+.3f}秒, "
+          f"得票={match['votes']}/{match['matches']}（一致ハッシュ数）")
+
+    # 一致が集中した位置を中心に、両方の音声に収まる区間を選ぶ
+    center = float(np.median(match['query_times'])) * frame_seconds
+    lo = max(0.0, -coarse_offset)
+    hi = min(query_duration, ref_duration - coarse_offset)
+    window = min(sample_duration, hi - lo)
+    if window <= 0:
+        raise ValueError("The matched audio files do not overlap")
+    start = min(max(lo, center - window / 2), hi - window)
+
+    # 投票結果の前後1フレーム強の範囲を波形相関で精密化
+    margin = 2 * frame_seconds
+    ref_start = max(0.0, start + coarse_offset - margin)
+    with sync_profile.phase('refinement'):
+        y1, _ = audio_io.load_audio(audio1_path, sr=sr, offset=start, duration=window)
+        y2, _ = audio_io.load_audio(audio2_path, sr=sr, offset=ref_start, duration=window + 2 * margin)
+        if len(y1) == 0 or len(y2) < len(y1):
+            raise ValueError(f"No audio data found at offset {start}")
+
+        corr = correlate(y2, y1, mode='valid', method='fft')
+        peak = int(np.argmax(corr))
+        lag = parabolic_peak(corr, peak)
+        # load_audio（librosa.load と同じ）の開始サンプルは切り捨て
+        best_offset = (int(ref_start * sr) + lag - int(start * sr)) / sr
+
+        features1 = AudioFeatures(y1, sr)
+        features2 = AudioFeatures(y2[peak:peak + len(y1)], sr)
+        confidence = compute_feature_similarity(features1, features2, method='combined')
+
+    print(f"\n最適なオフセット: {best_offset:.4f}秒")
+    print(f"信頼度スコア: {confidence:.4f}")
+
+    quality, quality_jp = evaluate_quality(confidence)
+    print(f"同期品質: {quality_jp} ({quality})")
+
+    return {
+        'offset': float(best_offset),
+        'confidence': float(confidence),
+        'quality': quality,
+        'quality_jp': quality_jp,
+        'votes': match['votes'],
+        'matched_hashes': match['matches'],
+        'method': 'fingerprint'
+    }
+
+# ドリフト推定に使う最小チャンク数
+MIN_DRIFT_CHUNKS = 8
+
+# ドリフト近似の初期推定（Theil-Sen）に使う最大点数
+THEIL_SEN_POINTS = 300
+
+def iter_audio_chunks(audio_path, sr=22050, chunk_duration=10.0, chunk_step=30.0, end=None):
+    """
+    音声を固定長のチャンクごとに読み込むジェネレータ
+
+    一度に保持するのは1チャンク分のみ（16bit PCM の WAV は区間のみをファイルから直接読む）
+
+    Args:
+        audio_path: 音声ファイルのパス
+        sr: サンプリングレート
+        chunk_duration: チャンクの長さ（秒）
+        chunk_step: チャンクの開始位置の間隔（秒）
+        end: 読み込みを終了する位置（秒、Noneの場合は末尾まで）
+
+    Yields:
+        tuple: (チャンクの開始位置（秒）, 波形)
+    """
+    if end is None:
+        end = audio_io.get_duration(audio_path)
+
+    position = 0.0
+    while position + chunk_duration <= end:
+        y, _ = audio_io.load_audio(audio_path, sr=sr, offset=position, duration=chunk_duration, mmap=False)
+        if len(y) == 0:
+            return
+        yield position, y
+        position += chunk_step
+
+def estimate_chunk_offsets(chunks, audio2_path, max_offset=30.0, sr=22050):
+    """
+    各チャンクの局所オフセットを GCC-PHAT で推定するジェネレータ
+
+    比較音声はチャンクごとに ±max_offset の範囲だけを読み込む
+
+    Args:
+        chunks: iter_audio_chunks が返す (開始位置, 波形) のイテレータ
+        audio2_path: 比較音声ファイル
+        max_offset: 最大オフセット範囲（秒）
+        sr: サンプリングレート
+
+    Yields:
+        dict: {'time': チャンク中心の時刻（秒）, 'offset', 'confidence'}
+    """
+    for position, y1 in chunks:
+        # 無音のチャンクは推定できない
+        if not np.any(y1):
+            continue
+
+        with sync_profile.phase('chunk_estimation'):
+            estimate = _estimate_chunk_offset(y1, position, audio2_path, max_offset, sr)
+        if estimate is not None:
+            yield estimate
+
+def _estimate_chunk_offset(y1, position, audio2_path, max_offset, sr):
+    # 1チャンクの局所オフセットを推定（比較音声の区間が足りない場合は None）
+    window_start = int(max(0.0, position - max_offset) * sr)
+    y2, _ = audio_io.load_audio(audio2_path, sr=sr, offset=window_start / sr,
+                                duration=len(y1) / sr + 2 * max_offset, mmap=False)
+    if len(y2) < len(y1):
+        return None
+
+    # ラグ k は y2[n + k] ≈ y1[n]（チャンク全体が重なる範囲のみ）
+    lags, values = compute_gcc_phat(y1, y2, len(y2) - len(y1))
+    valid = lags >= 0
+    lags, values = lags[valid], values[valid]
+    peak = int(np.argmax(values))
+    lag = parabolic_peak(values, peak)
+
+    # 信頼度は他のモードと同じ 'combined' スコア（チャンク内のドリフトによる波形のずれに強い）
+    segment = y2[int(lags[peak]):int(lags[peak]) + len(y1)]
+    confidence = compute_feature_similarity(AudioFeatures(y1, sr), AudioFeatures(segment, sr),
+                                            method='combined')
+
+    return {
+        'time': position + len(y1) / sr / 2,
+        'offset': float((window_start + lags[0] + lag) / sr - int(position * sr) / sr),
+        'confidence': float(confidence)
+    }
+
+def fit_drift(times, offsets, threshold=3.0, min_tolerance=0.005, max_iter=10):
+    """
+    オフセットと時刻の関係を直線（オフセット + ドリフト率 x 時刻）で頑健に近似
+
+    Theil-Sen推定を初期値とし、残差のMAD（中央絶対偏差）で外れ値を除いて
+    最小二乗法で再推定する
+
+    Args:
+        times: チャンクの時刻（秒）
+        offsets: チャンクの局所オフセット（秒）
+        threshold: 外れ値とみなす残差（MADから求めた標準偏差の倍数）
+        min_tolerance: 外れ値判定の最小許容残差（秒）
+        max_iter: 再推定の最大回数
+
+    Returns:
+        tuple: (時刻0のオフセット, ドリフト率（秒/秒）, 採用したチャンクのマスク)
+    """
+    times = np.asarray(times, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.float64)
+
+    if len(times) == 1:
+        return float(offsets[0]), 0.0, np.ones(1, dtype=bool)
+
+    # Theil-Sen: ペアの傾きの中央値（ペア数を抑えるため最大 THEIL_SEN_POINTS 点で計算）
+    sample = np.unique(np.linspace(0, len(times) - 1, min(len(times), THEIL_SEN_POINTS)).astype(int))
+    i, j = np.triu_indices(len(sample), k=1)
+    dt = times[sample[j]] - times[sample[i]]
+    dy = offsets[sample[j]] - offsets[sample[i]]
+    slope = float(np.median(dy[dt > 0] / dt[dt > 0]))
+    intercept = float(np.median(offsets - slope * times))
+
+    inliers = None
+    for _ in range(max_iter):
+        residuals = offsets - (intercept + slope * times)
+        reference = residuals if inliers is None else residuals[inliers]
+        mad = np.median(np.abs(reference - np.median(reference)))
+        tolerance = max(threshold * 1.4826 * mad, min_tolerance)
+        new_inliers = np.abs(residuals) <= tolerance
+        if new_inliers.sum() < 2:
+            break
+        if inliers is not None and np.array_equal(new_inliers, inliers):
+            break
+        inliers = new_inliers
+        slope, intercept = (float(v) for v in np.polyfit(times[inliers], offsets[inliers], 1))
+
+    if inliers is None:
+        inliers = np.ones(len(times), dtype=bool)
+    return intercept, slope, inliers
+
+def drift_sync(audio1_path, audio2_path, video_duration=None, chunk_duration=10.0, chunk_step=30.0,
+               max_offset=30.0, sr=22050):
+    """
+    ストリーミングでクロックのずれ（ドリフト）を含むオフセットを推定
+
+    両方の音声を固定長のチャンク単位で読み進め（ジェネレータのパイプライン）、
+    チャンクごとの局所オフセットを直線で近似する。保持する波形は常に1チャンク分なので、
+    メモリ使用量は録音の長さによらず一定
+
+    Args:
+        audio1_path: 参照音声ファイル
+        audio2_path: 比較音声ファイル
+        video_duration: 解析する長さ（秒、Noneの場合は参照音声の長さ）
+        chunk_duration: チャンクの長さ（秒）
+        chunk_step: チャンクの開始位置の間隔（秒、MIN_DRIFT_CHUNKS 個に満たない場合は狭める）
+        max_offset: 最大オフセット範囲（秒）
+        sr: サンプリングレート
+
+    Returns:
+        dict: オフセット（時刻0）、ドリフト率、チャンクごとのオフセットの対応表
+    """
+    print(f"\n=== ドリフト推定音声同期（ストリーミング） ===")
+    print(f"  参照音声: {audio1_path}")
+    print(f"  比較音声: {audio2_path}")
+    print(f"  チャンク: {chunk_duration}秒（{chunk_step}秒間隔）, 最大オフセット: ±{max_offset}秒")
+
+    end = audio_io.get_duration(audio1_path)
+    if video_duration is not None:
+        end = min(end, video_duration)
+    if end < chunk_duration:
+        chunk_duration = end
+    # 短い録音でも外れ値を除けるだけのチャンク数を確保する
+    if end > chunk_duration:
+        chunk_step = min(chunk_step, (end - chunk_duration) / (MIN_DRIFT_CHUNKS - 1))
+
+    chunks = iter_audio_chunks(audio1_path, sr=sr, chunk_duration=chunk_duration,
+                               chunk_step=chunk_step, end=end)
+    estimates = []
+    for estimate in estimate_chunk_offsets(chunks, audio2_path, max_offset=max_offset, sr=sr):
+        sync_profile.count('chunks')
+        print(f"  {estimate['time']:8.1f}秒: オフセット={estimate['offset']:+.4f}秒, "
+              f"相関={estimate['confidence']:.4f}")
+        estimates.append(estimate)
+
+    if not estimates:
+        raise ValueError("No audio chunks could be analysed for drift")
+
+    times = [e['time'] for e in estimates]
+    offsets = [e['offset'] for e in estimates]
+    with sync_profile.phase('fit'):
+        intercept, slope, inliers = fit_drift(times, offsets)
+
+    confidence = float(np.median([e['confidence'] for e, ok in zip(estimates, inliers) if ok]))
+    confidence *= float(inliers.mean())
+
+    print(f"\nオフセット（0秒時点）: {intercept:.4f}秒")
+    print(f"ドリフト率: {slope * 1e6:+.1f} ppm（{end:.0f}秒で {slope * end:+.4f}秒）")
+    print(f"採用チャンク: {int(inliers.sum())}/{len(estimates)}")
+    print(f"信頼度スコア: {confidence:.4f}")
+
+    quality, quality_jp = evaluate_quality(confidence)
+    print(f"同期品質: {quality_jp} ({quality})")
+
+    return {
+        'offset': intercept,
+        'drift_rate': slope,
+        'drift_ppm': slope * 1e6,
+        'offset_at_end': intercept + slope * end,
+        'confidence': confidence,
+        'quality': quality,
+        'quality_jp': quality_jp,
+        'chunks': len(estimates),
+        'inliers': int(inliers.sum()),
+        'drift_map': [
+            {'time': e['time'], 'offset': e['offset'], 'confidence': e['confidence'], 'inlier': bool(ok)}
+            for e, ok in zip(estimates, inliers)
+        ],
+        'method': 'drift'
+    }
+
+# CLIと常駐サーバーで受け付ける同期モード
+SYNC_MODES = ['simple', 'multi_checkpoint', 'gcc_phat', 'xcorr', 'pyramid', 'fingerprint', 'drift']
+
+# max_offset を指定しない場合の探索範囲（秒、fingerprint は制限なし）
+DEFAULT_MAX_OFFSET = 30.0
+
+def analysis_options(n_fft=None, hop_length=None, low_memory=False):
+    """
+    load_feature_track に渡す特徴解析の設定を作成
+
+    Args:
+        n_fft: スペクトル特徴のFFT長（Noneの場合は DEFAULT_N_FFT）
+        hop_length: 特徴フレームのホップ長（Noneの場合は DEFAULT_HOP_LENGTH）
+        low_memory: 低メモリモード（float32 のまま、スペクトル特徴をブロックごとに計算）
+
+    Returns:
+        dict: load_feature_track のキーワード引数
+    """
+    options = {'low_memory': bool(low_memory)}
+    for name, value in (('n_fft', n_fft), ('hop_length', hop_length)):
+        if value is None:
+            continue
+        if int(value) <= 0:
+            raise ValueError(f"{name} must be positive: {value}")
+        options[name] = int(value)
+    return options
+
+def run_sync(audio1_path, audio2_path, video_duration, mode='simple', cache=None,
+             workers=1, executor='thread', max_offset=None, time_budget=None, target_confidence=None,
+             analysis=None):
+    """
+    同期モードに応じて音声同期を実行
+
+    Args:
+        audio1_path: 参照音声ファイル
+        audio2_path: 比較音声ファイル
+        video_duration: 動画の長さ（秒）
+        mode: SYNC_MODES のいずれか
+        cache: 特徴キャッシュ（DiskCache）
+        workers: multi_checkpoint の探索を並列実行するワーカー数
+        executor: ワーカーの種類（'thread' または 'process'）
+        max_offset: 最大オフセット範囲（秒、Noneの場合は DEFAULT_MAX_OFFSET）
+        time_budget: multi_checkpoint の時間制限（秒）
+        target_confidence: multi_checkpoint を早期終了する総合信頼度
+        analysis: 特徴解析の設定（analysis_options の返り値、simple・multi_checkpoint・pyramid で使用）
+
+    処理時間の内訳（フェーズごとの経過時間と呼び出し回数）とカウンタ（デコードした
+    バイト数、類似度の評価回数など）と最大常駐メモリを結果の 'profile' に追加する。
+    環境変数 AUDIO_SYNC_CPROFILE にファイルパスを指定すると cProfile の結果も保存する
+
+    Returns:
+        dict: 同期結果
+    """
+    if mode not in SYNC_MODES:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    profile = sync_profile.SyncProfile()
+    with sync_profile.activate(profile), sync_profile.cprofile(mode):
+        result = _run_sync_mode(audio1_path, audio2_path, video_duration, mode, cache,
+                                workers, executor, max_offset, time_budget, target_confidence, analysis)
+    result['profile'] = profile.to_dict()
+    return result
+
+def _run_sync_mode(audio1_path, audio2_path, video_duration, mode, cache, workers, executor, max_offset,
+                   time_budget, target_confidence, analysis):
+    if mode == 'fingerprint':
+        return fingerprint_sync(audio1_path, audio2_path, max_offset=max_offset, cache=cache)
+
+    if max_offset is None:
+        max_offset = DEFAULT_MAX_OFFSET
+
+    if mode == 'drift':
+        return drift_sync(audio1_path, audio2_path, video_duration, max_offset=max_offset)
+    elif mode == 'multi_checkpoint':
+        return multi_checkpoint_sync(
+            audio1_path, audio2_path, video_duration,
+            checkpoint_positions=[0.25, 0.5, 0.75],
+            sample_duration=5.0,
+            max_offset=max_offset,
+            cache=cache,
+            workers=workers,
+            executor=executor,
+            time_budget=time_budget,
+            target_confidence=target_confidence,
+            analysis=analysis
+        )
+    elif mode == 'pyramid':
+        return pyramid_sync(
+            audio1_path, audio2_path, video_duration,
+            checkpoint_positions=[0.25, 0.5, 0.75],
+            sample_duration=5.0,
+            max_offset=max_offset,
+            cache=cache,
+            analysis=analysis
+        )
+    elif mode in ('gcc_phat', 'xcorr'):
+        return gcc_phat_sync(
+            audio1_path, audio2_path,
+            max_offset=max_offset,
+            phat=(mode == 'gcc_phat')
+        )
+    else:
+        return find_audio_offset_advanced(
+            audio1_path, audio2_path,
+            search_duration=30.0,
+            sample_duration=5.0,
+            max_offset=max_offset,
+            cache=cache,
+            analysis=analysis
+        )
+
+def configure_jit_cache(cache_dir=None):
+    """
+    numba のJITキャッシュの保存先を設定する
+
+    librosa のカーネルはキャッシュ指定でコンパイルされるが、既定の保存先（パッケージの
+    __pycache__）に書き込めない環境では毎回コンパイルし直しになる。numba は読み込み時に
+    環境変数を参照するため、librosa をインポートする前に呼ぶ必要がある
+
+    Args:
+        cache_dir: 保存先（Noneの場合は環境変数 NUMBA_CACHE_DIR、未設定なら DEFAULT_JIT_CACHE_DIR）
+
+    Returns:
+        str or None: 設定した保存先（numba が読み込み済み、または作成できない場合は None）
+    """
+    if 'numba' in sys.modules:
+        return None
+    cache_dir = os.path.abspath(cache_dir or os.environ.get(JIT_CACHE_ENV) or DEFAULT_JIT_CACHE_DIR)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        print(f"JITキャッシュのディレクトリを作成できません（{e}）。numba の既定の保存先を使用します",
+              file=sys.stderr)
+        return None
+    os.environ[JIT_CACHE_ENV] = cache_dir
+    return cache_dir
+
+def warmup(sr=22050):
+    """
+    librosa/numbaのカーネルを短い合成信号で一度実行してJITコンパイルを済ませる
+
+    configure_jit_cache で保存先を設定しておくと、コンパイル結果は次のプロセスでも再利用される
+
+    Args:
+        sr: サンプリングレート
+    """
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal(sr * 2).astype(np.float32) * 0.1
+    track = AudioFeatures(y, sr, window=False)
+    track['hop_length'] = DEFAULT_HOP_LENGTH
+    track['duration'] = len(y) / sr
+    window = slice_features(track, 0.0, 1.0)
+    compute_feature_similarity(window, window, method='combined')
+    compute_gcc_phat(y, y, sr // 10)
+
+def handle_request(request, cache=None):
+    """
+    常駐サーバーの1リクエストを処理
+
+    Args:
+        request: {'id', 'audio1', 'audio2', 'video_duration', 'mode', 'max_offset',
+                  'time_budget', 'target_confidence', 'low_memory', 'n_fft', 'hop_length'} または
+                 {'id', 'command': 'ping' | 'shutdown'}
+        cache: 特徴キャッシュ（DiskCache）
+
+    Returns:
+        dict: {'id', 'ok', 'result'} または {'id', 'ok': False, 'error', 'error_type'}
+    """
+    request_id = request.get('id')
+    command = request.get('command', 'sync')
+
+    try:
+        if command == 'ping':
+            return {'id': request_id, 'ok': True, 'result': 'pong'}
+        if command == 'shutdown':
+            return {'id': request_id, 'ok': True, 'result': 'shutdown'}
+        if command != 'sync':
+            raise ValueError(f"Unknown command: {command}")
+
+        for name in ('audio1', 'audio2'):
+            if not os.path.exists(request[name]):
+                raise FileNotFoundError(f"Audio file not found: {request[name]}")
+
+        result = run_sync(
+            request['audio1'], request['audio2'],
+            float(request['video_duration']),
+            mode=request.get('mode', 'multi_checkpoint'),
+            cache=cache,
+            max_offset=request.get('max_offset'),
+            time_budget=request.get('time_budget'),
+            target_confidence=request.get('target_confidence'),
+            analysis=analysis_options(request.get('n_fft'), request.get('hop_length'),
+                                      request.get('low_memory', False))
+        )
+        return {'id': request_id, 'ok': True, 'result': result}
+
+    except Exception as e:
+        return {
+            'id': request_id,
+            'ok': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }
+
+def serve(cache=None, socket_path=None, memo_size=8):
+    """
+    常駐サーバーモード
+
+    改行区切りのJSONリクエストを標準入力（またはUnixソケット）から読み、
+    1行1件のJSONで結果を返す。インポート・JITキャッシュ・特徴キャッシュは
+    リクエスト間で保持される。標準入出力モードではログは標準エラーに出力する
+
+    Args:
+        cache: 特徴キャッシュ（DiskCache）
+        socket_path: Unixソケットのパス（Noneの場合は標準入出力）
+        memo_size: メモリ上に保持するトラック数
+    """
+    global TRACK_MEMO_SIZE
+    TRACK_MEMO_SIZE = memo_size
+
+    print("同期サーバーを準備中（ウォームアップ）...", file=sys.stderr)
+    warmup()
+
+    # 同時に処理するリクエストは1件（トラックと特徴の共有のため）
+    request_lock = threading.Lock()
+
+    def process_line(line, log_stream):
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {'id': None, 'ok': False, 'error': f"Invalid JSON: {e}", 'error_type': 'JSONDecodeError'}
+        with request_lock, contextlib.redirect_stdout(log_stream):
+            return handle_request(request, cache=cache)
+
+    if socket_path is None:
+        print("同期サーバー起動（標準入出力）", file=sys.stderr)
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            response = process_line(line, sys.stderr)
+            sys.stdout.write(json.dumps(response, ensure_ascii=False) + '\n')
+            sys.stdout.flush()
+            if response.get('result') == 'shutdown':
+                break
+        return
+
+    import socketserver
+    if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+        raise RuntimeError("Unix sockets are not supported on this platform")
+
+    class SyncRequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw_line in self.rfile:
+                line = raw_line.decode('utf-8')
+                if not line.strip():
+                    continue
+                response = process_line(line, sys.stdout)
+                self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+                self.wfile.flush()
+                if response.get('result') == 'shutdown':
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    with socketserver.ThreadingUnixStreamServer(socket_path, SyncRequestHandler) as server:
+        server.daemon_threads = True
+        print(f"同期サーバー起動: {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+def _init_batch_worker(reference_path, reference_track):
+    # ワーカーごとに参照トラックをメモリ上に登録して再利用する
+    global TRACK_MEMO_SIZE
+    TRACK_MEMO_SIZE = 2
+    if reference_track is not None:
+        remember_track(reference_path, reference_track)
+
+def _batch_worker(candidate_path, reference_path, video_duration, mode, cache, max_offset, analysis):
+    # ワーカーのログは標準エラーへ（標準出力は結果のJSON行のみ）
+    with contextlib.redirect_stdout(sys.stderr):
+        if video_duration is None:
+            video_duration = min(audio_io.get_duration(candidate_path),
+                                 audio_io.get_duration(reference_path))
+        return run_sync(candidate_path, reference_path, video_duration, mode=mode, cache=cache,
+                        max_offset=max_offset, analysis=analysis)
+
+def load_batch_manifest(manifest_path):
+    """
+    バッチ同期のマニフェスト（JSON）を読み込む
+
+    形式:
+        {"reference": "ref.wav", "mode": "multi_checkpoint",
+         "candidates": ["take1.wav", {"path": "take2.wav", "video_duration": 120.0}]}
+
+    Args:
+        manifest_path: マニフェストファイルのパス
+
+    Returns:
+        tuple: (参照音声, [(候補音声, 動画の長さまたはNone), ...], モードまたはNone)
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    def resolve(path):
+        return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+    candidates = []
+    for item in manifest['candidates']:
+        if isinstance(item, str):
+            candidates.append((resolve(item), None))
+        else:
+            candidates.append((resolve(item['path']), item.get('video_duration')))
+
+    return resolve(manifest['reference']), candidates, manifest.get('mode')
+
+def _prepare_reference(reference_path, mode, cache, analysis):
+    # 同期モードが使う参照音声の解析だけを事前に行う（ワーカーに渡すトラック、なければ None）
+    if mode in ('simple', 'multi_checkpoint', 'pyramid'):
+        track = load_feature_track(reference_path, sr=22050, cache=cache, **(analysis or {}))
+        track.compute(required_features('combined'))
+        return track
+    if mode in ('gcc_phat', 'xcorr'):
+        # gcc_phat_sync と同じ設定で読み込む（波形のみ）
+        return load_feature_track(reference_path, sr=22050)
+    if mode == 'fingerprint' and cache is not None:
+        # ランドマークをディスクキャッシュに保存し、ワーカーはキャッシュから読み込む
+        load_landmarks(reference_path, cache=cache)
+    return None
+
+def batch_sync(reference_path, candidates, mode='multi_checkpoint', cache=None, workers=None,
+               max_offset=None, analysis=None):
+    """
+    1つの参照音声に対して複数のテイクを同期（プロセスプール）
+
+    参照音声は一度だけ解析してワーカー間で共有する（キャッシュ指定時は
+    ディスクキャッシュからメモリマップ、それ以外はワーカー起動時に受け渡し）。
+    結果は完了した順に返す。各テイクは audio1、参照は audio2 として同期される
+    （オフセットの符号は syncAudio の動画A/動画Bと同じ）
+
+    Args:
+        reference_path: 参照音声ファイル（動画B）
+        candidates: [(候補音声ファイル, 動画の長さまたはNone), ...]
+                    動画の長さがNoneの場合は音声の短い方の長さを使用
+        mode: 同期モード
+        cache: 特徴キャッシュ（DiskCache）
+        workers: ワーカープロセス数（Noneの場合はCPU数）
+        max_offset: 最大オフセット範囲（秒、Noneの場合はモードのデフォルト）
+        analysis: 特徴解析の設定（analysis_options の返り値）
+
+    Yields:
+        dict: {'index', 'candidate', 'ok', 'result'} または {'index', 'candidate', 'ok': False, 'error', 'error_type'}
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    print(f"参照音声を解析中: {reference_path}", file=sys.stderr)
+    with contextlib.redirect_stdout(sys.stderr):
+        reference_track = _prepare_reference(reference_path, mode, cache, analysis)
+
+    # キャッシュがある場合、ワーカーはディスクキャッシュから直接メモリマップする
+    # （gcc_phat・xcorr は特徴キャッシュを使わないため、デコードした波形を受け渡す）
+    shared_track = reference_track
+    if cache is not None and mode not in ('gcc_phat', 'xcorr'):
+        shared_track = None
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(reference_path, shared_track)) as executor:
+        futures = {
+            executor.submit(_batch_worker, path, reference_path, duration, mode, cache, max_offset,
+                            analysis): (index, path)
+            for index, (path, duration) in enumerate(candidates)
+        }
+        for future in as_completed(futures):
+            index, path = futures[future]
+            try:
+                yield {'index': index, 'candidate': path, 'ok': True, 'result': future.result()}
+            except Exception as e:
+                yield {
+                    'index': index,
+                    'candidate': path,
+                    'ok': False,
+                    'error': str(e),
+                    'error_type': type(e).__name__
+                }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='librosaを使用した高精度音声同期',
+        usage='python audio_sync_advanced.py <audio1> <audio2> <video_duration> [mode] [options]'
+    )
+    parser.add_argument('audio1', nargs='?', help='参照音声ファイル（動画ファイルも可、ffmpeg で必要な区間だけをデコード）')
+    parser.add_argument('audio2', nargs='?', help='比較音声ファイル（動画ファイルも可）')
+    parser.add_argument('video_duration', nargs='?', help='動画の長さ（秒）')
+    parser.add_argument('mode', nargs='?', default='simple', choices=SYNC_MODES,
+                        help="同期モード（デフォルト: simple）")
+    parser.add_argument('--cache-dir', default=os.environ.get('AUDIO_SYNC_CACHE_DIR'),
+                        help='特徴キャッシュのディレクトリ（環境変数 AUDIO_SYNC_CACHE_DIR でも指定可）')
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='特徴キャッシュの上限サイズ（MB）')
+    parser.add_argument('--serve', action='store_true',
+                        help='常駐サーバーモード（改行区切りJSONのリクエストを処理）')
+    parser.add_argument('--socket', help='サーバーモードで待ち受けるUnixソケットのパス（省略時は標準入出力）')
+    parser.add_argument('--mode', dest='mode_option', choices=SYNC_MODES,
+                        help='同期モード（位置引数の mode の代わりに指定可）')
+    parser.add_argument('--max-offset', type=float, default=None,
+                        help='最大オフセット範囲（秒、デフォルト: 30、fingerprint モードは制限なし）')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='multi_checkpoint の時間制限（秒）。超えた場合は最良の途中結果を返す')
+    parser.add_argument('--target-confidence', type=float, default=None,
+                        help='multi_checkpoint をこの総合信頼度を検証できた時点で終了する（例: 0.8）')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='低メモリモード（float32 のまま、スペクトル特徴をブロックごとに計算）')
+    parser.add_argument('--n-fft', type=int, default=None,
+                        help=f'スペクトル特徴のFFT長（デフォルト: {DEFAULT_N_FFT}）')
+    parser.add_argument('--hop-length', type=int, default=None,
+                        help=f'特徴フレームのホップ長（デフォルト: {DEFAULT_HOP_LENGTH}）')
+    parser.add_argument('--batch', nargs='+', metavar=('REFERENCE', 'CANDIDATE'),
+                        help='バッチ同期: 参照音声と複数の候補音声（結果は1行1件のJSON）')
+    parser.add_argument('--manifest', help='バッチ同期のマニフェスト（JSON）')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='バッチ同期のワーカープロセス数（デフォルト: CPU数）')
+    parser.add_argument('--search-workers', type=int, default=1,
+                        help='multi_checkpoint の探索を並列実行するワーカー数（デフォルト: 1）')
+    parser.add_argument('--search-executor', choices=['thread', 'process'], default='thread',
+                        help='探索ワーカーの種類（デフォルト: thread）')
+    parser.add_argument('--jit-cache-dir', default=None,
+                        help='numba のJITキャッシュのディレクトリ（環境変数 NUMBA_CACHE_DIR でも指定可、'
+                             'デフォルト: temp/numba_cache）')
+    parser.add_argument('--warmup', action='store_true',
+                        help='librosa/numba のカーネルをコンパイルしてJITキャッシュに保存し終了する'
+                             '（コンテナのビルド時に実行）')
+    args = parser.parse_args()
+
+    # librosa（numba）を読み込む前にJITキャッシュの保存先を設定
+    jit_cache_dir = configure_jit_cache(args.jit_cache_dir)
+
+    if args.warmup:
+        started = time.perf_counter()
+        warmup()
+        print(f"ウォームアップ完了: {time.perf_counter() - started:.2f}秒"
+              f"（JITキャッシュ: {jit_cache_dir or 'numba の既定の保存先'}）")
+        sys.exit(0)
+
+    try:
+        analysis = analysis_options(args.n_fft, args.hop_length, args.low_memory)
+    except ValueError as e:
+        parser.error(str(e))
+
+    cache = None
+    if args.cache_dir:
+        cache = DiskCache(args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    if args.serve:
+        serve(cache=cache, socket_path=args.socket)
+        sys.exit(0)
+
+    if args.batch or args.manifest:
+        if args.manifest:
+            reference_path, candidates, manifest_mode = load_batch_manifest(args.manifest)
+        else:
+            if len(args.batch) < 2:
+                parser.error('--batch requires a reference and at least one candidate')
+            reference_path = args.batch[0]
+            candidates = [(path, None) for path in args.batch[1:]]
+            manifest_mode = None
+        batch_mode = args.mode_option or manifest_mode or 'multi_checkpoint'
+
+        failed = 0
+        for item in batch_sync(reference_path, candidates, mode=batch_mode,
+                               cache=cache, workers=args.workers, max_offset=args.max_offset,
+                               analysis=analysis):
+            failed += 0 if item['ok'] else 1
+            print(json.dumps(item, ensure_ascii=False), flush=True)
+        sys.exit(1 if failed else 0)
+
+    if args.video_duration is None:
+        parser.print_usage(sys.stderr)
+        print("  mode: " + ", ".join(SYNC_MODES), file=sys.stderr)
+        sys.exit(1)
+
+    audio1_path = args.audio1
+    audio2_path = args.audio2
+    mode = args.mode_option or args.mode
+
+    try:
+        video_duration = float(args.video_duration)
+    except ValueError as e:
+        print(f"Error: Invalid video_duration '{args.video_duration}': {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # 入力ファイルの存在確認
+    if not os.path.exists(audio1_path):
+        print(f"Error: Audio file 1 not found: {audio1_path}", file=sys.stderr)
+        sys.exit(1)
+    if not os.path.exists(audio2_path):
+        print(f"Error: Audio file 2 not found: {audio2_path}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        result = run_sync(audio1_path, audio2_path, video_duration, mode=mode, cache=cache,
+                          workers=args.search_workers, executor=args.search_executor,
+                          max_offset=args.max_offset, time_budget=args.time_budget,
+                          target_confidence=args.target_confidence, analysis=analysis)
 
         # JSON形式で結果を出力
         print("\n=== JSON OUTPUT ===")
@@ -2,10 +2,34 @@
 # -*- coding: utf-8 -*-
 """
 テキスト画像を生成するスクリプト
+描画した画像は overlay_cache にキャッシュされ、同じテキスト・サイズでは再利用される
 """
 import sys
-import json
 from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+
+from text_layout import load_font
+import overlay_cache
+
+# 使用するフォント（順に試し、すべて読み込めない場合は Pillow のデフォルトフォント）
+FONT_PATHS = ('C:/Windows/Fonts/msgothic.ttc', 'C:/Windows/Fonts/arial.ttf')
+
+def resolve_font_path():
+    """
+    FONT_PATHS のうち最初に読み込めるフォントファイルを返す
+
+    text_layout の代替フォント（macOS のヒラギノなど）は使わない
+
+    Returns:
+        str or None: フォントファイルのパス（すべて失敗した場合は None）
+    """
+    for path in FONT_PATHS:
+        try:
+            ImageFont.truetype(path, 10)
+            return path
+        except OSError:
+            continue
+    return None
 
 def create_text_image(text, output_path, width=1080, height=1920, font_size=80):
     """
@@ -18,21 +42,42 @@ def create_text_image(text, output_path, width=1080, height=1920, font_size=80):
         height: 画像の高さ
         font_size: フォントサイズ
     """
+    cache = overlay_cache.open_cache()
+    key = overlay_cache.overlay_key('create_text_image', text, resolve_font_path(),
+                                    {'font_size': font_size}, width, height)
+    overlay = overlay_cache.get_overlay(cache, key, lambda: render_text_image(text, width, height, font_size))
+
+    # 透明な画像に切り抜いたテキスト画像を配置
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    if overlay is not None:
+        img.paste(Image.fromarray(overlay['sprite']), (overlay['x'], overlay['y']))
+
+    # PNG形式で保存（透明度を保持）
+    img.save(output_path, 'PNG')
+    print(f"Text image created: {output_path}")
+    print(f"Size: {width}x{height}")
+    print(f"Text: {text}")
+
+def render_text_image(text, width, height, font_size):
+    """
+    テキストを中央に描画した画像を生成
+
+    Args:
+        text: 表示するテキスト
+        width: 画像の幅
+        height: 画像の高さ
+        font_size: フォントサイズ
+
+    Returns:
+        numpy array: RGBA画像データ
+    """
     # 透明な画像を作成
     img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
 
     # フォントを読み込む（日本語対応）
-    try:
-        # Windows日本語フォント
-        font = ImageFont.truetype('C:/Windows/Fonts/msgothic.ttc', font_size)
-    except:
-        try:
-            # フォールバック: Arial
-            font = ImageFont.truetype('C:/Windows/Fonts/arial.ttf', font_size)
-        except:
-            # デフォルトフォント
-            font = ImageFont.load_default()
+    font_path = resolve_font_path()
+    font = ImageFont.load_default() if font_path is None else load_font(font_path, font_size)
 
     # テキストのバウンディングボックスを取得
     bbox = draw.textbbox((0, 0), text, font=font)
@@ -55,11 +100,7 @@ def create_text_image(text, output_path, width=1080, height=1920, font_size=80):
     text_color = (255, 255, 255, 255)
     draw.text((x, y), text, font=font, fill=text_color)
 
-    # PNG形式で保存（透明度を保持）
-    img.save(output_path, 'PNG')
-    print(f"Text image created: {output_path}")
-    print(f"Size: {width}x{height}")
-    print(f"Text: {text}")
+    return np.array(img)
 
 if __name__ == '__main__':
     if len(sys.argv) < 3:
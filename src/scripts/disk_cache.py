@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+コンテンツアドレス型のディスクキャッシュ
+キーごとに1ディレクトリを作成し、アトミックに書き込み、サイズ上限を超えたら
+最終アクセスが古い順（LRU）に削除する。複数プロセスから同時に使用できる
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+# デフォルトのキャッシュ上限（バイト）
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# 書き込み途中のディレクトリの接頭辞（読み込み・削除対象から除外）
+TEMP_PREFIX = '.tmp-'
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    ファイル内容のSHA-256ハッシュを計算
+
+    Args:
+        path: ファイルのパス
+        chunk_size: 読み込み単位（バイト）
+
+    Returns:
+        str: 16進数のハッシュ値
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_key(*parts):
+    """
+    JSONシリアライズ可能な値の組からキャッシュキーを作成
+
+    Args:
+        *parts: キーを構成する値
+
+    Returns:
+        str: 16進数のキー
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _dir_size(path):
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+class DiskCache:
+    """
+    キーごとのディレクトリにファイルを保存するLRUキャッシュ
+
+    エントリは一時ディレクトリに書き込んでからリネームで公開するため、
+    読み込み側が書き込み途中のエントリを見ることはない
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, key):
+        """キーに対応するエントリのディレクトリ"""
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """
+        エントリのディレクトリを返し、アクセス時刻を更新
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            str or None: エントリのディレクトリ（存在しない場合はNone）
+        """
+        path = self.entry_path(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key, write_func):
+        """
+        エントリを作成
+
+        Args:
+            key: キャッシュキー
+            write_func: 一時ディレクトリのパスを受け取り、ファイルを書き込む関数
+
+        Returns:
+            str: 公開されたエントリのディレクトリ
+        """
+        path = self.entry_path(key)
+        tmp_path = tempfile.mkdtemp(prefix=TEMP_PREFIX, dir=self.cache_dir)
+        try:
+            write_func(tmp_path)
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # 他のプロセスが先に同じエントリを作成した
+                if not os.path.isdir(path):
+                    raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self.evict()
+        return path
+
+    def evict(self):
+        """
+        合計サイズが上限を超えている間、最終アクセスが古いエントリから削除
+        """
+        if not self.max_bytes or self.max_bytes <= 0:
+            return
+
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(TEMP_PREFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(path):
+                continue
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            size = _dir_size(path)
+            entries.append((mtime, size, path))
+            total += size
+
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+描画したテキスト画像のキャッシュ
+テキスト・実際に読み込まれるフォントファイル・描画オプション・フレームサイズをキーとして、
+不透明な範囲に切り抜いた画像（スプライト）と配置位置を DiskCache に保存する。
+同じタイトルとスタイルを使うジョブでは、プロセスをまたいで描画を省略できる
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from disk_cache import DiskCache, make_key
+
+# キャッシュの保存先を指定する環境変数（'off' の場合はキャッシュしない）
+OVERLAY_CACHE_ENV = 'TEXT_OVERLAY_CACHE_DIR'
+
+# デフォルトのキャッシュの保存先
+DEFAULT_OVERLAY_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'temp',
+                                         'overlay_cache')
+
+# キャッシュの上限（バイト）
+OVERLAY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# 描画結果が変わる変更をした場合に上げる（古いエントリを使わないようにする）
+OVERLAY_CACHE_VERSION = 1
+
+# プロセス内で保持するテキスト画像の数（バッチ処理で同じタイトルを読み直さない）
+OVERLAY_MEMO_SIZE = 32
+_overlay_memo = OrderedDict()
+_overlay_memo_lock = threading.Lock()
+
+SPRITE_FILE = 'sprite.png'
+META_FILE = 'meta.json'
+
+def open_cache(cache_dir=None):
+    """
+    テキスト画像のキャッシュを開く
+
+    Args:
+        cache_dir: 保存先（Noneの場合は環境変数 TEXT_OVERLAY_CACHE_DIR、未設定なら
+                   DEFAULT_OVERLAY_CACHE_DIR）
+
+    Returns:
+        DiskCache or None: キャッシュ（'off' が指定された場合や作成できない場合は None）
+    """
+    cache_dir = cache_dir or os.environ.get(OVERLAY_CACHE_ENV) or DEFAULT_OVERLAY_CACHE_DIR
+    if cache_dir == 'off':
+        return None
+    try:
+        return DiskCache(cache_dir, max_bytes=OVERLAY_CACHE_MAX_BYTES)
+    except OSError as e:
+        print(f"Warning: Overlay cache is disabled: {e}")
+        return None
+
+def font_identity(font_path):
+    """
+    キャッシュキーに含めるフォントファイルの識別情報（パス・サイズ・更新時刻）
+
+    Args:
+        font_path: 実際に読み込まれるフォントファイル（None の場合はデフォルトフォント）
+
+    Returns:
+        list or None: 識別情報
+    """
+    if font_path is None:
+        return None
+    stat = os.stat(font_path)
+    return [os.path.abspath(font_path), stat.st_size, stat.st_mtime_ns]
+
+def overlay_key(renderer, text, font_path, options, width, height):
+    """
+    テキスト画像のキャッシュキーを作成
+
+    Args:
+        renderer: 描画する関数の名前（描画方法の異なるスクリプトを区別する）
+        text: 表示するテキスト
+        font_path: 実際に読み込まれるフォントファイル
+        options: 描画オプションの辞書（JSONシリアライズ可能な値）
+        width: フレームの幅
+        height: フレームの高さ
+
+    Returns:
+        str: キャッシュキー
+    """
+    import PIL
+    return make_key('overlay', OVERLAY_CACHE_VERSION, PIL.__version__, renderer, text,
+                    font_identity(font_path), options, width, height)
+
+def crop_to_content(image):
+    """
+    RGBA画像を不透明な画素の外接矩形に切り抜く
+
+    Args:
+        image: RGBA画像データ（高さ x 幅 x 4）
+
+    Returns:
+        tuple or None: (切り抜いた画像, 左上のX座標, 左上のY座標)。すべて透明な場合は None
+    """
+    alpha = image[:, :, 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(alpha.any(axis=0))
+    top, bottom = rows[0], rows[-1] + 1
+    left, right = cols[0], cols[-1] + 1
+    return image[top:bottom, left:right], int(left), int(top)
+
+def _read_entry(path):
+    with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta['empty']:
+        return None
+    sprite_path = os.path.join(path, SPRITE_FILE)
+    with Image.open(sprite_path) as image:
+        sprite = np.array(image.convert('RGBA'))
+    return {'sprite': sprite, 'x': meta['x'], 'y': meta['y'], 'png': sprite_path}
+
+def _write_entry(cropped, path):
+    meta = {'empty': cropped is None}
+    if cropped is not None:
+        sprite, x, y = cropped
+        Image.fromarray(sprite).save(os.path.join(path, SPRITE_FILE))
+        meta.update({'x': x, 'y': y, 'width': sprite.shape[1], 'height': sprite.shape[0]})
+    with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+def get_overlay(cache, key, render):
+    """
+    キャッシュからテキスト画像を取得し、なければ描画して保存
+
+    取得したテキスト画像はプロセス内でも OVERLAY_MEMO_SIZE 個まで保持する
+
+    Args:
+        cache: DiskCache（Noneの場合はキャッシュせずに描画する）
+        key: overlay_key で作成したキー
+        render: フレーム全体のRGBA画像を描画する関数（引数なし）
+
+    Returns:
+        dict or None: {'sprite': 切り抜いたRGBA画像, 'x', 'y': 配置位置,
+                       'png': キャッシュ内のPNGのパス（キャッシュしない場合は None）}。
+                      テキスト画像がすべて透明な場合は None
+    """
+    with _overlay_memo_lock:
+        if key in _overlay_memo:
+            _overlay_memo.move_to_end(key)
+            overlay = _overlay_memo[key]
+            print("  Using cached overlay")
+            # 他のプロセスがキャッシュから削除したPNGは使わない
+            if overlay is not None and overlay['png'] is not None and not os.path.isfile(overlay['png']):
+                overlay = dict(overlay, png=None)
+            return overlay
+
+    overlay = _load_overlay(cache, key, render)
+    with _overlay_memo_lock:
+        _overlay_memo[key] = overlay
+        while len(_overlay_memo) > OVERLAY_MEMO_SIZE:
+            _overlay_memo.popitem(last=False)
+    return overlay
+
+def _load_overlay(cache, key, render):
+    # ディスクキャッシュから読み込み、なければ描画して保存
+    if cache is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            try:
+                overlay = _read_entry(entry)
+                print("  Using cached overlay")
+                return overlay
+            except (OSError, ValueError, KeyError):
+                # 壊れたエントリは描画し直す
+                pass
+
+    cropped = crop_to_content(render())
+
+    png = None
+    if cache is not None:
+        try:
+            entry = cache.put(key, lambda path: _write_entry(cropped, path))
+            png = os.path.join(entry, SPRITE_FILE)
+        except OSError as e:
+            print(f"Warning: Could not write overlay cache: {e}")
+
+    if cropped is None:
+        return None
+    sprite, x, y = cropped
+    return {'sprite': sprite, 'x': x, 'y': y, 'png': png if png and os.path.isfile(png) else None}
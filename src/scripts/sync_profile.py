@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音声同期の処理時間とカウンタの計測
+フェーズごとの経過時間・呼び出し回数と、デコードしたバイト数などのカウンタを記録する。
+計測中のプロファイルがない場合、phase と count は何もしない
+"""
+import os
+import sys
+import time
+import threading
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    # Windows では最大常駐メモリを取得しない
+    resource = None
+
+# 計測中のプロファイル（activate で設定）
+_active_profile = None
+
+# cProfile の出力先を指定する環境変数（{pid}、{mode}、{time} を置換）
+CPROFILE_ENV = 'AUDIO_SYNC_CPROFILE'
+
+class SyncProfile:
+    """
+    フェーズごとの経過時間（入れ子のフェーズは外側にも含まれる）とカウンタ
+
+    スレッドから同時に記録できる。プロセスプールのワーカー内の記録は含まれない
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_phase(self, name, elapsed):
+        with self._lock:
+            entry = self.phases.setdefault(name, {'time': 0.0, 'calls': 0})
+            entry['time'] += elapsed
+            entry['calls'] += 1
+
+    def add_count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        """
+        結果のJSONに含める形式に変換
+
+        Returns:
+            dict: {'total_time', 'peak_rss', 'phases': {名前: {'time', 'calls'}}, 'counters': {名前: 値}}
+        """
+        with self._lock:
+            return {
+                'total_time': round(time.perf_counter() - self.started, 6),
+                'peak_rss': peak_rss(),
+                'phases': {name: {'time': round(entry['time'], 6), 'calls': entry['calls']}
+                           for name, entry in self.phases.items()},
+                'counters': dict(self.counters)
+            }
+
+def peak_rss():
+    """
+    プロセスの最大常駐メモリ（バイト）
+
+    プロセス開始時からの最大値のため、常駐サーバーでは以前のリクエストも含む。
+    プロセスプールのワーカーは含まない
+
+    Returns:
+        int or None: 最大常駐メモリ（取得できない環境では None）
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS はバイト、Linux はキロバイト単位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+@contextlib.contextmanager
+def activate(profile):
+    """
+    profile を計測中のプロファイルに設定する
+
+    Args:
+        profile: SyncProfile
+    """
+    global _active_profile
+    previous = _active_profile
+    _active_profile = profile
+    try:
+        yield profile
+    finally:
+        _active_profile = previous
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    with ブロックの経過時間をフェーズとして記録
+
+    Args:
+        name: フェーズ名
+    """
+    profile = _active_profile
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_phase(name, time.perf_counter() - start)
+
+def count(name, value=1):
+    """
+    カウンタに値を加算
+
+    Args:
+        name: カウンタ名
+        value: 加算する値
+    """
+    profile = _active_profile
+    if profile is not None:
+        profile.add_count(name, int(value))
+
+@contextlib.contextmanager
+def cprofile(mode):
+    """
+    環境変数 AUDIO_SYNC_CPROFILE が設定されている場合、with ブロックを cProfile で計測して
+    pstats 形式で保存する
+
+    Args:
+        mode: 出力ファイル名の {mode} に入れる同期モード
+    """
+    path = os.environ.get(CPROFILE_ENV)
+    if not path:
+        yield
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        output = path.format(pid=os.getpid(), mode=mode, time=int(time.time()))
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        profiler.dump_stats(output)
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+テキストのレイアウト計算
+背景ボックスに収まる最大のフォントサイズを二分探索し、改行した行と各行の寸法を
+TextLayout にまとめて返す。読み込んだフォントと文字列ごとの寸法はメモ化されるため、
+同じフォント・サイズの測定は一度だけ行われ、描画時に測り直す必要がない
+"""
+import platform
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+# 行の高さ（フォントサイズに対する比率、行間を含む）
+LINE_HEIGHT_RATIO = 1.3
+
+# メモ化する文字列の寸法の数
+MEASURE_MEMO_SIZE = 8192
+
+# 文字の間で改行できる文字のコードポイント範囲
+CJK_RANGES = (
+    (0x1100, 0x11FF),   # ハングル字母
+    (0x2E80, 0x2FDF),   # CJK部首
+    (0x3000, 0x30FF),   # CJK記号・句読点、ひらがな、カタカナ
+    (0x3100, 0x31FF),   # 注音字母、カタカナ拡張など
+    (0x3400, 0x4DBF),   # CJK統合漢字拡張A
+    (0x4E00, 0x9FFF),   # CJK統合漢字
+    (0xAC00, 0xD7AF),   # ハングル音節
+    (0xF900, 0xFAFF),   # CJK互換漢字
+    (0xFE30, 0xFE4F),   # CJK互換形
+    (0xFF00, 0xFFEF),   # 半角・全角形
+    (0x20000, 0x2FFFF),  # CJK統合漢字拡張B以降
+)
+
+# 行頭禁則文字（行の先頭に置かない）
+NO_LINE_START = frozenset(
+    '、。，．,.・：；:;？！?!…‥ー〜～'
+    '）」』】〕〉》｝〙〗］)]}｣'
+    'ぁぃぅぇぉっゃゅょゎゕゖァィゥェォッャュョヮヵヶㇰㇱㇲㇳㇴㇵㇶㇷㇸㇹㇺㇻㇼㇽㇾㇿ々〻ゝゞヽヾ'
+    'ｧｨｩｪｫｯｬｭｮｰ'
+)
+
+# 行末禁則文字（行の末尾に置かない）
+NO_LINE_END = frozenset('（「『【〔〈《｛〘〖［([{｢')
+
+# 寸法の測定に使う描画コンテキスト（描画はしない）
+_measure_draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
+def get_font_path(font_family, font_weight='normal'):
+    """
+    フォントファミリーとウェイトからフォントパスを取得（クロスプラットフォーム対応）
+
+    Args:
+        font_family: フォントファミリー名
+        font_weight: normal または bold
+
+    Returns:
+        フォントファイルのパス
+    """
+    os_type = platform.system()
+
+    # Windows用フォントマップ
+    windows_fonts = {
+        'msgothic': {
+            'normal': 'C:/Windows/Fonts/msgothic.ttc',
+            'bold': 'C:/Windows/Fonts/msgothic.ttc'
+        },
+        'msmincho': {
+            'normal': 'C:/Windows/Fonts/msmincho.ttc',
+            'bold': 'C:/Windows/Fonts/msmincho.ttc'
+        },
+        'meiryo': {
+            'normal': 'C:/Windows/Fonts/meiryo.ttc',
+            'bold': 'C:/Windows/Fonts/meiryob.ttc'
+        },
+        'yugothic': {
+            'normal': 'C:/Windows/Fonts/YuGothM.ttc',
+            'bold': 'C:/Windows/Fonts/YuGothB.ttc'
+        },
+        'arial': {
+            'normal': 'C:/Windows/Fonts/arial.ttf',
+            'bold': 'C:/Windows/Fonts/arialbd.ttf'
+        },
+        'times': {
+            'normal': 'C:/Windows/Fonts/times.ttf',
+            'bold': 'C:/Windows/Fonts/timesbd.ttf'
+        }
+    }
+
+    # Mac用フォントマップ
+    mac_fonts = {
+        'msgothic': {
+            'normal': '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
+            'bold': '/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc'
+        },
+        'msmincho': {
+            'normal': '/System/Library/Fonts/ヒラギノ明朝 ProN W3.ttc',
+            'bold': '/System/Library/Fonts/ヒラギノ明朝 ProN W6.ttc'
+        },
+        'meiryo': {
+            'normal': '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
+            'bold': '/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc'
+        },
+        'yugothic': {
+            'normal': '/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc',
+            'bold': '/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc'
+        },
+        'arial': {
+            'normal': '/System/Library/Fonts/Supplemental/Arial.ttf',
+            'bold': '/System/Library/Fonts/Supplemental/Arial Bold.ttf'
+        },
+        'times': {
+            'normal': '/Library/Fonts/Times New Roman.ttf',
+            'bold': '/Library/Fonts/Times New Roman Bold.ttf'
+        }
+    }
+
+    # プラットフォームに応じてフォントマップを選択
+    if os_type == 'Darwin':  # macOS
+        font_map = mac_fonts
+    else:  # Windows, Linux
+        font_map = windows_fonts
+
+    font_paths = font_map.get(font_family, font_map.get('msgothic', {}))
+    return font_paths.get(font_weight, font_paths.get('normal', None))
+
+def fallback_font_paths():
+    """
+    指定したフォントが読み込めない場合に試すフォント（プラットフォーム別）
+
+    Returns:
+        list: フォントファイルのパス
+    """
+    if platform.system() == 'Darwin':  # macOS
+        return [
+            '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
+            '/System/Library/Fonts/Helvetica.ttc',
+            '/System/Library/Fonts/Supplemental/Arial.ttf'
+        ]
+    # Windows
+    return [
+        'C:/Windows/Fonts/msgothic.ttc',
+        'C:/Windows/Fonts/arial.ttf'
+    ]
+
+@lru_cache(maxsize=64)
+def resolve_font_path(font_path):
+    """
+    実際に読み込まれるフォントファイルを返す
+
+    font_path が読み込めない場合はプラットフォームの代替フォントを順に試す
+
+    Args:
+        font_path: フォントファイルのパス（None の場合は代替フォント）
+
+    Returns:
+        str or None: 読み込めたフォントファイルのパス（すべて失敗した場合は None で、
+                     Pillow のデフォルトフォントを使う）
+    """
+    for path in [font_path] + fallback_font_paths():
+        if not path:
+            continue
+        try:
+            ImageFont.truetype(path, 10)
+            return path
+        except OSError:
+            continue
+    return None
+
+@lru_cache(maxsize=256)
+def load_font(font_path, font_size):
+    """
+    フォントを読み込む（同じパスとサイズのフォントは再利用）
+
+    font_path が読み込めない場合はプラットフォームの代替フォント、
+    それもない場合は Pillow のデフォルトフォントを使う
+
+    Args:
+        font_path: フォントファイルのパス（None の場合は代替フォント）
+        font_size: フォントサイズ
+
+    Returns:
+        ImageFont: フォント
+    """
+    path = resolve_font_path(font_path)
+    if path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, font_size)
+
+@lru_cache(maxsize=MEASURE_MEMO_SIZE)
+def measure(font_path, font_size, text):
+    """
+    文字列の描画範囲を測定（フォント・サイズ・文字列ごとにメモ化）
+
+    Args:
+        font_path: フォントファイルのパス
+        font_size: フォントサイズ
+        text: 測定する文字列
+
+    Returns:
+        tuple: (幅, 高さ)
+    """
+    bbox = _measure_draw.textbbox((0, 0), text, font=load_font(font_path, font_size))
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+@lru_cache(maxsize=MEASURE_MEMO_SIZE)
+def advance(font_path, font_size, char):
+    """
+    文字の送り幅（フォント・サイズ・文字ごとにメモ化）
+
+    Args:
+        font_path: フォントファイルのパス
+        font_size: フォントサイズ
+        char: 文字
+
+    Returns:
+        float: 送り幅
+    """
+    return load_font(font_path, font_size).getlength(char)
+
+def is_cjk(char):
+    """
+    文字の間で改行できる文字（漢字・かな・全角記号・ハングル）か
+
+    Args:
+        char: 文字
+
+    Returns:
+        bool: CJKの文字であれば True
+    """
+    code = ord(char)
+    return any(low <= code <= high for low, high in CJK_RANGES)
+
+def _break_opportunities(text):
+    # 改行できる位置を (行の終わり, 次の行の始まり) のリストで返す（末尾を含む）
+    # 空白では空白を除いて改行し、CJKの文字の前後では禁則文字を避けて文字の間で改行する
+    breaks = []
+    for k in range(1, len(text)):
+        char, previous = text[k], text[k - 1]
+        if char == ' ':
+            breaks.append((k, k + 1))
+        elif previous == ' ':
+            continue
+        elif (is_cjk(previous) or is_cjk(char)) \
+                and char not in NO_LINE_START and previous not in NO_LINE_END:
+            breaks.append((k, k))
+    breaks.append((len(text), len(text)))
+    return breaks
+
+def _break_line(text, font_path, font_size, max_width, lines):
+    # 文字ごとの送り幅の累積和で、各行に収まる最後の改行位置を線形に探す
+    # （送り幅の和は描画範囲と僅かに異なるため、決めた行は描画範囲で確認して調整する）
+    cumulative = [0.0]
+    for char in text:
+        cumulative.append(cumulative[-1] + advance(font_path, font_size, char))
+
+    def fits(start, end):
+        return measure(font_path, font_size, text[start:end])[0] <= max_width
+
+    breaks = _break_opportunities(text)
+    start = 0
+    first = 0
+    while start < len(text):
+        while breaks[first][0] <= start:
+            first += 1
+
+        last = first
+        while last + 1 < len(breaks) and cumulative[breaks[last + 1][0]] - cumulative[start] <= max_width:
+            last += 1
+        # 描画範囲で収まるように前後の改行位置へ調整（1つの単位で幅を超える場合はその単位だけの行）
+        while last > first and not fits(start, breaks[last][0]):
+            last -= 1
+        while last + 1 < len(breaks) and fits(start, breaks[last + 1][0]):
+            last += 1
+
+        end, next_start = breaks[last]
+        lines.append(text[start:end])
+        start = next_start
+        first = last + 1
+
+def wrap_lines(text, font_path, font_size, max_width):
+    """
+    テキストを指定幅に収まるように改行
+    改行文字 (\n) がある場合はそこで強制改行し、幅を超える行はさらに改行する
+
+    空白のほか、日本語などのCJKの文字の間でも改行する（行頭に句読点や閉じ括弧、
+    行末に開き括弧が来ないように禁則処理を行う）。空白で区切られていない
+    英数字の並びは途中で改行しない
+
+    Args:
+        text: 元のテキスト
+        font_path: フォントファイルのパス
+        font_size: フォントサイズ
+        max_width: 最大幅
+
+    Returns:
+        list: 改行されたテキスト行
+    """
+    lines = []
+    if '\n' not in text:
+        _break_line(' '.join(text.split()), font_path, font_size, max_width, lines)
+        return lines
+
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if measure(font_path, font_size, line)[0] <= max_width:
+            lines.append(line)
+        else:
+            _break_line(' '.join(line.split()), font_path, font_size, max_width, lines)
+    return lines
+
+class TextLayout:
+    """
+    フォントサイズ・改行・各行の寸法を保持するレイアウト
+
+    描画側は lines と line_widths を使うだけで、寸法を測り直さない
+    """
+
+    def __init__(self, font_path, font_size, lines, fitted=True):
+        """
+        Args:
+            font_path: フォントファイルのパス
+            font_size: フォントサイズ
+            lines: 改行されたテキスト行
+            fitted: 制約に収まるサイズが見つかったか（False の場合は最小サイズで切り詰めた）
+        """
+        self.font_path = font_path
+        self.font_size = font_size
+        self.font = load_font(font_path, font_size)
+        self.lines = lines
+        self.fitted = fitted
+        self.line_height = font_size * LINE_HEIGHT_RATIO
+
+        sizes = [measure(font_path, font_size, line) for line in lines]
+        self.line_widths = [width for width, _ in sizes]
+        self.width = max(self.line_widths, default=0)
+        # 実際の文字の高さ（最も高い行）
+        self.line_text_height = max((height for _, height in sizes), default=0)
+
+    @property
+    def height(self):
+        """
+        最後の行を除く行間込みの高さ + 最後の行の実際の高さ
+        """
+        if len(self.lines) > 1:
+            return self.line_height * (len(self.lines) - 1) + self.line_text_height
+        return self.line_text_height
+
+def _fits(lines, font_path, font_size, available_width, available_height, max_lines):
+    # 行数・高さ・各行の幅が制約に収まるか
+    if len(lines) > max_lines:
+        return False
+    if font_size * LINE_HEIGHT_RATIO * len(lines) > available_height:
+        return False
+    return all(measure(font_path, font_size, line)[0] <= available_width for line in lines)
+
+def layout_text(text, max_width, max_height, font_path, min_font=10, max_font=30, max_lines=3,
+                padding=30):
+    """
+    バウンドリー内に収まる最大のフォントサイズを二分探索してレイアウト
+
+    フォントサイズが大きいほど行の幅と高さは増えるため、収まるかどうかは
+    サイズに対して単調とみなし、min_font から max_font の範囲を二分探索する
+
+    Args:
+        text: 表示するテキスト
+        max_width: 最大幅（背景の最大幅）
+        max_height: 最大高さ（背景の最大高さ、0の場合は高さ制限なし）
+        font_path: フォントファイルのパス
+        min_font: 最小フォントサイズ
+        max_font: 最大フォントサイズ
+        max_lines: 最大行数
+        padding: パディング
+
+    Returns:
+        TextLayout: レイアウト（収まらない場合は最小サイズで最大行数に切り詰めたもの）
+    """
+    # パディングを考慮した実際の使用可能幅・高さ（高さ制限が0の場合は無制限）
+    available_width = max_width - (padding * 2)
+    available_height = max_height - (padding * 2) if max_height > 0 else float('inf')
+
+    best = None
+    low, high = min_font, max_font
+    while low <= high:
+        font_size = (low + high) // 2
+        lines = wrap_lines(text, font_path, font_size, available_width)
+        if _fits(lines, font_path, font_size, available_width, available_height, max_lines):
+            best = (font_size, lines)
+            low = font_size + 1
+        else:
+            high = font_size - 1
+
+    if best is not None and best[1]:
+        return TextLayout(font_path, best[0], best[1])
+
+    # 最適なサイズが見つからなかった場合、最小フォントサイズで強制的に収める
+    print(f"  Warning: Could not fit text optimally. Using minimum font size {min_font}")
+    lines = wrap_lines(text, font_path, min_font, available_width)
+
+    # 行数が多すぎる場合は切り詰め、最後の行に省略記号を追加
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        if lines:
+            lines[-1] = lines[-1][:max(0, len(lines[-1]) - 3)] + '...'
+
+    return TextLayout(font_path, min_font, lines, fitted=False)